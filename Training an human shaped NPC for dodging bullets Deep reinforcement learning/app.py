@@ -4,6 +4,7 @@ Requires: pip install pywebview
 """
 
 import webview
+import json
 import os
 import sys
 
@@ -160,6 +161,9 @@ HTML_CONTENT = """
                 <button class="btn-reset" onclick="resetGame()">
                     <span>↻</span> Reset
                 </button>
+                <button class="btn-reset" onclick="loadDistilled()">
+                    <span>⇪</span> Load
+                </button>
             </div>
         </div>
         
@@ -225,6 +229,13 @@ HTML_CONTENT = """
                 return Math.max(0, x);
             }
             
+            setWeights({ w1, b1, w2, b2 }) {
+                this.w1 = w1;
+                this.b1 = b1;
+                this.w2 = w2;
+                this.b2 = b2;
+            }
+            
             forward(state) {
                 const hidden = [];
                 for (let i = 0; i < 8; i++) {
@@ -327,25 +338,38 @@ HTML_CONTENT = """
             frameCount: 0
         };
 
-        function getState() {
+        // NPC-bullet distances, measured once per frame and shared by the
+        // observation, the collision check and the reward shaping.
+        let frameInfo = null;
+
+        function measureBullets() {
             const npc = game.npc;
-            let closestBullet = null;
+            const n = game.bullets.length;
+            const dists = new Float64Array(n);
+            let nearest = -1;
             let minDist = Infinity;
             
-            for (const bullet of game.bullets) {
-                const dist = Math.sqrt(
-                    Math.pow(bullet.x - npc.x, 2) + Math.pow(bullet.y - npc.y, 2)
-                );
+            for (let i = 0; i < n; i++) {
+                const dx = game.bullets[i].x - npc.x;
+                const dy = game.bullets[i].y - npc.y;
+                const dist = Math.sqrt(dx * dx + dy * dy);
+                dists[i] = dist;
                 if (dist < minDist) {
                     minDist = dist;
-                    closestBullet = bullet;
+                    nearest = i;
                 }
             }
             
-            if (!closestBullet) {
+            return { dists, nearest, minDist };
+        }
+
+        function getState(info) {
+            const npc = game.npc;
+            if (info.nearest < 0) {
                 return [0, 0, 0, 0];
             }
             
+            const closestBullet = game.bullets[info.nearest];
             const dx = (closestBullet.x - npc.x) / 840;
             const dy = (closestBullet.y - npc.y) / 600;
             const dvx = closestBullet.vx / 5;
@@ -394,13 +418,10 @@ HTML_CONTENT = """
             game.bullets.push({ x, y, vx, vy, size: 8 });
         }
 
-        function checkCollision() {
+        function checkCollision(info) {
             const npc = game.npc;
-            for (const bullet of game.bullets) {
-                const dist = Math.sqrt(
-                    Math.pow(bullet.x - npc.x, 2) + Math.pow(bullet.y - npc.y, 2)
-                );
-                if (dist < npc.size + bullet.size) {
+            for (let i = 0; i < info.dists.length; i++) {
+                if (info.dists[i] < npc.size + game.bullets[i].size) {
                     return true;
                 }
             }
@@ -411,6 +432,7 @@ HTML_CONTENT = """
             game.npc = { x: 420, y: 300, size: 20, vx: 0, vy: 0 };
             game.bullets = [];
             game.frameCount = 0;
+            frameInfo = null;
         }
 
         function updateUI() {
@@ -426,7 +448,10 @@ HTML_CONTENT = """
         }
 
         function gameLoop() {
-            const state = getState();
+            if (!frameInfo) {
+                frameInfo = measureBullets();
+            }
+            const state = getState(frameInfo);
             
             let action;
             if (training && Math.random() < epsilon) {
@@ -456,19 +481,18 @@ HTML_CONTENT = """
             let r = 0.1;
             let done = false;
             
-            if (checkCollision()) {
+            frameInfo = measureBullets();
+            
+            if (checkCollision(frameInfo)) {
                 r = -10;
                 done = true;
                 stats.hits++;
             } else {
-                const minDist = Math.min(...game.bullets.map(b => 
-                    Math.sqrt(Math.pow(b.x - game.npc.x, 2) + Math.pow(b.y - game.npc.y, 2))
-                ), 1000);
-                r += minDist / 1000;
+                r += Math.min(frameInfo.minDist, 1000) / 1000;
             }
             
             totalReward += r;
-            const nextState = getState();
+            const nextState = getState(frameInfo);
             
             if (training) {
                 dqn.remember(state, action, r, nextState, done);
@@ -548,6 +572,26 @@ HTML_CONTENT = """
             btn.classList.remove('active');
         }
 
+        async function loadDistilled() {
+            if (!window.pywebview) {
+                alert('Loading weights needs the desktop app.');
+                return;
+            }
+            const res = await window.pywebview.api.load_model();
+            if (res.status !== 'success') {
+                alert(res.message);
+                return;
+            }
+            // Distilled weights are final: act greedily without online updates
+            dqn.setWeights(res.weights);
+            training = false;
+            epsilon = dqn.epsilonMin;
+            const btn = document.getElementById('trainBtn');
+            btn.innerHTML = '<span>▶</span> Train';
+            btn.classList.remove('active');
+            updateUI();
+        }
+
         // Start game loop
         gameLoop();
     </script>
@@ -567,8 +611,14 @@ class API:
         return {"status": "success", "message": "Model saved successfully!"}
     
     def load_model(self):
-        """Placeholder for loading model weights"""
-        return {"status": "success", "message": "Model loaded successfully!"}
+        """Load the distilled 4-8-4 weights written by `distill_dodge.py --page app`"""
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dqn_weights_app.json')
+        if not os.path.exists(path):
+            return {"status": "error",
+                    "message": "No dqn_weights_app.json found. Run distill_dodge.py --page app first."}
+        with open(path, 'r', encoding='utf-8') as f:
+            weights = json.load(f)
+        return {"status": "success", "message": "Model loaded successfully!", "weights": weights}
 
 
 def main():
@@ -0,0 +1,329 @@
+"""
+Bullet-hell mode of DodgeEnv: thousands of bullets and a crowd of NPCs.
+
+Same 840x600 arena, bullet spawning (random edge, speed 2-4, drift ±2),
+four actions, page geometry and reward as DodgeEnv (0.1 + nearest distance
+/ 1000, -10 on a hit), but bullets arrive at `spawn_rate` per frame
+(Poisson) up to `max_bullets` instead of one every 60 frames up to 8, and
+`num_npcs` NPCs share the field like the page's review crowd. Each NPC is its
+own episode: a hit or `max_steps` frames ends it and the NPC respawns at a
+random spot, while the bullets keep flying.
+
+Bullets live in one preallocated [max_bullets, 4] array whose first `count`
+rows are live. Moving, culling (compacted in place) and spawning are
+whole-array operations. Live bullets are then bucketed into a uniform grid
+of `VIEW`-pixel cells (counting sort on the cell id), and every NPC gathers
+the bullets in its 3x3 block of cells. That one query is the collision
+broad-phase and the observation: every bullet outside the block is at least
+`VIEW` away, so hits and the k nearest threats within `VIEW` are exact. Only
+an NPC with no bullet within `VIEW` falls back to measuring every bullet, to
+get the exact distance reward. `grid=False` measures every NPC against every
+bullet instead (for benchmarks; the trajectories are identical).
+
+The observation is DodgeEnv's with `k_nearest` bullets: offset and velocity
+of the k closest bullets within `VIEW`, scaled by 840/600/5, zero-padded.
+
+    env = BulletHell(num_npcs=64, spawn_rate=20, max_bullets=4000, seed=0)
+    obs, _ = env.reset()                     # [64, env.observation_size]
+    obs, rewards, terminated, truncated, info = env.step(actions)
+
+    python bullet_hell.py bench --bullets 64 256 1024 4096 --dense
+    python bullet_hell.py train --steps 200000 --spawn-rate 0.25 --max-bullets 64
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from dodge_env import ACTION_VELOCITY, BULLET_SIZE, CULL_MARGIN, HEIGHT, VX, VY, WIDTH, X, Y, DodgeEnv
+
+
+# Threat radius and grid cell size
+VIEW = 80.0
+# The grid spans the culling bounds, so every live bullet has a cell
+GRID_X = int(np.ceil((WIDTH + 2 * CULL_MARGIN) / VIEW))
+GRID_Y = int(np.ceil((HEIGHT + 2 * CULL_MARGIN) / VIEW))
+_NEIGHBOURS = np.array([(dx, dy) for dy in (-1, 0, 1) for dx in (-1, 0, 1)])
+
+
+def _cells(xy: np.ndarray) -> np.ndarray:
+    """Grid cell (column, row) of each point."""
+    return ((xy + CULL_MARGIN) // VIEW).astype(np.int64)
+
+
+class BulletHell(DodgeEnv):
+    """Vector version of DodgeEnv: `reset() -> obs [M, D], info`, `step(actions [M])` returns per-NPC arrays.
+
+    Episodes end per NPC, and the returned observation is already the respawned
+    NPC's; `info['final_obs']` keeps the observation it ended on.
+    """
+
+    def __init__(self, seed=None, k_nearest: int = 4, max_steps: int = 1000, page: str = 'human_npc',
+                 num_npcs: int = 1, spawn_rate: float = 1.0, max_bullets: int = 1024, grid: bool = True):
+        self.num_npcs = num_npcs
+        self.spawn_rate = spawn_rate
+        self.max_bullets = max_bullets
+        self.grid = grid
+        self._buf = np.zeros((max_bullets, 4))
+        self.count = 0
+        super().__init__(seed, k_nearest, max_steps, page)
+
+    @property
+    def bullets(self) -> np.ndarray:
+        return self._buf[:self.count]
+
+    def reset(self, seed=None):
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        self.count = 0
+        self.frame_count = 0
+        self.npcs = self._respawn_positions(self.num_npcs)
+        self.t = np.zeros(self.num_npcs, dtype=np.int64)
+        self.episode_returns = np.zeros(self.num_npcs)
+        return self._observe(*self._measure()[:4]), {}
+
+    def _respawn_positions(self, n: int) -> np.ndarray:
+        return self._low + self.rng.random((n, 2)) * (self._high - self._low)
+
+    def _spawn(self, n: int):
+        """Up to `n` bullets from random edges, drawn like DodgeEnv._spawn."""
+        n = min(n, self.max_bullets - self.count)
+        if n <= 0:
+            return
+        rng = self.rng
+        side = rng.integers(4, size=n)
+        along = rng.random(n)
+        speed = 2.0 + rng.random(n) * 2.0
+        drift = (rng.random(n) - 0.5) * 4.0
+        vertical = side < 2
+        b = self._buf[self.count:self.count + n]
+        b[:, X] = np.where(vertical, along * WIDTH, np.where(side == 2, 0.0, WIDTH))
+        b[:, Y] = np.where(vertical, np.where(side == 0, 0.0, HEIGHT), along * HEIGHT)
+        b[:, VX] = np.where(vertical, drift, np.where(side == 2, speed, -speed))
+        b[:, VY] = np.where(vertical, np.where(side == 0, speed, -speed), drift)
+        self.count += n
+
+    def _candidates(self):
+        """(npc, bullet) index pairs for every live bullet in each NPC's 3x3 block of grid cells."""
+        cell_xy = _cells(self.bullets[:, X:Y + 1])
+        cells = cell_xy[:, 1] * GRID_X + cell_xy[:, 0]
+        order = np.argsort(cells, kind='stable')
+        counts = np.bincount(cells, minlength=GRID_X * GRID_Y)
+        starts = np.cumsum(counts) - counts
+
+        npc_xy = _cells(self.npcs)
+        qx = npc_xy[:, 0:1] + _NEIGHBOURS[:, 0]
+        qy = npc_xy[:, 1:2] + _NEIGHBOURS[:, 1]
+        valid = (qx >= 0) & (qx < GRID_X) & (qy >= 0) & (qy < GRID_Y)
+        q = np.where(valid, qy * GRID_X + qx, 0).ravel()
+        lengths = np.where(valid.ravel(), counts[q], 0)
+        total = int(lengths.sum())
+        owner = np.repeat(np.arange(self.num_npcs * len(_NEIGHBOURS)) // len(_NEIGHBOURS), lengths)
+        within = np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        return owner, order[np.repeat(starts[q], lengths) + within]
+
+    def _measure(self):
+        """Bullets within VIEW of each NPC as (npc, bullet, offset, distance), plus each NPC's nearest distance."""
+        M, n = self.num_npcs, self.count
+        min_dist = np.full(M, np.inf)
+        if n == 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, np.zeros((0, 2)), np.zeros(0), min_dist
+        if self.grid:
+            owner, bullet = self._candidates()
+        else:
+            owner, bullet = np.repeat(np.arange(M), n), np.tile(np.arange(n), M)
+        offset = self.bullets[bullet, X:Y + 1] - self.npcs[owner]
+        dist = np.sqrt(np.einsum('ij,ij->i', offset, offset))
+        np.minimum.at(min_dist, owner, dist)
+        near = dist < VIEW
+        # Nothing within VIEW: the nearest bullet is outside the block, so measure all of them
+        far = np.flatnonzero(min_dist >= VIEW)
+        if len(far) and self.grid:
+            d = self.bullets[None, :, X:Y + 1] - self.npcs[far, None]
+            min_dist[far] = np.sqrt(np.einsum('mbi,mbi->mb', d, d)).min(axis=1)
+        return owner[near], bullet[near], offset[near], dist[near], min_dist
+
+    def _observe(self, owner, bullet, offset, dist) -> np.ndarray:
+        obs = np.zeros((self.num_npcs, self.k, 4), dtype=np.float32)
+        if len(owner):
+            order = np.lexsort((dist, owner))
+            owner, bullet, offset = owner[order], bullet[order], offset[order]
+            rank = np.arange(len(owner)) - np.searchsorted(owner, owner)
+            keep = rank < self.k
+            feats = np.concatenate([offset[keep], self._buf[bullet[keep], VX:VY + 1]], axis=1)
+            obs[owner[keep], rank[keep]] = feats * self._scale
+        return obs.reshape(self.num_npcs, -1)
+
+    def step(self, actions):
+        self.npcs += ACTION_VELOCITY[np.asarray(actions, dtype=np.int64)]
+        np.clip(self.npcs, self._low, self._high, out=self.npcs)
+
+        b = self.bullets
+        b[:, X:Y + 1] += b[:, VX:VY + 1]
+        keep = ((b[:, X] > -CULL_MARGIN) & (b[:, X] < WIDTH + CULL_MARGIN)
+                & (b[:, Y] > -CULL_MARGIN) & (b[:, Y] < HEIGHT + CULL_MARGIN))
+        m = int(keep.sum())
+        if m < self.count:
+            self._buf[:m] = b[keep]
+            self.count = m
+
+        self._spawn(int(self.rng.poisson(self.spawn_rate)))
+        self.frame_count += 1
+
+        owner, bullet, offset, dist, min_dist = self._measure()
+        hit = np.zeros(self.num_npcs, dtype=bool)
+        hit[owner[dist < self.hit_radius + BULLET_SIZE]] = True
+        nearest = np.minimum(min_dist, 1000.0)
+        rewards = np.where(hit, -10.0, 0.1 + nearest / 1000.0)
+
+        self.t += 1
+        self.episode_returns += rewards
+        truncated = ~hit & (self.t >= self.max_steps)
+        obs = self._observe(owner, bullet, offset, dist)
+        info = {'min_dist': nearest, 'bullets': self.count, 'hits': int(hit.sum())}
+        done = np.flatnonzero(hit | truncated)
+        if len(done):
+            info.update({'final_obs': obs.copy(), 'done': done, 'episode_returns': self.episode_returns[done].copy(),
+                         'episode_lengths': self.t[done].copy()})
+            self.npcs[done] = self._respawn_positions(len(done))
+            self.t[done] = 0
+            self.episode_returns[done] = 0.0
+            obs = self._observe(*self._measure()[:4])
+        return obs, rewards, hit, truncated, info
+
+
+def benchmark(bullet_counts, num_npcs: int = 64, k: int = 4, steps: int = 200, grid: bool = True) -> list:
+    """Mean step time with the field kept full at each bullet cap."""
+    results = []
+    for cap in bullet_counts:
+        env = BulletHell(seed=0, k_nearest=k, num_npcs=num_npcs, spawn_rate=cap, max_bullets=cap, grid=grid)
+        actions = np.random.default_rng(0).integers(env.num_actions, size=(2 * steps, num_npcs))
+        for a in actions[:steps]:
+            env.step(a)
+        live = 0
+        start = time.perf_counter()
+        for a in actions[steps:]:
+            env.step(a)
+            live += env.count
+        elapsed = time.perf_counter() - start
+        results.append({'max_bullets': cap, 'mean_bullets': live / steps, 'npcs': num_npcs, 'grid': grid,
+                        'ms_per_step': 1000.0 * elapsed / steps})
+    return results
+
+
+def train(env: BulletHell, steps: int, hidden_size: int = 128, batch_size: int = 256, buffer_size: int = 100000,
+          lr: float = 5e-4, target_every: int = 2000, seed: int = 0, log_every: float = 5.0):
+    """Double DQN with one Q-network shared by every NPC, like `distill_dodge.train_teacher`."""
+    import torch
+    import torch.nn.functional as F
+
+    from distill_dodge import GAMMA, q_network
+
+    rng = np.random.default_rng(seed)
+    torch.manual_seed(seed)
+    model, target = q_network(hidden_size, env.observation_size), q_network(hidden_size, env.observation_size)
+    target.load_state_dict(model.state_dict())
+    optimizer = torch.optim.Adam(model.parameters(), lr=lr)
+
+    M, D = env.num_npcs, env.observation_size
+    buf_obs = np.zeros((buffer_size, D), dtype=np.float32)
+    buf_next = np.zeros((buffer_size, D), dtype=np.float32)
+    buf_action = np.zeros(buffer_size, dtype=np.int64)
+    buf_reward = np.zeros(buffer_size, dtype=np.float32)
+    buf_done = np.zeros(buffer_size, dtype=np.float32)
+    size = pos = 0
+    lengths = []
+    last_log = time.time()
+    obs, _ = env.reset(seed)
+
+    for t in range(0, steps, M):
+        epsilon = max(0.05, 1.0 - t / (0.5 * steps))
+        with torch.no_grad():
+            actions = model(torch.from_numpy(obs)).argmax(-1).numpy()
+        explore = rng.random(M) < epsilon
+        actions[explore] = rng.integers(env.num_actions, size=int(explore.sum()))
+
+        next_obs, rewards, terminated, _, info = env.step(actions)
+        rows = (pos + np.arange(M)) % buffer_size
+        buf_obs[rows], buf_action[rows], buf_reward[rows] = obs, actions, rewards
+        buf_next[rows] = info.get('final_obs', next_obs)
+        buf_done[rows] = terminated
+        pos = (pos + M) % buffer_size
+        size = min(size + M, buffer_size)
+        lengths.extend(info.get('episode_lengths', ()))
+        obs = next_obs
+
+        if size >= batch_size:
+            idx = rng.integers(size, size=batch_size)
+            s, s2 = torch.from_numpy(buf_obs[idx]), torch.from_numpy(buf_next[idx])
+            with torch.no_grad():
+                best = model(s2).argmax(-1, keepdim=True)
+                q_next = target(s2).gather(1, best).squeeze(1)
+                y = torch.from_numpy(buf_reward[idx]) + GAMMA * (1.0 - torch.from_numpy(buf_done[idx])) * q_next
+            q = model(s).gather(1, torch.from_numpy(buf_action[idx])[:, None]).squeeze(1)
+            loss = F.smooth_l1_loss(q, y)
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+
+        if (t // M) % max(1, target_every // M) == 0:
+            target.load_state_dict(model.state_dict())
+        if time.time() - last_log >= log_every:
+            last_log = time.time()
+            recent = lengths[-100:]
+            mean = sum(recent) / len(recent) if recent else float('nan')
+            print(f'step {t}/{steps}  epsilon {epsilon:.2f}  bullets {env.count}  mean episode length: {mean:.0f}',
+                  file=sys.stderr)
+
+    model.eval()
+    return model, lengths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Bullet-hell mode of the dodge environment: benchmark or train.')
+    sub = parser.add_subparsers(dest='command', required=True)
+    bench = sub.add_parser('bench', help='step time against bullet count')
+    bench.add_argument('--bullets', type=int, nargs='+', default=[8, 64, 256, 1024, 4096])
+    bench.add_argument('--npcs', type=int, default=64)
+    bench.add_argument('--k', type=int, default=4)
+    bench.add_argument('--steps', type=int, default=200)
+    bench.add_argument('--dense', action='store_true', help='also time measuring every NPC against every bullet')
+    tr = sub.add_parser('train', help='double DQN on the bullet-hell mode')
+    tr.add_argument('--steps', type=int, default=200000, help='NPC steps (frames x NPCs)')
+    tr.add_argument('--npcs', type=int, default=32)
+    tr.add_argument('--spawn-rate', type=float, default=0.25)
+    tr.add_argument('--max-bullets', type=int, default=64)
+    tr.add_argument('--k', type=int, default=4)
+    tr.add_argument('--page', choices=('app', 'human_npc'), default='human_npc')
+    tr.add_argument('--max-steps', type=int, default=1000)
+    tr.add_argument('--hidden-size', type=int, default=128)
+    tr.add_argument('--seed', type=int, default=0)
+    tr.add_argument('--save', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bullet_hell.pth'))
+    args = parser.parse_args(argv)
+
+    if args.command == 'bench':
+        results = benchmark(args.bullets, args.npcs, args.k, args.steps)
+        if args.dense:
+            results += benchmark(args.bullets, args.npcs, args.k, args.steps, grid=False)
+        print(json.dumps(results, indent=2))
+        return 0
+
+    import torch
+
+    env = BulletHell(seed=args.seed, k_nearest=args.k, max_steps=args.max_steps, page=args.page,
+                     num_npcs=args.npcs, spawn_rate=args.spawn_rate, max_bullets=args.max_bullets)
+    model, lengths = train(env, args.steps, args.hidden_size, seed=args.seed)
+    torch.save(model.state_dict(), args.save)
+    recent = lengths[-100:]
+    print(json.dumps({'saved': os.path.abspath(args.save), 'observation_size': env.observation_size,
+                      'episodes': len(lengths), 'mean_episode_length': float(np.mean(recent)) if recent else None}))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
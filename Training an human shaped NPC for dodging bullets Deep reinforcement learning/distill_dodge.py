@@ -0,0 +1,210 @@
+"""
+Train a wide Q-network on DodgeEnv headlessly and distill it into the page's 4→8→4 DQN.
+
+The page evaluates its DQN in plain JS every frame, so it stays at 4 inputs,
+8 hidden units and 4 actions. This script trains a larger double-DQN teacher
+over a batch of `DodgeEnv`s, logs the states it visits, regresses a 4→8→4
+student onto the teacher's Q-values (MSE, large minibatches) and writes the
+student in the page's layout (`w1[4][8]`, `b1`, `w2[8][4]`, `b2`). Press
+"Load" in the page to use it. The pages give the NPC a different hit radius
+and wall margin, so pass `--page` for the one the weights are meant for
+(`app` for app.py, `human_npc` for human_npc.py); the weights go to
+`dqn_weights_<page>.json`, the file that page's "Load" reads.
+
+Requires: pip install torch numpy
+
+    python distill_dodge.py --page app --steps 200000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+from dodge_env import PAGES, DodgeEnv
+
+
+GAMMA = 0.95  # same discount as the page's DQN
+
+
+def q_network(hidden_size: int, inputs: int = 4) -> nn.Sequential:
+    return nn.Sequential(nn.Linear(inputs, hidden_size), nn.ReLU(), nn.Linear(hidden_size, 4))
+
+
+def train_teacher(steps: int = 200000, hidden_size: int = 128, num_envs: int = 32, batch_size: int = 256,
+                  buffer_size: int = 100000, lr: float = 5e-4, target_every: int = 2000, seed: int = 0,
+                  log_every: float = 5.0, page: str = 'app') -> nn.Sequential:
+    """Double DQN over `num_envs` environments stepped in lockstep; returns the online network."""
+    rng = np.random.default_rng(seed)
+    torch.manual_seed(seed)
+    model, target = q_network(hidden_size), q_network(hidden_size)
+    target.load_state_dict(model.state_dict())
+    optimizer = torch.optim.Adam(model.parameters(), lr=lr)
+
+    envs = [DodgeEnv(seed=seed + i, page=page) for i in range(num_envs)]
+    obs = np.stack([env.reset()[0] for env in envs])
+    buf_obs = np.zeros((buffer_size, 4), dtype=np.float32)
+    buf_next = np.zeros((buffer_size, 4), dtype=np.float32)
+    buf_action = np.zeros(buffer_size, dtype=np.int64)
+    buf_reward = np.zeros(buffer_size, dtype=np.float32)
+    buf_done = np.zeros(buffer_size, dtype=np.float32)
+    size = pos = 0
+    lengths = []
+    last_log = time.time()
+
+    for t in range(0, steps, num_envs):
+        epsilon = max(0.05, 1.0 - t / (0.5 * steps))
+        with torch.no_grad():
+            actions = model(torch.from_numpy(obs)).argmax(-1).numpy()
+        explore = rng.random(num_envs) < epsilon
+        actions[explore] = rng.integers(4, size=int(explore.sum()))
+
+        for i, env in enumerate(envs):
+            next_obs, reward, terminated, truncated, info = env.step(actions[i])
+            buf_obs[pos], buf_action[pos], buf_reward[pos] = obs[i], actions[i], reward
+            buf_next[pos], buf_done[pos] = next_obs, float(terminated)
+            pos = (pos + 1) % buffer_size
+            size = min(size + 1, buffer_size)
+            if terminated or truncated:
+                lengths.append(info['episode_length'])
+                next_obs, _ = env.reset()
+            obs[i] = next_obs
+
+        if size >= batch_size:
+            idx = rng.integers(size, size=batch_size)
+            s, s2 = torch.from_numpy(buf_obs[idx]), torch.from_numpy(buf_next[idx])
+            with torch.no_grad():
+                best = model(s2).argmax(-1, keepdim=True)
+                q_next = target(s2).gather(1, best).squeeze(1)
+                y = torch.from_numpy(buf_reward[idx]) + GAMMA * (1.0 - torch.from_numpy(buf_done[idx])) * q_next
+            q = model(s).gather(1, torch.from_numpy(buf_action[idx])[:, None]).squeeze(1)
+            loss = F.smooth_l1_loss(q, y)
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+
+        if (t // num_envs) % max(1, target_every // num_envs) == 0:
+            target.load_state_dict(model.state_dict())
+        if time.time() - last_log >= log_every:
+            last_log = time.time()
+            recent = lengths[-100:]
+            mean = sum(recent) / len(recent) if recent else float('nan')
+            print(f'teacher step {t}/{steps}  epsilon {epsilon:.2f}  mean episode length: {mean:.0f}', file=sys.stderr)
+
+    model.eval()
+    return model
+
+
+def collect_states(teacher: nn.Module, num_states: int, num_envs: int = 64, explore: float = 0.1,
+                   seed: int = 0, page: str = 'app') -> np.ndarray:
+    """States visited by the teacher's greedy policy (with `explore` random actions)."""
+    rng = np.random.default_rng(seed)
+    envs = [DodgeEnv(seed=seed + 10000 + i, page=page) for i in range(num_envs)]
+    obs = np.stack([env.reset()[0] for env in envs])
+    states = []
+    with torch.no_grad():
+        while len(states) * num_envs < num_states:
+            states.append(obs.copy())
+            actions = teacher(torch.from_numpy(obs)).argmax(-1).numpy()
+            random_mask = rng.random(num_envs) < explore
+            actions[random_mask] = rng.integers(4, size=int(random_mask.sum()))
+            for i, env in enumerate(envs):
+                next_obs, _, terminated, truncated, _ = env.step(actions[i])
+                obs[i] = env.reset()[0] if terminated or truncated else next_obs
+    return np.concatenate(states)[:num_states]
+
+
+def distill(teacher: nn.Module, student: nn.Module, states: np.ndarray, epochs: int = 30,
+            batch_size: int = 4096, lr: float = 3e-3, gap_weight: float = 10.0) -> dict:
+    """Regress the student's Q-values (and their per-state action gaps) onto the teacher's."""
+    x = torch.from_numpy(states)
+    with torch.no_grad():
+        target = teacher(x)
+    optimizer = torch.optim.Adam(student.parameters(), lr=lr)
+    for _ in range(epochs):
+        perm = torch.randperm(len(x))
+        total = 0.0
+        for i in range(0, len(x), batch_size):
+            idx = perm[i:i + batch_size]
+            out, y = student(x[idx]), target[idx]
+            # Action gaps are small next to the Q-values themselves; weight them
+            # separately so the student keeps the teacher's action ranking.
+            gaps = F.mse_loss(out - out.mean(-1, keepdim=True), y - y.mean(-1, keepdim=True))
+            loss = F.mse_loss(out, y) + gap_weight * gaps
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+            total += loss.item() * len(idx)
+    student.eval()
+    with torch.no_grad():
+        agree = (student(x).argmax(-1) == target.argmax(-1)).float().mean().item()
+    return {'loss': total / len(x), 'action_agreement': agree}
+
+
+def mean_episode_length(model: nn.Module, episodes: int = 50, max_steps: int = 3000, seed: int = 0,
+                        page: str = 'app') -> float:
+    """Frames survived by the greedy policy on seeded episodes."""
+    lengths = []
+    with torch.no_grad():
+        for e in range(episodes):
+            env = DodgeEnv(seed=seed + e, max_steps=max_steps, page=page)
+            obs, _ = env.reset()
+            while True:
+                obs, _, terminated, truncated, info = env.step(int(model(torch.from_numpy(obs)).argmax()))
+                if terminated or truncated:
+                    lengths.append(info['episode_length'])
+                    break
+    return float(np.mean(lengths))
+
+
+def page_weights(student: nn.Sequential) -> dict:
+    """Student weights in the page's DQN layout (input-major matrices)."""
+    first, last = student[0], student[2]
+    return {
+        'w1': first.weight.detach().t().tolist(),
+        'b1': first.bias.detach().tolist(),
+        'w2': last.weight.detach().t().tolist(),
+        'b2': last.bias.detach().tolist(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Distill a large DQN teacher into the page-sized 4-8-4 network.')
+    parser.add_argument('--page', choices=sorted(PAGES), default='app',
+                        help='page the weights are for; sets the NPC hit radius and wall margin')
+    parser.add_argument('--steps', type=int, default=200000, help='teacher environment steps')
+    parser.add_argument('--teacher-hidden', type=int, default=128)
+    parser.add_argument('--states', type=int, default=200000, help='logged teacher states to distill on')
+    parser.add_argument('--epochs', type=int, default=30)
+    parser.add_argument('--eval-episodes', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default=None, help='weights file (default: dqn_weights_<page>.json next to this script)')
+    args = parser.parse_args(argv)
+    if args.out is None:
+        args.out = os.path.join(os.path.dirname(os.path.abspath(__file__)), f'dqn_weights_{args.page}.json')
+
+    teacher = train_teacher(args.steps, args.teacher_hidden, seed=args.seed, page=args.page)
+    states = collect_states(teacher, args.states, seed=args.seed, page=args.page)
+    student = q_network(8)
+    report = distill(teacher, student, states, epochs=args.epochs)
+    with open(args.out, 'w') as f:
+        json.dump(page_weights(student), f)
+
+    report['page'] = args.page
+    report['states'] = len(states)
+    report['out'] = os.path.abspath(args.out)
+    if args.eval_episodes:
+        report['teacher_mean_length'] = mean_episode_length(teacher, args.eval_episodes, page=args.page)
+        report['student_mean_length'] = mean_episode_length(student, args.eval_episodes, page=args.page)
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""
+Headless Python version of the bullet-dodging simulation in HTML_CONTENT.
+
+Mirrors the pages' gameLoop (840x600 arena, NPC speed 4, a bullet from a random
+edge every 60 frames up to 8 alive, reward 0.1 + nearest distance / 1000 or -10
+on a hit) with bullets held in one NumPy array. The two pages differ only in the
+NPC's hit radius and wall margin, picked with `page` (see PAGES). NPC-bullet distances are computed once per frame; the observation,
+collision check and reward shaping all read that single array, and the
+observation for the next frame reuses it instead of measuring again.
+"""
+
+import numpy as np
+
+
+WIDTH = 840
+HEIGHT = 600
+NPC_START = (420.0, 300.0)
+NPC_SPEED = 4.0
+BULLET_SIZE = 8.0
+SPAWN_EVERY = 60
+MAX_BULLETS = 8
+CULL_MARGIN = 50.0
+
+# NPC geometry per page: app.py's circle uses its size (20) for the hit test and
+# the wall clamp, human_npc.py's figure a 25 px radius and a 30 px margin.
+PAGES = {
+    'app': {'hit_radius': 20.0, 'margin': 20.0},
+    'human_npc': {'hit_radius': 25.0, 'margin': 30.0},
+}
+
+# Column layout of the bullet array
+X, Y, VX, VY = range(4)
+
+# 0=up, 1=down, 2=left, 3=right
+ACTION_VELOCITY = np.array([[0.0, -NPC_SPEED], [0.0, NPC_SPEED], [-NPC_SPEED, 0.0], [NPC_SPEED, 0.0]])
+
+
+class DodgeEnv:
+    """Gym-style dodge environment: `reset(seed) -> obs, info`, `step(a) -> obs, r, terminated, truncated, info`.
+
+    With `k_nearest=1` the observation is the page's `getState()`: offset and
+    velocity of the closest bullet scaled by 840/600/5. Larger `k` stacks the
+    k closest bullets (nearest first, zero-padded) for multi-threat policies.
+    `page` is a key of PAGES and should name the page the policy will run in.
+    """
+
+    num_actions = 4
+
+    def __init__(self, seed=None, k_nearest: int = 1, max_steps: int = 1000, page: str = 'human_npc'):
+        if page not in PAGES:
+            raise ValueError(f'unknown page {page!r}, expected one of {sorted(PAGES)}')
+        self.page = page
+        self.hit_radius = PAGES[page]['hit_radius']
+        margin = PAGES[page]['margin']
+        self._low = np.array([margin, margin])
+        self._high = np.array([WIDTH - margin, HEIGHT - margin])
+        self.k = k_nearest
+        self.observation_size = 4 * k_nearest
+        self.max_steps = max_steps
+        self.rng = np.random.default_rng(seed)
+        self._scale = np.array([1.0 / WIDTH, 1.0 / HEIGHT, 1.0 / 5.0, 1.0 / 5.0])
+        self.reset()
+
+    def reset(self, seed=None):
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        self.npc = np.array(NPC_START)
+        self.bullets = np.zeros((0, 4))
+        self.frame_count = 0
+        self.t = 0
+        self.episode_return = 0.0
+        self._measure()
+        return self._observe(), {}
+
+    def _measure(self):
+        """Distances from the NPC to every bullet; the one per-frame distance pass."""
+        self.offsets = self.bullets[:, X:Y + 1] - self.npc
+        self.dists = np.sqrt(np.einsum('ij,ij->i', self.offsets, self.offsets))
+
+    def nearest(self, k: int):
+        """Indices of the k closest bullets, nearest first (partial sort, then sort k)."""
+        n = len(self.dists)
+        if n == 0:
+            return np.zeros(0, dtype=np.int64)
+        if k >= n:
+            return np.argsort(self.dists, kind='stable')
+        idx = np.argpartition(self.dists, k - 1)[:k]
+        return idx[np.argsort(self.dists[idx], kind='stable')]
+
+    def _observe(self):
+        obs = np.zeros((self.k, 4), dtype=np.float32)
+        idx = self.nearest(self.k)
+        if len(idx):
+            feats = np.concatenate([self.offsets[idx], self.bullets[idx, VX:VY + 1]], axis=1)
+            obs[:len(idx)] = feats * self._scale
+        return obs.reshape(-1)
+
+    def _spawn(self):
+        rng = self.rng
+        side = int(rng.integers(4))
+        along = rng.random()
+        speed = 2.0 + rng.random() * 2.0
+        drift = (rng.random() - 0.5) * 4.0
+        if side == 0:
+            b = (along * WIDTH, 0.0, drift, speed)
+        elif side == 1:
+            b = (along * WIDTH, HEIGHT, drift, -speed)
+        elif side == 2:
+            b = (0.0, along * HEIGHT, speed, drift)
+        else:
+            b = (WIDTH, along * HEIGHT, -speed, drift)
+        self.bullets = np.vstack([self.bullets, b])
+
+    def step(self, action: int):
+        self.npc += ACTION_VELOCITY[int(action)]
+        np.clip(self.npc, self._low, self._high, out=self.npc)
+
+        b = self.bullets
+        b[:, X:Y + 1] += b[:, VX:VY + 1]
+        keep = ((b[:, X] > -CULL_MARGIN) & (b[:, X] < WIDTH + CULL_MARGIN)
+                & (b[:, Y] > -CULL_MARGIN) & (b[:, Y] < HEIGHT + CULL_MARGIN))
+        self.bullets = b[keep]
+
+        if self.frame_count % SPAWN_EVERY == 0 and len(self.bullets) < MAX_BULLETS:
+            self._spawn()
+        self.frame_count += 1
+
+        self._measure()
+        hit = bool((self.dists < self.hit_radius + BULLET_SIZE).any())
+        min_dist = float(min(self.dists.min(), 1000.0)) if len(self.dists) else 1000.0
+        reward = -10.0 if hit else 0.1 + min_dist / 1000.0
+
+        self.t += 1
+        self.episode_return += reward
+        truncated = not hit and self.t >= self.max_steps
+        info = {'min_dist': min_dist}
+        if hit or truncated:
+            info.update({'episode_return': self.episode_return, 'episode_length': self.t,
+                         'winner': 'player' if hit else None})
+        return self._observe(), reward, hit, truncated, info
@@ -4,6 +4,7 @@ Requires: pip install pywebview
 """
 
 import webview
+import json
 import os
 import sys
 
@@ -97,6 +98,10 @@ HTML_CONTENT = """
             color: white;
         }
         
+        .btn-reset.active {
+            background: #b388ff;
+        }
+        
         canvas {
             border: 4px solid #2d3561;
             border-radius: 8px;
@@ -160,6 +165,12 @@ HTML_CONTENT = """
                 <button class="btn-reset" onclick="resetGame()">
                     <span>↻</span> Reset
                 </button>
+                <button class="btn-reset" onclick="loadDistilled()">
+                    <span>⇪</span> Load
+                </button>
+                <button id="crowdBtn" class="btn-reset" onclick="toggleCrowd()">
+                    <span>👥</span> Crowd
+                </button>
             </div>
         </div>
         
@@ -225,6 +236,13 @@ HTML_CONTENT = """
                 return Math.max(0, x);
             }
             
+            setWeights({ w1, b1, w2, b2 }) {
+                this.w1 = w1;
+                this.b1 = b1;
+                this.w2 = w2;
+                this.b2 = b2;
+            }
+            
             forward(state) {
                 const hidden = [];
                 for (let i = 0; i < 8; i++) {
@@ -327,91 +345,172 @@ HTML_CONTENT = """
             frameCount: 0
         };
 
-        function drawHuman(x, y, color, isMoving) {
+        // Vector drawing of the humanoid at the origin; only used to fill the atlas.
+        function paintHuman(c, color, animOffset) {
             const scale = 1;
             
-            // Animation
-            const animOffset = isMoving ? Math.sin(game.frameCount * 0.2) * 3 : 0;
-            
-            ctx.save();
-            ctx.translate(x, y);
-            
             // Head
-            ctx.fillStyle = '#ffdbac';
-            ctx.beginPath();
-            ctx.arc(0, -25 * scale, 8 * scale, 0, Math.PI * 2);
-            ctx.fill();
+            c.fillStyle = '#ffdbac';
+            c.beginPath();
+            c.arc(0, -25 * scale, 8 * scale, 0, Math.PI * 2);
+            c.fill();
             
             // Eyes
-            ctx.fillStyle = '#000';
-            ctx.beginPath();
-            ctx.arc(-3 * scale, -26 * scale, 1.5 * scale, 0, Math.PI * 2);
-            ctx.arc(3 * scale, -26 * scale, 1.5 * scale, 0, Math.PI * 2);
-            ctx.fill();
+            c.fillStyle = '#000';
+            c.beginPath();
+            c.arc(-3 * scale, -26 * scale, 1.5 * scale, 0, Math.PI * 2);
+            c.arc(3 * scale, -26 * scale, 1.5 * scale, 0, Math.PI * 2);
+            c.fill();
             
             // Body
-            ctx.fillStyle = color;
-            ctx.fillRect(-6 * scale, -15 * scale, 12 * scale, 20 * scale);
+            c.fillStyle = color;
+            c.fillRect(-6 * scale, -15 * scale, 12 * scale, 20 * scale);
             
             // Arms
-            ctx.strokeStyle = color;
-            ctx.lineWidth = 4 * scale;
-            ctx.lineCap = 'round';
+            c.strokeStyle = color;
+            c.lineWidth = 4 * scale;
+            c.lineCap = 'round';
             
             // Left arm
-            ctx.beginPath();
-            ctx.moveTo(-6 * scale, -10 * scale);
-            ctx.lineTo(-12 * scale, -5 * scale + animOffset);
-            ctx.lineTo(-10 * scale, 2 * scale + animOffset);
-            ctx.stroke();
+            c.beginPath();
+            c.moveTo(-6 * scale, -10 * scale);
+            c.lineTo(-12 * scale, -5 * scale + animOffset);
+            c.lineTo(-10 * scale, 2 * scale + animOffset);
+            c.stroke();
             
             // Right arm
-            ctx.beginPath();
-            ctx.moveTo(6 * scale, -10 * scale);
-            ctx.lineTo(12 * scale, -5 * scale - animOffset);
-            ctx.lineTo(10 * scale, 2 * scale - animOffset);
-            ctx.stroke();
+            c.beginPath();
+            c.moveTo(6 * scale, -10 * scale);
+            c.lineTo(12 * scale, -5 * scale - animOffset);
+            c.lineTo(10 * scale, 2 * scale - animOffset);
+            c.stroke();
             
             // Legs
-            ctx.strokeStyle = '#2c3e50';
-            ctx.lineWidth = 4 * scale;
+            c.strokeStyle = '#2c3e50';
+            c.lineWidth = 4 * scale;
             
             // Left leg
-            ctx.beginPath();
-            ctx.moveTo(-3 * scale, 5 * scale);
-            ctx.lineTo(-6 * scale, 15 * scale - animOffset);
-            ctx.lineTo(-5 * scale, 25 * scale - animOffset);
-            ctx.stroke();
+            c.beginPath();
+            c.moveTo(-3 * scale, 5 * scale);
+            c.lineTo(-6 * scale, 15 * scale - animOffset);
+            c.lineTo(-5 * scale, 25 * scale - animOffset);
+            c.stroke();
             
             // Right leg
-            ctx.beginPath();
-            ctx.moveTo(3 * scale, 5 * scale);
-            ctx.lineTo(6 * scale, 15 * scale + animOffset);
-            ctx.lineTo(5 * scale, 25 * scale + animOffset);
-            ctx.stroke();
-            
-            ctx.restore();
+            c.beginPath();
+            c.moveTo(3 * scale, 5 * scale);
+            c.lineTo(6 * scale, 15 * scale + animOffset);
+            c.lineTo(5 * scale, 25 * scale + animOffset);
+            c.stroke();
+        }
+
+
+        // Pre-rendered NPC sprites: one atlas row per color, column 0 is the idle
+        // pose and the other columns are phases of the walking animation.
+        const SPRITE_W = 32;
+        const SPRITE_H = 68;
+        const SPRITE_OX = 16;
+        const SPRITE_OY = 34;
+        const SPRITE_FRAMES = 16;
+        const SPRITE_COLORS = ['#00ff88', '#4a9eff', '#b388ff'];
+        const spriteAtlas = buildSpriteAtlas();
+
+        function buildSpriteAtlas() {
+            const atlas = document.createElement('canvas');
+            atlas.width = SPRITE_W * (SPRITE_FRAMES + 1);
+            atlas.height = SPRITE_H * SPRITE_COLORS.length;
+            const c = atlas.getContext('2d');
+            SPRITE_COLORS.forEach((color, row) => {
+                for (let col = 0; col <= SPRITE_FRAMES; col++) {
+                    const animOffset = col === 0 ? 0 : Math.sin((col - 1) / SPRITE_FRAMES * Math.PI * 2) * 3;
+                    c.save();
+                    c.translate(col * SPRITE_W + SPRITE_OX, row * SPRITE_H + SPRITE_OY);
+                    paintHuman(c, color, animOffset);
+                    c.restore();
+                }
+            });
+            return atlas;
+        }
+
+        function drawHuman(x, y, color, isMoving) {
+            const phase = (game.frameCount * 0.2) % (Math.PI * 2);
+            const row = SPRITE_COLORS.indexOf(color);
+            if (row < 0) {
+                ctx.save();
+                ctx.translate(x, y);
+                paintHuman(ctx, color, isMoving ? Math.sin(phase) * 3 : 0);
+                ctx.restore();
+                return;
+            }
+            const col = isMoving ? 1 + Math.floor(phase / (Math.PI * 2) * SPRITE_FRAMES) % SPRITE_FRAMES : 0;
+            ctx.drawImage(spriteAtlas, col * SPRITE_W, row * SPRITE_H, SPRITE_W, SPRITE_H,
+                          Math.round(x) - SPRITE_OX, Math.round(y) - SPRITE_OY, SPRITE_W, SPRITE_H);
+        }
+
+        // Review crowd: extra NPCs acting greedily with the current DQN against the
+        // same bullets. They are not trained and a hit just respawns them.
+        const CROWD_SIZE = 200;
+        let crowd = [];
+
+        function spawnCrowdAgent() {
+            return { x: 30 + Math.random() * 780, y: 30 + Math.random() * 540, vx: 0, vy: 0 };
+        }
+
+        function toggleCrowd() {
+            crowd = crowd.length ? [] : Array.from({ length: CROWD_SIZE }, spawnCrowdAgent);
+            document.getElementById('crowdBtn').classList.toggle('active', crowd.length > 0);
         }
 
-        function getState() {
-            const npc = game.npc;
-            let closestBullet = null;
+        function stepCrowd() {
+            for (const agent of crowd) {
+                const info = measureBullets(agent);
+                if (checkCollision(info)) {
+                    Object.assign(agent, spawnCrowdAgent());
+                    continue;
+                }
+                const q = dqn.predict(getState(info, agent));
+                const action = q.indexOf(Math.max(...q));
+                agent.vx = action === 2 ? -4 : action === 3 ? 4 : 0;
+                agent.vy = action === 0 ? -4 : action === 1 ? 4 : 0;
+                agent.x = Math.max(30, Math.min(810, agent.x + agent.vx));
+                agent.y = Math.max(30, Math.min(570, agent.y + agent.vy));
+            }
+        }
+
+        // Smoothed frame interval and draw time for the overlay
+        const frameStats = { last: performance.now(), frameMs: 1000 / 60, drawMs: 0 };
+
+        // NPC-bullet distances, measured once per frame and shared by the
+        // observation, the collision check and the reward shaping. Crowd agents
+        // pass themselves as `npc` and go through the same getState/checkCollision.
+        let frameInfo = null;
+
+        function measureBullets(npc = game.npc) {
+            const n = game.bullets.length;
+            const dists = new Float64Array(n);
+            let nearest = -1;
             let minDist = Infinity;
             
-            for (const bullet of game.bullets) {
-                const dist = Math.sqrt(
-                    Math.pow(bullet.x - npc.x, 2) + Math.pow(bullet.y - npc.y, 2)
-                );
+            for (let i = 0; i < n; i++) {
+                const dx = game.bullets[i].x - npc.x;
+                const dy = game.bullets[i].y - npc.y;
+                const dist = Math.sqrt(dx * dx + dy * dy);
+                dists[i] = dist;
                 if (dist < minDist) {
                     minDist = dist;
-                    closestBullet = bullet;
+                    nearest = i;
                 }
             }
             
-            if (!closestBullet) {
+            return { dists, nearest, minDist };
+        }
+
+        function getState(info, npc = game.npc) {
+            if (info.nearest < 0) {
                 return [0, 0, 0, 0];
             }
             
+            const closestBullet = game.bullets[info.nearest];
             const dx = (closestBullet.x - npc.x) / 840;
             const dy = (closestBullet.y - npc.y) / 600;
             const dvx = closestBullet.vx / 5;
@@ -460,15 +559,11 @@ HTML_CONTENT = """
             game.bullets.push({ x, y, vx, vy, size: 8 });
         }
 
-        function checkCollision() {
-            const npc = game.npc;
+        function checkCollision(info) {
             const collisionRadius = 25; // Slightly larger to account for human body
             
-            for (const bullet of game.bullets) {
-                const dist = Math.sqrt(
-                    Math.pow(bullet.x - npc.x, 2) + Math.pow(bullet.y - npc.y, 2)
-                );
-                if (dist < collisionRadius + bullet.size) {
+            for (let i = 0; i < info.dists.length; i++) {
+                if (info.dists[i] < collisionRadius + game.bullets[i].size) {
                     return true;
                 }
             }
@@ -479,6 +574,7 @@ HTML_CONTENT = """
             game.npc = { x: 420, y: 300, size: 20, vx: 0, vy: 0, animFrame: 0 };
             game.bullets = [];
             game.frameCount = 0;
+            frameInfo = null;
         }
 
         function updateUI() {
@@ -494,7 +590,14 @@ HTML_CONTENT = """
         }
 
         function gameLoop() {
-            const state = getState();
+            const now = performance.now();
+            frameStats.frameMs += 0.1 * (now - frameStats.last - frameStats.frameMs);
+            frameStats.last = now;
+            
+            if (!frameInfo) {
+                frameInfo = measureBullets();
+            }
+            const state = getState(frameInfo);
             
             let action;
             if (training && Math.random() < epsilon) {
@@ -524,19 +627,20 @@ HTML_CONTENT = """
             let r = 0.1;
             let done = false;
             
-            if (checkCollision()) {
+            frameInfo = measureBullets();
+            
+            if (checkCollision(frameInfo)) {
                 r = -10;
                 done = true;
                 stats.hits++;
             } else {
-                const minDist = Math.min(...game.bullets.map(b => 
-                    Math.sqrt(Math.pow(b.x - game.npc.x, 2) + Math.pow(b.y - game.npc.y, 2))
-                ), 1000);
-                r += minDist / 1000;
+                r += Math.min(frameInfo.minDist, 1000) / 1000;
             }
             
+            stepCrowd();
+            
             totalReward += r;
-            const nextState = getState();
+            const nextState = getState(frameInfo);
             
             if (training) {
                 dqn.remember(state, action, r, nextState, done);
@@ -564,38 +668,50 @@ HTML_CONTENT = """
             game.frameCount++;
             
             // Draw
+            const drawStart = performance.now();
             ctx.fillStyle = '#0f0f1e';
             ctx.fillRect(0, 0, 840, 600);
             
-            // Draw human NPC
+            // Draw review crowd, then the human NPC on top
+            for (const agent of crowd) {
+                drawHuman(agent.x, agent.y, '#b388ff', agent.vx !== 0 || agent.vy !== 0);
+            }
             const npcColor = training ? '#00ff88' : '#4a9eff';
             const isMoving = game.npc.vx !== 0 || game.npc.vy !== 0;
             drawHuman(game.npc.x, game.npc.y, npcColor, isMoving);
             
-            // Draw bullets
+            // Draw bullets: every body in one path, then every trail on top in one path
             ctx.fillStyle = '#ff4757';
+            ctx.beginPath();
             for (const bullet of game.bullets) {
-                ctx.beginPath();
+                ctx.moveTo(bullet.x + bullet.size, bullet.y);
                 ctx.arc(bullet.x, bullet.y, bullet.size, 0, Math.PI * 2);
-                ctx.fill();
-                
-                // Bullet trail
-                ctx.fillStyle = 'rgba(255, 71, 87, 0.3)';
-                ctx.beginPath();
-                ctx.arc(bullet.x - bullet.vx * 2, bullet.y - bullet.vy * 2, bullet.size * 0.7, 0, Math.PI * 2);
-                ctx.fill();
-                ctx.fillStyle = '#ff4757';
             }
+            ctx.fill();
+            
+            ctx.fillStyle = 'rgba(255, 71, 87, 0.3)';
+            ctx.beginPath();
+            for (const bullet of game.bullets) {
+                const tx = bullet.x - bullet.vx * 2;
+                const ty = bullet.y - bullet.vy * 2;
+                ctx.moveTo(tx + bullet.size * 0.7, ty);
+                ctx.arc(tx, ty, bullet.size * 0.7, 0, Math.PI * 2);
+            }
+            ctx.fill();
             
             // UI overlay
             ctx.fillStyle = 'rgba(0, 0, 0, 0.5)';
-            ctx.fillRect(5, 5, 180, 70);
+            ctx.fillRect(5, 5, 200, 130);
             
             ctx.fillStyle = '#fff';
             ctx.font = '14px monospace';
             ctx.fillText(`Episode: ${episode}`, 10, 25);
             ctx.fillText(`Reward: ${totalReward.toFixed(1)}`, 10, 45);
             ctx.fillText(`ε: ${epsilon.toFixed(3)}`, 10, 65);
+            ctx.fillText(`Frame: ${frameStats.frameMs.toFixed(1)} ms`, 10, 85);
+            ctx.fillText(`Draw: ${frameStats.drawMs.toFixed(2)} ms`, 10, 105);
+            ctx.fillText(`NPCs: ${1 + crowd.length}`, 10, 125);
+            frameStats.drawMs += 0.1 * (performance.now() - drawStart - frameStats.drawMs);
             
             requestAnimationFrame(gameLoop);
         }
@@ -628,6 +744,26 @@ HTML_CONTENT = """
             btn.classList.remove('active');
         }
 
+        async function loadDistilled() {
+            if (!window.pywebview) {
+                alert('Loading weights needs the desktop app.');
+                return;
+            }
+            const res = await window.pywebview.api.load_model();
+            if (res.status !== 'success') {
+                alert(res.message);
+                return;
+            }
+            // Distilled weights are final: act greedily without online updates
+            dqn.setWeights(res.weights);
+            training = false;
+            epsilon = dqn.epsilonMin;
+            const btn = document.getElementById('trainBtn');
+            btn.innerHTML = '<span>▶</span> Train';
+            btn.classList.remove('active');
+            updateUI();
+        }
+
         // Start game loop
         gameLoop();
     </script>
@@ -647,8 +783,14 @@ class API:
         return {"status": "success", "message": "Model saved successfully!"}
     
     def load_model(self):
-        """Placeholder for loading model weights"""
-        return {"status": "success", "message": "Model loaded successfully!"}
+        """Load the distilled 4-8-4 weights written by `distill_dodge.py --page human_npc`"""
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dqn_weights_human_npc.json')
+        if not os.path.exists(path):
+            return {"status": "error",
+                    "message": "No dqn_weights_human_npc.json found. Run distill_dodge.py --page human_npc first."}
+        with open(path, 'r', encoding='utf-8') as f:
+            weights = json.load(f)
+        return {"status": "success", "message": "Model loaded successfully!", "weights": weights}
 
 
 def main():
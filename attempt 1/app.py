@@ -1,3 +1,4 @@
+import copy
 import os
 import sys
 import subprocess
@@ -7,6 +8,7 @@ import socket
 import http.server
 import socketserver
 import shutil
+from array import array
 
 try:
     import webview
@@ -18,11 +20,22 @@ try:
     import torch.optim as optim
     import random
     import math
+    import re
 except Exception as e:
     print('\nMissing Python dependency. Make sure required packages are installed:')
     print('  pip install -r requirements.txt\n')
     raise
 
+from metrics import RollingStats, MetricsStore
+from jobs import JobManager
+from memory_monitor import MemoryMonitor
+from model_registry import ModelRegistry
+from normalizer import RunningNormalizer, fold_into_state_dict, has_normalizer, split_state_dict
+from recorder import EpisodeRecorder, Recording, game_frame
+from returns import discounted_returns
+from scheduler import CpuScheduler
+from resources import ResourceManager
+
 
 def find_free_port():
     s = socket.socket()
@@ -67,51 +80,93 @@ def wait_for_url(url, timeout=30):
     return False
 
 
-class JSApi:
-    def __init__(self, window=None, store_path='training_data.json'):
-        self.window = window
-        self.store_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), store_path)
+SESSION_NAME_RE = re.compile(r'^[A-Za-z0-9_.-]{1,64}$')
+
+
+class TrainingSession:
+    """One named training run with its own model, optimizer, env config, counters and metrics.
+
+    `env` is passed to the environments (`rewards` overrides Game.DEFAULT_REWARDS,
+    `max_steps` caps episode length, `npcs`/`players` size the arena). Each training iteration runs inside a
+    scheduler turn so concurrent sessions share the CPU budget by priority.
+    """
+    def __init__(self, name: str, scheduler, push, base_dir: str, metrics_dir: str = 'metrics', resources=None,
+                 algo: str = 'reinforce', lr: float = 1e-3, gamma: float = 0.99, hidden_size: int = 16,
+                 priority: float = 1.0, env: dict = None, port: int = 5555, record: bool = False,
+                 normalize: bool = False):
+        self.name = name
+        self.scheduler = scheduler
+        self.resources = resources
+        self._push = push
         # Training state
         self._training_thread = None
         self._stop_event = threading.Event()
+        self._resume_event = threading.Event()
+        self._resume_event.set()
         self.running = False
         self.episode = 0
         self.last_reward = 0.0
-        self.reward_history = []
+        # Rolling window for the live status; the full curve goes to the metrics store
+        self.reward_stats = RollingStats(100)
+        self.metrics = MetricsStore(os.path.join(base_dir, metrics_dir, name))
+        self.algo = algo
+        # Pause between episodes so the UI can keep up; headless runs set this to 0
+        self.ui_delay = 0.5
+        self.env = dict(env or {})
+        self.max_steps = int(self.env.pop('max_steps', 1000))
+        # Arena size for algo == 'arena'
+        self.num_npcs = int(self.env.pop('npcs', 4))
+        self.num_players = int(self.env.pop('players', 2))
+        self.priority = float(priority)
         # PyTorch model and optimizer
-        self.model_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'model.pth')
+        self.model_path = os.path.join(base_dir, 'model.pth' if name == 'default' else f'model_{name}.pth')
         self.device = torch.device('cpu')
-        self.model = PolicyNet(8, 16, 4).to(self.device)
-        self.optimizer = optim.Adam(self.model.parameters(), lr=1e-3)
-        self.gamma = 0.99
-
-    def save_training_data(self, json_str):
-        """Save training snapshot from JS (JSON string)."""
-        try:
-            with open(self.store_path, 'w', encoding='utf-8') as f:
-                f.write(json_str)
-            return {'ok': True, 'path': self.store_path}
-        except Exception as e:
-            return {'ok': False, 'error': str(e)}
+        self.lr = lr
+        self.hidden_size = hidden_size
+        self.model = PolicyNet(8, hidden_size, 4).to(self.device)
+        self.optimizer = optim.Adam(self.model.parameters(), lr=self.lr)
+        # Held for each training iteration, so background save/load jobs never see half-updated weights
+        self.model_lock = threading.Lock()
+        # Makes start() and offline training exclusive: held across the `running` check and the run
+        self._control_lock = threading.Lock()
+        self.gamma = gamma
+        # Listening port for remote actors when algo == 'distributed'
+        self.port = port
+        # Per-run episode recordings (REINFORCE loop) under recordings/
+        self.record = record
+        self.recorder = None
+        self.recordings_dir = os.path.join(base_dir, 'recordings')
+        # Running observation statistics (REINFORCE, arena and PPO loops), saved with checkpoints
+        self.normalize = normalize
+        self.obs_norm = RunningNormalizer(8) if normalize else None
+        scheduler.register(name, priority)
 
-    def load_training_data(self):
-        """Return stored training data as string or empty string if missing."""
-        try:
-            if not os.path.exists(self.store_path):
-                return ''
-            with open(self.store_path, 'r', encoding='utf-8') as f:
-                return f.read()
-        except Exception as e:
-            return {'ok': False, 'error': str(e)}
+    @property
+    def paused(self) -> bool:
+        return not self._resume_event.is_set()
 
-    def python_ping(self):
-        return 'pong'
+    def config(self) -> dict:
+        return {
+            'algo': self.algo,
+            'lr': self.lr,
+            'gamma': self.gamma,
+            'hidden_size': self.hidden_size,
+            'priority': self.priority,
+            'env': dict(self.env, max_steps=self.max_steps, npcs=self.num_npcs, players=self.num_players),
+            'port': self.port,
+            'record': self.record,
+            'normalize': self.normalize,
+        }
 
     def save_model(self, path: str = None):
         """Save model state dict to disk."""
         try:
             p = path or self.model_path
-            torch.save(self.model.state_dict(), p)
+            with self.model_lock:
+                state = {k: v.clone() for k, v in self.model.state_dict().items()}
+                if self.obs_norm is not None:
+                    state.update(self.obs_norm.state_dict())
+            torch.save(state, p)
             return {'ok': True, 'path': p}
         except Exception as e:
             return {'ok': False, 'error': str(e)}
@@ -121,121 +176,702 @@ class JSApi:
             p = path or self.model_path
             if not os.path.exists(p):
                 return {'ok': False, 'error': 'file not found'}
-            state = torch.load(p, map_location=self.device)
-            self.model.load_state_dict(state)
+            saved = torch.load(p, map_location=self.device)
+            # A session that feeds raw observations gets saved statistics folded into the weights
+            state = fold_into_state_dict(saved) if self.obs_norm is None else split_state_dict(saved)[0]
+            with self.model_lock:
+                if self.obs_norm is not None and has_normalizer(saved):
+                    self.obs_norm.load_state_dict(saved)
+                if any(k.startswith('value.') for k in state):
+                    self._use_actor_critic()
+                # A plain PolicyNet checkpoint leaves an ActorCritic value head untouched
+                self.model.load_state_dict(state, strict=not isinstance(self.model, ActorCritic))
             return {'ok': True, 'path': p}
         except Exception as e:
             return {'ok': False, 'error': str(e)}
 
-    # --- Training control methods exposed to JS ---
-    def start_training(self):
-        """Start a lightweight simulated training loop in a background thread."""
+    def train_offline(self, paths, algo: str = 'bc', epochs: int = 5, batch_size: int = 256):
+        """Train the policy on logged trajectories (`offline.py`) without stepping an environment.
+
+        'bc' clones the logged actions; 'cql' turns the logits into conservative Q-values. With
+        observation normalization on, a copy of the normalizer is fitted on the logged observations
+        and replaces the live one only when training finishes, since the policy now expects its
+        statistics. `start()` is refused while this runs.
+        """
+        from offline import Transitions, load_trajectories, train_offline
+
+        with self._control_lock:
+            if self.running:
+                return {'ok': False, 'error': 'stop training before offline training'}
+            try:
+                data = Transitions(load_trajectories(paths), self.gamma)
+                with self.model_lock:
+                    obs_norm = copy.deepcopy(self.obs_norm)
+                    if obs_norm is not None:
+                        data.normalize(obs_norm)
+                    history = train_offline(self.model, data, algo, epochs, batch_size, self.lr, self.gamma)
+                    self.obs_norm = obs_norm
+                return {'ok': True, 'episodes': data.episodes, 'transitions': len(data), 'history': history}
+            except Exception as e:
+                return {'ok': False, 'error': str(e)}
+
+    def _use_actor_critic(self):
+        """Swap the policy for an ActorCritic that keeps the current policy weights."""
+        if isinstance(self.model, ActorCritic):
+            return
+        model = ActorCritic(8, self.hidden_size, 4).to(self.device)
+        model.load_state_dict(self.model.state_dict(), strict=False)
+        self.model = model
+        self.optimizer = optim.Adam(self.model.parameters(), lr=self.lr)
+
+    def start(self, algo: str = None):
+        """Start training in a background thread. `algo` is 'reinforce', 'ppo', 'es', 'distributed' or 'arena'."""
+        # Offline training holds the control lock for its whole run; refuse rather than wait for it
+        if not self._control_lock.acquire(blocking=False):
+            return {'ok': False, 'error': 'offline training in progress'}
+        try:
+            return self._start(algo)
+        finally:
+            self._control_lock.release()
+
+    def _start(self, algo: str = None):
         if self.running:
             return {'ok': False, 'error': 'training already running'}
+        algo = algo or self.algo
+        loops = {'reinforce': self._training_loop, 'ppo': self._ppo_training_loop, 'es': self._es_training_loop,
+                 'distributed': self._distributed_training_loop, 'arena': self._arena_training_loop}
+        if algo not in loops:
+            return {'ok': False, 'error': f'unknown algorithm: {algo}'}
+        if self.record and algo != 'reinforce':
+            return {'ok': False, 'error': f'recording is only supported by the reinforce loop, not {algo}'}
+        # ES workers and remote actors play on raw observations, which weights trained on normalized input misread
+        if self.obs_norm is not None and algo in ('es', 'distributed'):
+            return {'ok': False, 'error': f'observation normalization is not supported by {algo}; '
+                                          'start a session without normalize (saved statistics fold into its weights)'}
+        if algo == 'ppo':
+            self._use_actor_critic()
 
+        self.algo = algo
         self._stop_event.clear()
-        self._training_thread = threading.Thread(target=self._training_loop, daemon=True)
+        self._resume_event.set()
+        self._training_thread = threading.Thread(target=self._run, args=(loops[algo],), daemon=True)
         self.running = True
+        self.scheduler.activate(self.name)
         self._training_thread.start()
-        return {'ok': True}
+        return {'ok': True, 'algo': algo}
 
-    def stop_training(self):
+    def stop(self, timeout: float = 5):
         if not self.running:
             return {'ok': False, 'error': 'not running'}
         self._stop_event.set()
+        # A paused loop has to wake up to notice the stop request
+        self._resume_event.set()
         if self._training_thread is not None:
-            self._training_thread.join(timeout=5)
+            self._training_thread.join(timeout=timeout)
         self.running = False
         return {'ok': True}
 
+    def pause(self):
+        if not self.running:
+            return {'ok': False, 'error': 'not running'}
+        self._resume_event.clear()
+        self.scheduler.deactivate(self.name)
+        return {'ok': True}
+
+    def resume(self):
+        if not self.running:
+            return {'ok': False, 'error': 'not running'}
+        self.scheduler.activate(self.name)
+        self._resume_event.set()
+        return {'ok': True}
+
+    def set_priority(self, priority: float):
+        self.priority = float(priority)
+        self.scheduler.set_priority(self.name, priority)
+        return {'ok': True, 'priority': self.priority}
+
     def get_status(self):
         return {
+            'session': self.name,
             'running': bool(self.running),
+            'paused': self.paused,
+            'algo': self.algo,
             'episode': int(self.episode),
             'last_reward': float(self.last_reward),
-            'avg_reward': float(np.mean(self.reward_history) if self.reward_history else 0.0)
+            'avg_reward': float(self.reward_stats.mean),
+            'priority': self.priority,
+            'threads': self.scheduler.threads_for(self.name),
+            'cpu_seconds': self.scheduler.usage(self.name),
         }
 
-    def _push_update(self, payload: dict):
-        """Push a JSON payload into the frontend by calling a global handler `window.onPythonMessage`."""
+    def _should_continue(self) -> bool:
+        """Block while paused; False once a stop was requested."""
+        self._resume_event.wait()
+        return not self._stop_event.is_set()
+
+    def _run(self, loop):
         try:
-            if self.window:
-                js = f"window.onPythonMessage({json.dumps(payload)})"
-                # evaluate_js returns the result, but we ignore it
-                self.window.evaluate_js(js)
-        except Exception:
-            pass
+            if self.resources is not None:
+                self.resources.pin_learner_thread()
+            loop()
+        finally:
+            # training stopped; send final status
+            self.running = False
+            self.scheduler.deactivate(self.name)
+            self.metrics.flush()
+            if self.recorder is not None:
+                self.recorder.close()
+                self.recorder = None
+            self._push({'type': 'training_stopped', 'session': self.name, 'episode': int(self.episode)})
+
     def _training_loop(self):
         """Training loop using PyTorch and a Python reimplementation of the JS environment."""
-        env = Game()
-
-        while not self._stop_event.is_set():
-            self.episode += 1
-            state = env.reset()
-            log_probs = []
-            rewards = []
-            episode_reward = 0.0
-
-            # run episode
-            for t in range(1000):
-                s_tensor = torch.tensor(state, dtype=torch.float32, device=self.device).unsqueeze(0)
-                logits = self.model(s_tensor)
-                probs = torch.softmax(logits, dim=-1)
-                m = torch.distributions.Categorical(probs)
-                action = int(m.sample().item())
-                logp = m.log_prob(torch.tensor(action, device=self.device))
-
-                reward, done, next_state = env.step(action)
-                log_probs.append(logp)
-                rewards.append(reward)
-                episode_reward += reward
-
-                state = next_state
-                if done or self._stop_event.is_set():
-                    break
-
-            # compute returns and loss (REINFORCE)
-            returns = []
-            R = 0.0
-            for r in reversed(rewards):
-                R = r + self.gamma * R
-                returns.insert(0, R)
-            returns = torch.tensor(returns, dtype=torch.float32, device=self.device)
-            if len(returns) > 0:
-                # normalize
-                returns = (returns - returns.mean()) / (returns.std(unbiased=False) + 1e-8)
-                loss = 0.0
-                for lp, R in zip(log_probs, returns):
-                    loss = loss - lp * R
+        env = Game(rewards=self.env.get('rewards'))
+        recorder = self._open_recorder()
+
+        while self._should_continue():
+            with self.scheduler.turn(self.name), self.model_lock:
+                self.episode += 1
+                state = env.reset()
+                log_probs = []
+                rewards = []
+                states = []
+                episode_reward = 0.0
+                if recorder:
+                    recorder.begin_episode(episode=self.episode)
+
+                # run episode
+                for t in range(self.max_steps):
+                    if self.obs_norm is not None:
+                        states.append(state)
+                        state = self.obs_norm.normalize(state)
+                    s_tensor = torch.tensor(state, dtype=torch.float32, device=self.device).unsqueeze(0)
+                    logits = self.model(s_tensor)
+                    probs = torch.softmax(logits, dim=-1)
+                    m = torch.distributions.Categorical(probs)
+                    action = int(m.sample().item())
+                    logp = m.log_prob(torch.tensor(action, device=self.device))
+
+                    reward, done, next_state = env.step(action)
+                    log_probs.append(logp)
+                    rewards.append(reward)
+                    episode_reward += reward
+                    if recorder:
+                        recorder.append(game_frame(env, action, reward))
+
+                    state = next_state
+                    if done or self._stop_event.is_set():
+                        break
+
+                if recorder:
+                    recorder.end_episode(reward=episode_reward, winner=env.winner)
+                if states:
+                    self.obs_norm.update(states)
+
+                # compute returns and loss (REINFORCE)
+                returns = torch.tensor(discounted_returns(rewards, self.gamma), dtype=torch.float32,
+                                       device=self.device)
+                if len(returns) > 0:
+                    # normalize
+                    returns = (returns - returns.mean()) / (returns.std(unbiased=False) + 1e-8)
+                    loss = 0.0
+                    for lp, R in zip(log_probs, returns):
+                        loss = loss - lp * R
+
+                    self.optimizer.zero_grad()
+                    loss.backward()
+                    self.optimizer.step()
+
+            # record and push
+            self._record_episode(episode_reward)
+            self._push_training_update()
+
+            # short sleep to allow UI responsiveness
+            if self.ui_delay > 0:
+                self._stop_event.wait(self.ui_delay)
+
+    def _open_recorder(self):
+        """Start this run's recording file when the session records episodes."""
+        if not self.record:
+            return None
+        os.makedirs(self.recordings_dir, exist_ok=True)
+        path = os.path.join(self.recordings_dir, f"{self.name}-{time.strftime('%Y%m%d-%H%M%S')}.rec")
+        self.recorder = EpisodeRecorder(path, meta={'session': self.name, 'algo': self.algo})
+        return self.recorder
+
+    def _arena_training_loop(self):
+        """REINFORCE for a multi-NPC arena: one shared policy, one batched forward pass per tick."""
+        from arena import Arena, select_actions
+
+        env = Arena(self.num_npcs, self.num_players, rewards=self.env.get('rewards'), max_steps=self.max_steps)
+
+        while self._should_continue():
+            with self.scheduler.turn(self.name), self.model_lock:
+                self.episode += 1
+                obs = env.reset()
+                log_probs, rewards, acting, raw_obs = [], [], [], []
+
+                # run episode; dead NPCs stay in the batch but are masked out of the loss
+                while True:
+                    alive = env.npc_alive
+                    if self.obs_norm is not None:
+                        raw_obs.append(obs)
+                        obs = self.obs_norm.normalize(obs)
+                    actions, logp = select_actions(self.model, obs)
+                    obs, reward, _, info = env.step(actions)
+                    log_probs.append(logp)
+                    rewards.append(reward)
+                    acting.append(alive)
+                    if info['episode_done'] or self._stop_event.is_set():
+                        break
+                if raw_obs:
+                    self.obs_norm.update(np.stack(raw_obs))
+
+                # per-agent discounted returns, normalized over every acting step
+                returns = discounted_returns(np.stack(rewards), self.gamma)
+                mask = torch.tensor(np.stack(acting), dtype=torch.float32, device=self.device)
+                returns = torch.tensor(returns, dtype=torch.float32, device=self.device)
+                count = mask.sum()
+                mean = (returns * mask).sum() / count
+                std = torch.sqrt((((returns - mean) * mask) ** 2).sum() / count)
+                returns = (returns - mean) / (std + 1e-8)
+                loss = -(torch.stack(log_probs) * returns * mask).sum()
 
                 self.optimizer.zero_grad()
                 loss.backward()
                 self.optimizer.step()
 
-            # record and push
-            self.last_reward = float(episode_reward)
-            self.reward_history.append(self.last_reward)
-            if len(self.reward_history) > 100:
-                self.reward_history.pop(0)
-
-            payload = {
-                'type': 'training_update',
-                'episode': int(self.episode),
-                'last_reward': float(self.last_reward),
-                'avg_reward': float(np.mean(self.reward_history))
-            }
-            self._push_update(payload)
+            # one curve point per arena episode: the mean NPC return
+            self._record_episode(float(env.episode_returns.mean()))
+            self._push_training_update(winner=env.winner, npcs_alive=info['npcs_alive'],
+                                       players_alive=info['players_alive'])
+            if self.ui_delay > 0:
+                self._stop_event.wait(self.ui_delay)
 
-            # short sleep to allow UI responsiveness
-            for _ in range(5):
-                if self._stop_event.is_set():
-                    break
-                time.sleep(0.1)
+    def _ppo_training_loop(self):
+        """PPO over a vector of environments; pushes one update per rollout."""
+        from ppo import PPOTrainer
 
-        # training stopped; send final status
-        self.running = False
-        payload = {'type': 'training_stopped', 'episode': int(self.episode)}
-        self._push_update(payload)
+        env_kwargs = dict(self.env, max_steps=self.max_steps)
+        trainer = PPOTrainer(self.model, self.optimizer, gamma=self.gamma, device=self.device, env_kwargs=env_kwargs,
+                             normalizer=self.obs_norm)
+        try:
+            while self._should_continue():
+                with self.scheduler.turn(self.name), self.model_lock:
+                    finished, stats = trainer.train_iteration()
+                for episode_reward, _, _ in finished:
+                    self.episode += 1
+                    self._record_episode(episode_reward)
+                if finished:
+                    self._push_training_update(total_steps=trainer.total_steps, **stats)
+                if self.ui_delay > 0:
+                    self._stop_event.wait(self.ui_delay)
+        finally:
+            trainer.close()
+
+    def _es_training_loop(self):
+        """Evolution strategies across a process pool; one update per generation."""
+        from es import ESTrainer
+
+        workers = self.scheduler.threads_for(self.name)
+        cores = self.resources.allocate(f'{self.name}:es', workers) if self.resources else None
+        trainer = ESTrainer(self.model, max_steps=self.max_steps, rewards=self.env.get('rewards'),
+                            workers=workers, cores=cores)
+        try:
+            while self._should_continue():
+                with self.scheduler.turn(self.name), self.model_lock:
+                    stats = trainer.train_iteration()
+                # Workers only report per-member fitness, so a generation counts as its episodes
+                # with the population's mean fitness as the reward.
+                self.episode += stats['episodes']
+                self._record_episode(stats['fitness_mean'])
+                self._push_training_update(total_steps=trainer.total_steps, **stats)
+                if self.ui_delay > 0:
+                    self._stop_event.wait(self.ui_delay)
+        finally:
+            trainer.close()
+            if self.resources:
+                self.resources.release(f'{self.name}:es')
+
+    def _distributed_training_loop(self):
+        """Learn from remote actor processes that connect over TCP (see distributed.py)."""
+        from distributed import LearnerServer
+
+        server = LearnerServer(self.model, self.optimizer, host='127.0.0.1', port=self.port, gamma=self.gamma,
+                               max_steps=self.max_steps, rewards=self.env.get('rewards')).start()
+        try:
+            while self._should_continue():
+                batch = server.next_batch(timeout=0.5)
+                if batch is None:
+                    continue
+                with self.scheduler.turn(self.name), self.model_lock:
+                    stats = server.update(batch)
+                for episode_reward in stats['episode_rewards']:
+                    self.episode += 1
+                    self._record_episode(episode_reward)
+                self._push_training_update(version=stats['version'], actors=stats['actors'])
+        finally:
+            server.stop()
+
+    def _record_episode(self, episode_reward: float):
+        self.last_reward = float(episode_reward)
+        self.reward_stats.push(self.last_reward)
+        self.metrics.append(self.last_reward)
+
+    def _push_training_update(self, **extra):
+        payload = {
+            'type': 'training_update',
+            'session': self.name,
+            'episode': int(self.episode),
+            'last_reward': float(self.last_reward),
+            'avg_reward': float(self.reward_stats.mean)
+        }
+        payload.update(extra)
+        self._push(payload)
+
+
+class JSApi:
+    def __init__(self, window=None, store_path='training_data.json', metrics_dir='metrics', cpu_budget: int = None,
+                 learner_threads: int = None):
+        self.window = window
+        self.base_dir = os.path.dirname(os.path.abspath(__file__))
+        self.store_path = os.path.join(self.base_dir, store_path)
+        self.metrics_dir = metrics_dir
+        # Named training sessions share one CPU budget through the scheduler
+        self.scheduler = CpuScheduler(cpu_budget)
+        # Learner threads are capped, and each training thread pins itself when it starts, so torch
+        # does not fight rollout workers for cores; the UI thread and later pools keep every core
+        self.resources = ResourceManager(learner_threads=learner_threads)
+        self.resources.configure_learner()
+        self.sessions = {}
+        self._sessions_lock = threading.Lock()
+        # Names whose remove_session job has not finished; they keep their scheduler entry until then
+        self._removing = set()
+        self._recording = None
+        # Policies for NPC archetypes, loaded lazily and kept under a byte budget
+        self.models = ModelRegistry()
+        # Archetype name -> id of the job loading its model, so a busy frame loop does not queue duplicates
+        self._warming = {}
+        # Disk and torch work runs as background jobs so bridge calls return immediately
+        self.jobs = JobManager(self._push_update)
+        # Cheap RSS and live-tensor samples once a minute; Python allocation tracing is opt-in
+        self.memory = MemoryMonitor().start()
+        self.create_session('default')
+
+    def _write_training_data(self, json_str):
+        with open(self.store_path, 'w', encoding='utf-8') as f:
+            f.write(json_str)
+        return {'ok': True, 'path': self.store_path}
+
+    def _read_training_data(self):
+        if not os.path.exists(self.store_path):
+            return ''
+        with open(self.store_path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def save_training_data(self, json_str):
+        """Save training snapshot from JS (JSON string) as a background job."""
+        job = self.jobs.submit('save_training_data', self._write_training_data, json_str, key='training_data')
+        return {'ok': True, 'job': job}
+
+    def load_training_data(self):
+        """Read stored training data as a background job; the job result is the string ('' if missing)."""
+        job = self.jobs.submit('load_training_data', self._read_training_data, key='training_data')
+        return {'ok': True, 'job': job}
+
+    def get_student_weights(self, path: str = 'student_weights.json'):
+        """Return distilled student weights written by `distill.py` for the browser network."""
+        try:
+            p = path if os.path.isabs(path) else os.path.join(self.base_dir, path)
+            if not os.path.exists(p):
+                return {'ok': False, 'error': 'file not found'}
+            with open(p, 'r', encoding='utf-8') as f:
+                return {'ok': True, 'path': p, 'weights': json.load(f)}
+        except Exception as e:
+            return {'ok': False, 'error': str(e)}
+
+    def python_ping(self):
+        return 'pong'
+
+    def _session(self, name: str):
+        session = self.sessions.get(name)
+        if session is None:
+            raise KeyError(f'no such session: {name}')
+        return session
+
+    def save_model(self, path: str = None, session: str = 'default'):
+        """Save a session's model state dict to disk as a background job."""
+        try:
+            job = self.jobs.submit('save_model', self._session(session).save_model, path, key=session)
+            return {'ok': True, 'job': job}
+        except Exception as e:
+            return {'ok': False, 'error': str(e)}
+
+    def load_model(self, path: str = None, session: str = 'default'):
+        try:
+            job = self.jobs.submit('load_model', self._session(session).load_model, path, key=session)
+            return {'ok': True, 'job': job}
+        except Exception as e:
+            return {'ok': False, 'error': str(e)}
+
+    def train_offline(self, algo: str = 'bc', paths: list = None, epochs: int = 5, session: str = 'default'):
+        """Train a session's policy on logged play as a background job.
+
+        `paths` are recordings, folders of them or training-data JSON files (default: `recordings/` and the
+        `save_training_data` store); the job result holds per-epoch losses.
+        """
+        try:
+            paths = paths or [os.path.join(self.base_dir, 'recordings'), self.store_path]
+            paths = [p if os.path.isabs(p) else os.path.join(self.base_dir, p) for p in paths]
+            paths = [p for p in paths if os.path.exists(p)]
+            job = self.jobs.submit('train_offline', self._session(session).train_offline, paths, algo, int(epochs),
+                                   key=session)
+            return {'ok': True, 'job': job}
+        except Exception as e:
+            return {'ok': False, 'error': str(e)}
+
+    # --- Training control methods exposed to JS ---
+    def start_training(self, algo: str = 'reinforce', session: str = 'default'):
+        """Start training in a background thread. `algo` is 'reinforce', 'ppo', 'es', 'distributed' or 'arena'."""
+        try:
+            return self._session(session).start(algo)
+        except Exception as e:
+            return {'ok': False, 'error': str(e)}
+
+    def stop_training(self, session: str = 'default'):
+        """Stop a session as a background job (waiting for the loop can take seconds)."""
+        try:
+            job = self.jobs.submit('stop_training', self._session(session).stop, key=session)
+            return {'ok': True, 'job': job}
+        except Exception as e:
+            return {'ok': False, 'error': str(e)}
+
+    def get_status(self, session: str = 'default'):
+        try:
+            return self._session(session).get_status()
+        except Exception as e:
+            return {'ok': False, 'error': str(e)}
+
+    def get_metrics(self, start: int = 0, end: int = None, max_points: int = 500, session: str = 'default'):
+        """Downsampled episode-reward curve for charting (at most `max_points` points)."""
+        try:
+            return {'ok': True, **self._session(session).metrics.query(start, end, max_points)}
+        except Exception as e:
+            return {'ok': False, 'error': str(e)}
+
+    # --- Background jobs ---
+    def get_job(self, job_id: int):
+        """Status and result of a job; completion is also pushed as a 'job_finished' message."""
+        try:
+            return {'ok': True, **self.jobs.get(job_id)}
+        except Exception as e:
+            return {'ok': False, 'error': str(e)}
+
+    def list_jobs(self):
+        return {'ok': True, 'jobs': self.jobs.list()}
+
+    def cancel_job(self, job_id: int):
+        """Cancel a queued job; a running one cannot be interrupted and reports its real outcome."""
+        try:
+            return {'ok': True, **self.jobs.cancel(job_id)}
+        except Exception as e:
+            return {'ok': False, 'error': str(e)}
+
+    # --- Memory ---
+    def get_memory_report(self, max_points: int = 200):
+        """RSS, live tensor and (when tracing) top allocator samples, plus a growth verdict."""
+        try:
+            return {'ok': True, **self.memory.report(int(max_points))}
+        except Exception as e:
+            return {'ok': False, 'error': str(e)}
+
+    def configure_memory_monitor(self, interval: float = None, trace_python: bool = None):
+        """Change the sampling interval or toggle tracemalloc; restarts the monitor."""
+        try:
+            self.memory.stop()
+            if interval is not None:
+                self.memory.interval = max(1.0, float(interval))
+            if trace_python is not None:
+                self.memory.trace_python = bool(trace_python)
+            self.memory.start()
+            return {'ok': True, 'interval': self.memory.interval, 'trace_python': self.memory.trace_python}
+        except Exception as e:
+            return {'ok': False, 'error': str(e)}
+
+    # --- Named sessions ---
+    def create_session(self, name: str, config: dict = None):
+        """Create a named session. `config` may set algo, lr, gamma, hidden_size, priority and env."""
+        try:
+            if not SESSION_NAME_RE.match(name or ''):
+                return {'ok': False, 'error': 'session names use letters, digits, ".", "_" and "-"'}
+            with self._sessions_lock:
+                if name in self.sessions:
+                    return {'ok': False, 'error': f'session already exists: {name}'}
+                if name in self._removing:
+                    return {'ok': False, 'error': f'session is still being removed: {name}'}
+                self.sessions[name] = TrainingSession(name, self.scheduler, self._push_update, self.base_dir,
+                                                      self.metrics_dir, self.resources, **(config or {}))
+            return {'ok': True, 'session': name, 'config': self.sessions[name].config()}
+        except Exception as e:
+            return {'ok': False, 'error': str(e)}
+
+    def remove_session(self, name: str):
+        if name == 'default':
+            return {'ok': False, 'error': 'the default session cannot be removed'}
+        try:
+            session = self._session(name)
+            with self._sessions_lock:
+                if self.sessions.pop(name, None) is None:
+                    return {'ok': False, 'error': f'no such session: {name}'}
+                self._removing.add(name)
+            job = self.jobs.submit('remove_session', self._shutdown_session, session, key=name)
+            return {'ok': True, 'job': job}
+        except Exception as e:
+            return {'ok': False, 'error': str(e)}
+
+    def _shutdown_session(self, session):
+        try:
+            if session.running:
+                session.stop()
+            session.metrics.close()
+            self.scheduler.unregister(session.name)
+        finally:
+            with self._sessions_lock:
+                self._removing.discard(session.name)
+        return {'ok': True, 'session': session.name}
+
+    def list_sessions(self):
+        return [s.get_status() for s in list(self.sessions.values())]
+
+    def start_session(self, name: str):
+        return self.start_training(None, name)
+
+    def stop_session(self, name: str):
+        return self.stop_training(name)
+
+    def pause_session(self, name: str):
+        try:
+            return self._session(name).pause()
+        except Exception as e:
+            return {'ok': False, 'error': str(e)}
+
+    def resume_session(self, name: str):
+        try:
+            return self._session(name).resume()
+        except Exception as e:
+            return {'ok': False, 'error': str(e)}
+
+    def set_session_priority(self, name: str, priority: float):
+        try:
+            return self._session(name).set_priority(priority)
+        except Exception as e:
+            return {'ok': False, 'error': str(e)}
+
+    def get_session_status(self, name: str):
+        return self.get_status(name)
+
+    def set_cpu_budget(self, threads: int):
+        """Number of training iterations allowed to run at the same time across sessions."""
+        self.scheduler.set_budget(threads)
+        return {'ok': True, 'budget': self.scheduler.budget}
+
+    # --- NPC archetype policies ---
+    def register_model(self, name: str, path: str):
+        """Register a checkpoint (`.pth` or exported `.npz`) for an NPC archetype and load it in a job."""
+        try:
+            p = path if os.path.isabs(path) else os.path.join(self.base_dir, path)
+            digest = self.models.register(name, p)
+            return {'ok': True, 'name': name, 'hash': digest, 'job': self._warm_model(name)}
+        except Exception as e:
+            return {'ok': False, 'error': str(e)}
+
+    def _warm_model(self, name: str) -> int:
+        """Load an archetype's model into the registry cache in the background."""
+        job_id = self._warming.get(name)
+        if job_id is not None:
+            try:
+                if self.jobs.get(job_id)['status'] in ('queued', 'running'):
+                    return job_id
+            except KeyError:
+                pass
+        job_id = self.jobs.submit('warm_model', self._load_model, name, key=('model', name))
+        self._warming[name] = job_id
+        return job_id
+
+    def _load_model(self, name: str):
+        self.models.get(name)
+        return {'ok': True, 'name': name, 'hash': self.models.resolve(name)}
+
+    def list_models(self):
+        return {'ok': True, 'models': self.models.list_models(), 'stats': self.models.stats()}
+
+    def get_npc_actions(self, batches: dict, greedy: bool = True):
+        """Actions per archetype: {name: [[8 features], ...]} -> {name: [action, ...]}.
+
+        Models are never loaded inside this call: an archetype whose model is
+        not cached (not warmed yet, or evicted) gets no actions, is listed under
+        `loading`, and is loaded by a background job for a later frame.
+        """
+        try:
+            actions = self.models.act(batches, greedy, load=False)
+            loading = [name for name in batches if name not in actions]
+            for name in loading:
+                self._warm_model(name)
+            return {'ok': True, 'actions': {name: a.tolist() for name, a in actions.items()}, 'loading': loading}
+        except Exception as e:
+            return {'ok': False, 'error': str(e)}
+
+    # --- Episode recordings ---
+    def list_recordings(self):
+        """Recording files under `recordings/`, newest first."""
+        try:
+            folder = os.path.join(self.base_dir, 'recordings')
+            names = [n for n in os.listdir(folder) if n.endswith('.rec')] if os.path.isdir(folder) else []
+            paths = sorted((os.path.join(folder, n) for n in names), key=os.path.getmtime, reverse=True)
+            return {'ok': True, 'recordings': paths}
+        except Exception as e:
+            return {'ok': False, 'error': str(e)}
+
+    def open_recording(self, path: str):
+        """Open a recording for replay; returns its frame count and episode table."""
+        try:
+            recording = Recording(path)
+            if self._recording is not None:
+                self._recording.close()
+            self._recording = recording
+            return {'ok': True, 'path': path, 'kind': recording.kind, 'frames': len(recording),
+                    'episodes': recording.episodes}
+        except Exception as e:
+            return {'ok': False, 'error': str(e)}
+
+    def get_recording_frames(self, start: int = 0, count: int = 60, stride: int = 1):
+        """Decoded frames `start, start + stride, ...` of the open recording; `stride` is the replay speed."""
+        try:
+            if self._recording is None:
+                return {'ok': False, 'error': 'no recording open'}
+            stride = max(1, int(stride))
+            stop = start + count * stride
+            frames = [self._recording.decode(f) for f in self._recording.frames(start, stop, stride)]
+            return {'ok': True, 'start': start, 'stride': stride, 'frames': frames, 'total': len(self._recording)}
+        except Exception as e:
+            return {'ok': False, 'error': str(e)}
+
+    def get_resource_usage(self):
+        """Core allocations, torch thread count and utilization measured since the last call."""
+        try:
+            return {'ok': True, **self.resources.report()}
+        except Exception as e:
+            return {'ok': False, 'error': str(e)}
+
+    def _push_update(self, payload: dict):
+        """Push a JSON payload into the frontend by calling a global handler `window.onPythonMessage`."""
+        try:
+            if self.window:
+                js = f"window.onPythonMessage({json.dumps(payload)})"
+                # evaluate_js returns the result, but we ignore it
+                self.window.evaluate_js(js)
+        except Exception:
+            pass
 
 
 class PolicyNet(nn.Module):
@@ -251,16 +887,49 @@ class PolicyNet(nn.Module):
         return self.model(x)
 
 
+class ActorCritic(PolicyNet):
+    """PolicyNet with a separate value head; `forward` still returns action logits."""
+    def __init__(self, input_size: int, hidden_size: int, output_size: int):
+        super().__init__(input_size, hidden_size, output_size)
+        self.value = nn.Sequential(
+            nn.Linear(input_size, hidden_size),
+            nn.ReLU(),
+            nn.Linear(hidden_size, 1)
+        )
+
+    def forward_value(self, x):
+        return self.value(x).squeeze(-1)
+
+    def forward_all(self, x):
+        return self.model(x), self.forward_value(x)
+
+
 class Game:
     """Python re-implementation of the JS Game environment used by the TSX demo.
     The implementation mirrors the logic (positions, projectiles, simple player AI).
+    `rewards` overrides entries of DEFAULT_REWARDS for reward-shaping experiments.
     """
-    def __init__(self):
+    DEFAULT_REWARDS = {
+        'approach': 0.01,
+        'shoot': 0.1,
+        'shoot_out_of_range': -0.05,
+        'hit_taken': -1.0,
+        'hit_dealt': 1.0,
+        'lose': -5.0,
+        'win': 5.0,
+        'step': 0.005,
+    }
+
+    def __init__(self, seed=None, rewards=None):
         self.width = 600
         self.height = 400
+        self.rewards = dict(self.DEFAULT_REWARDS, **(rewards or {}))
+        self.rng = random.Random(seed)
         self.reset()
 
-    def reset(self):
+    def reset(self, seed=None):
+        if seed is not None:
+            self.rng.seed(seed)
         self.player = {
             'x': 100.0,
             'y': self.height / 2.0,
@@ -279,9 +948,45 @@ class Game:
         }
         self.projectiles = []
         self.done = False
+        self.winner = None
         self.totalReward = 0.0
+        self.player_reward = 0.0
         return self.get_state()
 
+    # Flat layout of snapshot(): agent fields, then episode fields, then 5 values per projectile
+    _AGENT_KEYS = ('x', 'y', 'health', 'speed', 'attackCooldown', 'attackRange')
+    _WINNERS = (None, 'npc', 'player')
+
+    def snapshot(self):
+        """Capture the full game state, RNG included, as (flat float buffer, RNG state).
+
+        Much cheaper than `copy.deepcopy(game)`; pass the result to `restore`
+        on this or any other Game to continue from the same point.
+        """
+        p, n = self.player, self.npc
+        buf = [p['x'], p['y'], p['health'], p['speed'], p['attackCooldown'], p['attackRange'],
+               n['x'], n['y'], n['health'], n['speed'], n['attackCooldown'], n['attackRange'],
+               float(self.done), float(self._WINNERS.index(self.winner)), self.totalReward, self.player_reward]
+        for q in self.projectiles:
+            buf += (q['x'], q['y'], q['vx'], q['vy'], 1.0 if q['owner'] == 'npc' else 0.0)
+        return array('d', buf), self.rng.getstate()
+
+    def restore(self, snapshot):
+        """Return to a state captured by `snapshot`."""
+        buf, rng_state = snapshot
+        self.player = dict(zip(self._AGENT_KEYS, buf[0:6]))
+        self.npc = dict(zip(self._AGENT_KEYS, buf[6:12]))
+        for agent in (self.player, self.npc):
+            agent['attackCooldown'] = int(agent['attackCooldown'])
+        self.done = bool(buf[12])
+        self.winner = self._WINNERS[int(buf[13])]
+        self.totalReward = buf[14]
+        self.player_reward = buf[15]
+        self.projectiles = [{'x': buf[i], 'y': buf[i + 1], 'vx': buf[i + 2], 'vy': buf[i + 3],
+                             'owner': 'npc' if buf[i + 4] else 'player'}
+                            for i in range(16, len(buf), 5)]
+        self.rng.setstate(rng_state)
+
     def get_state(self):
         dx = self.player['x'] - self.npc['x']
         dy = self.player['y'] - self.npc['y']
@@ -297,7 +1002,75 @@ class Game:
             1.0 if (distance < self.npc['attackRange']) else 0.0
         ]
 
-    def step(self, action: int):
+    def get_player_state(self):
+        """`get_state` from the player's side, so an NPC policy can also drive the player (self-play)."""
+        dx = self.npc['x'] - self.player['x']
+        dy = self.npc['y'] - self.player['y']
+        distance = math.sqrt(dx * dx + dy * dy)
+        return [
+            -dx / self.width,           # mirrored: the opponent appears on the same side as for the NPC
+            dy / self.height,
+            distance / 500.0,
+            self.player['health'] / 100.0,
+            self.npc['health'] / 100.0,
+            self.player['attackCooldown'] / 30.0,
+            1.0 if (self.npc['y'] < self.player['y']) else 0.0,
+            1.0 if (distance < self.player['attackRange']) else 0.0
+        ]
+
+    def _player_act(self, action: int) -> float:
+        """Apply a policy action to the player (NPC action set, scripted player's 200px range); returns its reward."""
+        p, n = self.player, self.npc
+        reward = 0.0
+        if action == 0 and p['y'] > 30:
+            p['y'] -= p['speed']
+        elif action == 1 and p['y'] < self.height - 30:
+            p['y'] += p['speed']
+        elif action == 2:
+            dx = n['x'] - p['x']
+            if abs(dx) > 70:
+                p['x'] += p['speed'] if dx > 0 else -p['speed']
+            reward += self.rewards['approach']
+        elif action == 3 and p['attackCooldown'] == 0:
+            dx = n['x'] - p['x']
+            dy = n['y'] - p['y']
+            distance = math.sqrt(dx * dx + dy * dy) if (dx != 0 or dy != 0) else 1.0
+            if distance < 200.0:
+                self.projectiles.append({
+                    'x': p['x'],
+                    'y': p['y'],
+                    'vx': (dx / distance) * 5.0,
+                    'vy': (dy / distance) * 5.0,
+                    'owner': 'player'
+                })
+                p['attackCooldown'] = 30
+                reward += self.rewards['shoot']
+            else:
+                reward += self.rewards['shoot_out_of_range']
+        return reward
+
+    def _scripted_player(self):
+        """Simple player AI: random vertical jitter, shoots at the NPC within 200px."""
+        if self.rng.random() < 0.02:
+            self.player['y'] += (self.rng.random() - 0.5) * 10.0
+        self.player['y'] = max(30.0, min(self.height - 30.0, self.player['y']))
+
+        if self.player['attackCooldown'] == 0 and self.rng.random() < 0.05:
+            dx = self.npc['x'] - self.player['x']
+            dy = self.npc['y'] - self.player['y']
+            distance = math.sqrt(dx * dx + dy * dy) if (dx != 0 or dy != 0) else 1.0
+            if distance < 200.0:
+                self.projectiles.append({
+                    'x': self.player['x'],
+                    'y': self.player['y'],
+                    'vx': (dx / distance) * 5.0,
+                    'vy': (dy / distance) * 5.0,
+                    'owner': 'player'
+                })
+                self.player['attackCooldown'] = 30
+
+    def step(self, action: int, player_action: int = None):
+        """Advance one tick. The player follows `player_action` when given, else the scripted AI."""
         if self.done:
             return 0.0, True, self.get_state()
 
@@ -312,7 +1085,7 @@ class Game:
             dx = self.player['x'] - self.npc['x']
             if abs(dx) > 70:
                 self.npc['x'] += self.npc['speed'] if dx > 0 else -self.npc['speed']
-            reward += 0.01
+            reward += self.rewards['approach']
         elif action == 3 and self.npc['attackCooldown'] == 0:
             dx = self.player['x'] - self.npc['x']
             dy = self.player['y'] - self.npc['y']
@@ -326,28 +1099,16 @@ class Game:
                     'owner': 'npc'
                 })
                 self.npc['attackCooldown'] = 30
-                reward += 0.1
+                reward += self.rewards['shoot']
             else:
-                reward -= 0.05
-
-        # Simple player AI
-        if random.random() < 0.02:
-            self.player['y'] += (random.random() - 0.5) * 10.0
-        self.player['y'] = max(30.0, min(self.height - 30.0, self.player['y']))
+                reward += self.rewards['shoot_out_of_range']
 
-        if self.player['attackCooldown'] == 0 and random.random() < 0.05:
-            dx = self.npc['x'] - self.player['x']
-            dy = self.npc['y'] - self.player['y']
-            distance = math.sqrt(dx * dx + dy * dy) if (dx != 0 or dy != 0) else 1.0
-            if distance < 200.0:
-                self.projectiles.append({
-                    'x': self.player['x'],
-                    'y': self.player['y'],
-                    'vx': (dx / distance) * 5.0,
-                    'vy': (dy / distance) * 5.0,
-                    'owner': 'player'
-                })
-                self.player['attackCooldown'] = 30
+        # The player's own reward (same table, mirrored) for self-play training
+        player_reward = 0.0
+        if player_action is None:
+            self._scripted_player()
+        else:
+            player_reward += self._player_act(player_action)
 
         # Update projectiles and collisions
         new_projectiles = []
@@ -359,14 +1120,16 @@ class Game:
                 dist = math.hypot(p['x'] - self.npc['x'], p['y'] - self.npc['y'])
                 if dist < 20.0:
                     self.npc['health'] -= 20.0
-                    reward -= 1.0
+                    reward += self.rewards['hit_taken']
+                    player_reward += self.rewards['hit_dealt']
                     continue
 
             if p['owner'] == 'npc':
                 dist = math.hypot(p['x'] - self.player['x'], p['y'] - self.player['y'])
                 if dist < 20.0:
                     self.player['health'] -= 20.0
-                    reward += 1.0
+                    reward += self.rewards['hit_dealt']
+                    player_reward += self.rewards['hit_taken']
                     continue
 
             if 0 < p['x'] < self.width and 0 < p['y'] < self.height:
@@ -382,15 +1145,18 @@ class Game:
 
         # check win/loss
         if self.npc['health'] <= 0:
-            reward -= 5.0
+            reward += self.rewards['lose']
+            player_reward += self.rewards['win']
             self.done = True
             self.winner = 'player'
         elif self.player['health'] <= 0:
-            reward += 5.0
+            reward += self.rewards['win']
+            player_reward += self.rewards['lose']
             self.done = True
             self.winner = 'npc'
 
-        reward += 0.005
+        reward += self.rewards['step']
+        self.player_reward = player_reward + self.rewards['step']
         self.totalReward += reward
         return reward, self.done, self.get_state()
 
@@ -0,0 +1,220 @@
+"""
+Multi-agent version of `Game`: M NPCs against P scripted players.
+
+All NPCs share one policy. Agent state lives in NumPy arrays, every NPC's
+observation is built in one pass (the same 8 features `Game.get_state` gives,
+measured against the nearest living player), and `select_actions` picks every
+NPC's action with a single batched forward pass per tick. Rewards and done
+flags are per NPC; the episode ends when one side is wiped out or at
+`max_steps`.
+
+    arena = Arena(num_npcs=8, num_players=3, seed=0)
+    obs = arena.reset()                       # [num_npcs, 8]
+    actions, _ = select_actions(model, obs)
+    obs, rewards, dones, info = arena.step(actions)
+"""
+
+import numpy as np
+import torch
+
+from app import Game
+
+
+WIDTH = 600
+HEIGHT = 400
+NPC_SPEED = 2.5
+ATTACK_RANGE = 60.0
+PLAYER_FIRE_RANGE = 200.0
+PROJECTILE_SPEED = 5.0
+HIT_RADIUS = 20.0
+COOLDOWN = 30
+DAMAGE = 20.0
+
+# Projectile owners
+NPC_TEAM, PLAYER_TEAM = 0, 1
+
+
+def _spread(count: int) -> np.ndarray:
+    """Evenly spaced starting heights; a single agent starts mid-screen like `Game`."""
+    return HEIGHT * np.arange(1, count + 1) / (count + 1)
+
+
+def _nearest(src: np.ndarray, dst: np.ndarray, dst_alive: np.ndarray):
+    """For each row of `src`, index of and offset to the nearest living row of `dst`."""
+    offsets = dst[None, :, :] - src[:, None, :]
+    dists = np.sqrt(np.einsum('ijk,ijk->ij', offsets, offsets))
+    if dst_alive.any():
+        dists = np.where(dst_alive[None, :], dists, np.inf)
+    idx = dists.argmin(axis=1)
+    rows = np.arange(len(src))
+    return idx, offsets[rows, idx], dists[rows, idx]
+
+
+class Arena:
+    def __init__(self, num_npcs: int = 4, num_players: int = 2, seed=None, rewards=None, max_steps: int = 1000):
+        self.num_npcs = num_npcs
+        self.num_players = num_players
+        self.max_steps = max_steps
+        self.rewards = dict(Game.DEFAULT_REWARDS, **(rewards or {}))
+        self.rng = np.random.default_rng(seed)
+        self.reset()
+
+    def reset(self, seed=None):
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        self.npc_pos = np.stack([np.full(self.num_npcs, 500.0), _spread(self.num_npcs)], axis=1)
+        self.npc_health = np.full(self.num_npcs, 100.0)
+        self.npc_cooldown = np.zeros(self.num_npcs, dtype=np.int64)
+        self.player_pos = np.stack([np.full(self.num_players, 100.0), _spread(self.num_players)], axis=1)
+        self.player_health = np.full(self.num_players, 100.0)
+        self.player_cooldown = np.zeros(self.num_players, dtype=np.int64)
+        self.proj_pos = np.zeros((0, 2))
+        self.proj_vel = np.zeros((0, 2))
+        self.proj_team = np.zeros(0, dtype=np.int64)
+        self.proj_shooter = np.zeros(0, dtype=np.int64)
+        self.episode_returns = np.zeros(self.num_npcs)
+        self.t = 0
+        self.done = False
+        self.winner = None
+        return self.get_observations()
+
+    @property
+    def npc_alive(self) -> np.ndarray:
+        return self.npc_health > 0
+
+    @property
+    def player_alive(self) -> np.ndarray:
+        return self.player_health > 0
+
+    def get_observations(self) -> np.ndarray:
+        """`Game.get_state` features for every NPC against its nearest living player, shape [M, 8]."""
+        target, offset, dist = _nearest(self.npc_pos, self.player_pos, self.player_alive)
+        obs = np.empty((self.num_npcs, 8), dtype=np.float32)
+        obs[:, 0] = offset[:, 0] / WIDTH
+        obs[:, 1] = offset[:, 1] / HEIGHT
+        obs[:, 2] = dist / 500.0
+        obs[:, 3] = self.npc_health / 100.0
+        obs[:, 4] = self.player_health[target] / 100.0
+        obs[:, 5] = self.npc_cooldown / 30.0
+        obs[:, 6] = offset[:, 1] < 0
+        obs[:, 7] = dist < ATTACK_RANGE
+        return obs
+
+    def _fire(self, pos, offset, dist, team, shooter):
+        vel = offset / np.maximum(dist, 1e-9)[:, None] * PROJECTILE_SPEED
+        self.proj_pos = np.concatenate([self.proj_pos, pos])
+        self.proj_vel = np.concatenate([self.proj_vel, vel])
+        self.proj_team = np.concatenate([self.proj_team, np.full(len(pos), team)])
+        self.proj_shooter = np.concatenate([self.proj_shooter, shooter])
+
+    def _resolve_hits(self, team, targets, target_alive):
+        """Projectiles of `team` that reach a living target: (projectile mask, target index)."""
+        mine = np.flatnonzero(self.proj_team == team)
+        hit = np.zeros(len(self.proj_pos), dtype=bool)
+        if len(mine) == 0 or not target_alive.any():
+            return hit, np.zeros(0, dtype=np.int64)
+        idx, _, dist = _nearest(self.proj_pos[mine], targets, target_alive)
+        landed = dist < HIT_RADIUS
+        hit[mine[landed]] = True
+        return hit, idx[landed]
+
+    def step(self, actions):
+        """Advance one tick. `actions` has one entry per NPC (ignored for dead NPCs).
+
+        Returns (observations [M, 8], rewards [M], dones [M], info); an NPC is
+        done once it is dead or the episode is over.
+        """
+        M = self.num_npcs
+        rewards = np.zeros(M)
+        if self.done:
+            return self.get_observations(), rewards, np.ones(M, dtype=bool), self._info()
+
+        r = self.rewards
+        actions = np.asarray(actions)
+        npc_alive = self.npc_alive
+        player_alive = self.player_alive
+        _, offset, dist = _nearest(self.npc_pos, self.player_pos, player_alive)
+
+        # NPC actions: 0=move up, 1=move down, 2=move toward, 3=attack
+        up = npc_alive & (actions == 0) & (self.npc_pos[:, 1] > 30)
+        down = npc_alive & (actions == 1) & (self.npc_pos[:, 1] < HEIGHT - 30)
+        self.npc_pos[up, 1] -= NPC_SPEED
+        self.npc_pos[down, 1] += NPC_SPEED
+        toward = npc_alive & (actions == 2)
+        move = toward & (np.abs(offset[:, 0]) > 70)
+        self.npc_pos[move, 0] += np.sign(offset[move, 0]) * NPC_SPEED
+        rewards[toward] += r['approach']
+        attack = npc_alive & (actions == 3) & (self.npc_cooldown == 0)
+        fire = attack & (dist < ATTACK_RANGE)
+        rewards[fire] += r['shoot']
+        rewards[attack & ~fire] += r['shoot_out_of_range']
+        if fire.any():
+            self._fire(self.npc_pos[fire], offset[fire], dist[fire], NPC_TEAM, np.flatnonzero(fire))
+            self.npc_cooldown[fire] = COOLDOWN
+
+        # Scripted players: random vertical jitter, shoot at the nearest NPC in range
+        P = self.num_players
+        jitter, jitter_size, trigger = self.rng.random(P), self.rng.random(P), self.rng.random(P)
+        wobble = player_alive & (jitter < 0.02)
+        self.player_pos[wobble, 1] += (jitter_size[wobble] - 0.5) * 10.0
+        np.clip(self.player_pos[:, 1], 30.0, HEIGHT - 30.0, out=self.player_pos[:, 1])
+        _, p_offset, p_dist = _nearest(self.player_pos, self.npc_pos, npc_alive)
+        shoot = player_alive & (self.player_cooldown == 0) & (trigger < 0.05) & (p_dist < PLAYER_FIRE_RANGE)
+        if shoot.any():
+            self._fire(self.player_pos[shoot], p_offset[shoot], p_dist[shoot], PLAYER_TEAM, np.flatnonzero(shoot))
+            self.player_cooldown[shoot] = COOLDOWN
+
+        # Projectiles and collisions
+        self.proj_pos += self.proj_vel
+        hit_npc, victims = self._resolve_hits(PLAYER_TEAM, self.npc_pos, npc_alive)
+        np.add.at(self.npc_health, victims, -DAMAGE)
+        np.add.at(rewards, victims, r['hit_taken'])
+        hit_player, struck = self._resolve_hits(NPC_TEAM, self.player_pos, player_alive)
+        np.add.at(self.player_health, struck, -DAMAGE)
+        np.add.at(rewards, self.proj_shooter[hit_player], r['hit_dealt'])
+        inside = ((self.proj_pos[:, 0] > 0) & (self.proj_pos[:, 0] < WIDTH)
+                  & (self.proj_pos[:, 1] > 0) & (self.proj_pos[:, 1] < HEIGHT))
+        keep = inside & ~hit_npc & ~hit_player
+        self.proj_pos, self.proj_vel = self.proj_pos[keep], self.proj_vel[keep]
+        self.proj_team, self.proj_shooter = self.proj_team[keep], self.proj_shooter[keep]
+
+        np.maximum(self.npc_cooldown - 1, 0, out=self.npc_cooldown)
+        np.maximum(self.player_cooldown - 1, 0, out=self.player_cooldown)
+
+        # Deaths and episode end
+        died = npc_alive & ~self.npc_alive
+        rewards[died] += r['lose']
+        self.t += 1
+        if not self.player_alive.any():
+            rewards[self.npc_alive] += r['win']
+            self.done, self.winner = True, 'npc'
+        elif not self.npc_alive.any():
+            self.done, self.winner = True, 'player'
+        elif self.t >= self.max_steps:
+            self.done, self.winner = True, 'timeout'
+
+        rewards[npc_alive] += r['step']
+        self.episode_returns += rewards
+        dones = ~self.npc_alive | self.done
+        return self.get_observations(), rewards, dones, self._info()
+
+    def _info(self) -> dict:
+        return {
+            'episode_done': self.done,
+            'winner': self.winner,
+            'npcs_alive': int(self.npc_alive.sum()),
+            'players_alive': int(self.player_alive.sum()),
+        }
+
+
+def select_actions(model, obs: np.ndarray, greedy: bool = False):
+    """Actions for every NPC from one forward pass of the shared policy.
+
+    Returns (actions as a NumPy array, log-probabilities tensor or None when greedy).
+    """
+    logits = model(torch.as_tensor(obs))
+    if greedy:
+        return logits.argmax(dim=-1).numpy(), None
+    dist = torch.distributions.Categorical(logits=logits)
+    actions = dist.sample()
+    return actions.numpy(), dist.log_prob(actions)
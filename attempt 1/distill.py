@@ -0,0 +1,195 @@
+"""
+Distill a large PolicyNet teacher into the small network the browser demo runs.
+
+The TSX demo evaluates `NeuralNetwork(8, 16, 4)` in plain JS every frame, so a
+bigger policy can't ship as-is. This trains (or loads) a wide teacher
+headlessly, logs the states it visits across a batch of `GameEnv`s, fits a
+`PolicyNet(8, 16, 4)` student to the teacher's action distribution with a KL
+loss over large minibatches, and writes the student in the demo's weight
+layout (`w1[input][hidden]`, `b1`, `w2[hidden][output]`, `b2`).
+
+    python distill.py --teacher big.pth --out student_weights.json
+    python distill.py --teacher-iterations 300 --teacher-hidden 128 --out student_weights.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+import torch.optim as optim
+
+from app import ActorCritic, PolicyNet
+from evaluate import load_policy, run_episodes, summarize
+from ppo import PPOTrainer
+from vec_env import make_vector_env
+
+
+STUDENT_HIDDEN = 16
+
+
+def train_teacher(hidden_size: int = 128, iterations: int = 300, lr: float = 3e-4, seed: int = 0,
+                  log_every: float = 5.0) -> ActorCritic:
+    """Train a wide actor-critic with PPO; returns the model."""
+    torch.manual_seed(seed)
+    model = ActorCritic(8, hidden_size, 4)
+    trainer = PPOTrainer(model, optim.Adam(model.parameters(), lr=lr), seed=seed)
+    last_log = time.time()
+    returns = []
+    try:
+        for i in range(iterations):
+            finished, _ = trainer.train_iteration()
+            returns.extend(r for r, _, _ in finished)
+            if time.time() - last_log >= log_every:
+                last_log = time.time()
+                recent = returns[-100:]
+                mean = sum(recent) / len(recent) if recent else float('nan')
+                print(f'teacher iteration {i + 1}/{iterations}  mean return (last 100): {mean:.2f}', file=sys.stderr)
+    finally:
+        trainer.close()
+    model.eval()
+    return model
+
+
+def collect_states(teacher: PolicyNet, num_states: int, num_envs: int = 64, seed: int = 0,
+                   explore: float = 0.1) -> np.ndarray:
+    """States visited by the teacher's sampled policy across `num_envs` environments.
+
+    With probability `explore` an environment takes a uniform random action
+    instead, so the student also sees states just off the teacher's path.
+    """
+    rng = np.random.default_rng(seed)
+    envs = make_vector_env(num_envs)
+    obs, _ = envs.reset(seed=seed)
+    steps = -(-num_states // num_envs)
+    states = np.empty((steps * num_envs, envs.observation_size), dtype=np.float32)
+    try:
+        with torch.no_grad():
+            for t in range(steps):
+                states[t * num_envs:(t + 1) * num_envs] = obs
+                probs = torch.softmax(teacher(torch.from_numpy(obs)), dim=-1).numpy().astype(np.float64)
+                cdf = np.cumsum(probs, axis=-1)
+                u = rng.random(num_envs)[:, None] * cdf[:, -1:]
+                actions = np.minimum((cdf < u).sum(axis=-1), envs.num_actions - 1)
+                random_mask = rng.random(num_envs) < explore
+                actions[random_mask] = rng.integers(envs.num_actions, size=int(random_mask.sum()))
+                obs, _, _, _, _ = envs.step(actions)
+    finally:
+        envs.close()
+    return states[:num_states]
+
+
+def distill(teacher: PolicyNet, student: PolicyNet, states: np.ndarray, epochs: int = 20,
+            batch_size: int = 4096, lr: float = 3e-3, temperature: float = 1.0, loss: str = 'kl',
+            log_every: float = 5.0) -> dict:
+    """Fit `student` to `teacher` on `states`.
+
+    `loss='kl'` matches softened action distributions (policy nets); `loss='mse'`
+    regresses raw outputs (Q-networks). Returns final loss and greedy agreement.
+    """
+    x = torch.from_numpy(states)
+    with torch.no_grad():
+        target = torch.cat([teacher(x[i:i + batch_size]) for i in range(0, len(x), batch_size)])
+    target_probs = torch.softmax(target / temperature, dim=-1)
+    optimizer = optim.Adam(student.parameters(), lr=lr)
+    scheduler = optim.lr_scheduler.CosineAnnealingLR(optimizer, T_max=max(1, epochs))
+    last_log = time.time()
+    student.train()
+    for epoch in range(epochs):
+        perm = torch.randperm(len(x))
+        total = 0.0
+        for i in range(0, len(x), batch_size):
+            idx = perm[i:i + batch_size]
+            out = student(x[idx])
+            if loss == 'kl':
+                # KL(teacher || student) on temperature-softened distributions
+                log_p = F.log_softmax(out / temperature, dim=-1)
+                batch_loss = F.kl_div(log_p, target_probs[idx], reduction='batchmean') * temperature ** 2
+            else:
+                batch_loss = F.mse_loss(out, target[idx])
+            optimizer.zero_grad()
+            batch_loss.backward()
+            optimizer.step()
+            total += batch_loss.item() * len(idx)
+        scheduler.step()
+        if time.time() - last_log >= log_every:
+            last_log = time.time()
+            print(f'distill epoch {epoch + 1}/{epochs}  loss: {total / len(x):.5f}', file=sys.stderr)
+    student.eval()
+    with torch.no_grad():
+        out = torch.cat([student(x[i:i + batch_size]) for i in range(0, len(x), batch_size)])
+    return {
+        'loss': total / len(x),
+        'action_agreement': float((out.argmax(-1) == target.argmax(-1)).float().mean()),
+    }
+
+
+def student_weights(student: PolicyNet) -> dict:
+    """Student weights in the TSX `NeuralNetwork` layout (input-major matrices)."""
+    first, last = student.model[0], student.model[2]
+    return {
+        'inputSize': first.in_features,
+        'hiddenSize': first.out_features,
+        'outputSize': last.out_features,
+        'w1': first.weight.detach().t().tolist(),
+        'b1': first.bias.detach().tolist(),
+        'w2': last.weight.detach().t().tolist(),
+        'b2': last.bias.detach().tolist(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Distill a large policy into the browser-sized student network.')
+    parser.add_argument('--teacher', help='teacher checkpoint (default: train one with PPO)')
+    parser.add_argument('--teacher-hidden', type=int, default=128)
+    parser.add_argument('--teacher-iterations', type=int, default=300, help='PPO iterations when training a teacher')
+    parser.add_argument('--save-teacher', help='where to save a newly trained teacher')
+    parser.add_argument('--student-hidden', type=int, default=STUDENT_HIDDEN)
+    parser.add_argument('--states', type=int, default=200000, help='logged teacher states to distill on')
+    parser.add_argument('--epochs', type=int, default=20)
+    parser.add_argument('--batch-size', type=int, default=4096)
+    parser.add_argument('--temperature', type=float, default=1.0)
+    parser.add_argument('--eval-episodes', type=int, default=500, help='greedy episodes to compare teacher and student')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default='student_weights.json', help='student weights for the frontend')
+    parser.add_argument('--save-student', help='also save the student as a PolicyNet checkpoint')
+    args = parser.parse_args(argv)
+
+    if args.teacher:
+        if not os.path.exists(args.teacher):
+            print(f'Checkpoint not found: {args.teacher}', file=sys.stderr)
+            return 1
+        teacher = load_policy(args.teacher)
+    else:
+        teacher = train_teacher(args.teacher_hidden, args.teacher_iterations, seed=args.seed)
+        if args.save_teacher:
+            torch.save(teacher.state_dict(), args.save_teacher)
+
+    torch.manual_seed(args.seed)
+    states = collect_states(teacher, args.states, seed=args.seed)
+    student = PolicyNet(8, args.student_hidden, 4)
+    report = distill(teacher, student, states, epochs=args.epochs, batch_size=args.batch_size,
+                     temperature=args.temperature)
+
+    with open(args.out, 'w') as f:
+        json.dump(student_weights(student), f)
+    if args.save_student:
+        torch.save(student.state_dict(), args.save_student)
+
+    report['states'] = len(states)
+    report['out'] = os.path.abspath(args.out)
+    if args.eval_episodes:
+        seeds = range(args.seed, args.seed + args.eval_episodes)
+        for name, model in (('teacher', teacher), ('student', student)):
+            summary = summarize(run_episodes(model, seeds))
+            report[name] = {'win_rate': summary['win_rate'], 'reward_mean': summary['reward']['mean']}
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,496 @@
+"""
+Distributed rollouts: remote actor processes feed a learner over plain TCP.
+
+Every message is a frame of (1-byte type, 4-byte big-endian length, payload).
+On connect an actor sends HELLO, the learner answers with CONFIG (model sizes
+and env settings as JSON) and the current WEIGHTS. The actor then plays
+episodes and sends TRAJECTORY frames; after each update the learner broadcasts
+new WEIGHTS to every connected actor. Both sides send HEARTBEAT frames every
+`heartbeat` seconds: the learner drops actors it has not heard from within its
+timeout, and an actor whose reads stall for `missed_heartbeats` intervals
+closes the socket and reconnects with exponential backoff. A TRAJECTORY that
+does not match its header or the model (observation size, action range,
+non-finite values) drops the connection before anything is queued.
+
+Trajectory payload (all little-endian):
+    header  <IIII  weights version, episode count, total steps, obs size
+    lengths <i4[episodes]
+    obs     <f4[steps, obs size]
+    actions u1[steps]
+    rewards <f4[steps]
+
+Run everything on one machine with `python distributed.py local --actors 4`, or
+start `python distributed.py learner --host 0.0.0.0` and point `python
+distributed.py actor --host <learner>` at it from other nodes. The learner
+listens on 127.0.0.1 unless told otherwise: the protocol has no authentication.
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import queue
+import socket
+import struct
+import sys
+import threading
+import time
+import uuid
+
+import numpy as np
+import torch
+from torch.nn.utils import parameters_to_vector, vector_to_parameters
+
+from app import Game, PolicyNet
+from returns import discounted_cumsum
+
+
+HELLO, CONFIG, WEIGHTS, TRAJECTORY, HEARTBEAT, BYE = range(1, 7)
+
+FRAME = struct.Struct('!BI')
+TRAJ_HEADER = struct.Struct('<IIII')
+VERSION = struct.Struct('<I')
+MAX_FRAME = 256 * 1024 * 1024
+
+
+def send_frame(sock, kind: int, payload: bytes = b''):
+    sock.sendall(FRAME.pack(kind, len(payload)) + payload)
+
+
+def _recv_exact(sock, n: int) -> bytes:
+    buf = bytearray(n)
+    view = memoryview(buf)
+    got = 0
+    while got < n:
+        k = sock.recv_into(view[got:])
+        if k == 0:
+            raise ConnectionError('connection closed')
+        got += k
+    return bytes(buf)
+
+
+def recv_frame(sock):
+    kind, length = FRAME.unpack(_recv_exact(sock, FRAME.size))
+    if length > MAX_FRAME:
+        raise ConnectionError(f'frame too large: {length}')
+    return kind, _recv_exact(sock, length) if length else b''
+
+
+def encode_trajectories(version: int, episodes) -> bytes:
+    """`episodes` is a list of (obs [T, D] float32, actions [T], rewards [T])."""
+    lengths = np.array([len(e[1]) for e in episodes], dtype='<i4')
+    obs = np.concatenate([e[0] for e in episodes]).astype('<f4')
+    actions = np.concatenate([e[1] for e in episodes]).astype('u1')
+    rewards = np.concatenate([e[2] for e in episodes]).astype('<f4')
+    header = TRAJ_HEADER.pack(version, len(episodes), len(actions), obs.shape[1])
+    return header + lengths.tobytes() + obs.tobytes() + actions.tobytes() + rewards.tobytes()
+
+
+def decode_trajectories(payload: bytes, obs_size: int = None, num_actions: int = None) -> dict:
+    """Parse a TRAJECTORY payload; raises ValueError if it is malformed or does not fit the model."""
+    if len(payload) < TRAJ_HEADER.size:
+        raise ValueError(f'trajectory payload of {len(payload)} bytes is shorter than its header')
+    version, n, steps, dim = TRAJ_HEADER.unpack_from(payload)
+    expected = TRAJ_HEADER.size + 4 * n + 4 * steps * dim + steps + 4 * steps
+    if len(payload) != expected:
+        raise ValueError(f'trajectory payload is {len(payload)} bytes, its header describes {expected}')
+    if n == 0 or steps == 0:
+        raise ValueError('trajectory batch holds no episodes')
+    if obs_size is not None and dim != obs_size:
+        raise ValueError(f'observation size {dim} does not match the model ({obs_size})')
+    offset = TRAJ_HEADER.size
+    lengths = np.frombuffer(payload, '<i4', n, offset)
+    offset += 4 * n
+    obs = np.frombuffer(payload, '<f4', steps * dim, offset).reshape(steps, dim)
+    offset += 4 * steps * dim
+    actions = np.frombuffer(payload, 'u1', steps, offset)
+    offset += steps
+    rewards = np.frombuffer(payload, '<f4', steps, offset)
+    if (lengths <= 0).any() or lengths.sum(dtype=np.int64) != steps:
+        raise ValueError('episode lengths do not add up to the step count')
+    if num_actions is not None and actions.max() >= num_actions:
+        raise ValueError(f'action {actions.max()} out of range for {num_actions} actions')
+    if not (np.isfinite(obs).all() and np.isfinite(rewards).all()):
+        raise ValueError('non-finite observation or reward')
+    return {'version': version, 'lengths': lengths, 'obs': obs, 'actions': actions, 'rewards': rewards}
+
+
+def discounted_returns(rewards: np.ndarray, lengths: np.ndarray, gamma: float) -> np.ndarray:
+    """Per-episode discounted returns for episodes laid end to end."""
+    dones = np.zeros(len(rewards), dtype=bool)
+    dones[np.cumsum(lengths) - 1] = True
+    return discounted_cumsum(rewards, gamma, dones)
+
+
+class _Connection:
+    def __init__(self, sock, addr):
+        self.sock = sock
+        self.addr = addr
+        self.actor_id = None
+        self.last_seen = time.monotonic()
+        self._lock = threading.Lock()
+        self.alive = True
+
+    def send(self, kind, payload=b''):
+        with self._lock:
+            send_frame(self.sock, kind, payload)
+
+    def close(self):
+        self.alive = False
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class LearnerServer:
+    """Accepts actor connections, queues their trajectory batches and broadcasts weights."""
+    def __init__(self, model: PolicyNet, optimizer, host: str = '127.0.0.1', port: int = 5555, gamma: float = 0.99,
+                 max_steps: int = 1000, rewards: dict = None, max_staleness: int = 4,
+                 heartbeat: float = 1.0, heartbeat_timeout: float = 10.0):
+        self.model = model
+        self.optimizer = optimizer
+        # Actors run the policy head only; an ActorCritic value head stays on the learner.
+        self.params = list(model.model.parameters())
+        self.sizes = [self.params[0].shape[1], self.params[0].shape[0], self.params[-1].shape[0]]
+        self.gamma = gamma
+        self.max_steps = max_steps
+        self.rewards = rewards
+        self.max_staleness = max_staleness
+        self.heartbeat = heartbeat
+        self.heartbeat_timeout = heartbeat_timeout
+        self.version = 0
+        self.dropped_stale = 0
+        self.dropped_malformed = 0
+        self.batches = queue.Queue(maxsize=256)
+        self._conns = set()
+        self._conns_lock = threading.Lock()
+        self._stop = threading.Event()
+
+        self._listener = socket.create_server((host, port), reuse_port=False)
+        self._listener.settimeout(0.5)
+        self.port = self._listener.getsockname()[1]
+        self._accept_thread = threading.Thread(target=self._accept_loop, daemon=True)
+        self._beat_thread = threading.Thread(target=self._beat_loop, daemon=True)
+
+    def start(self):
+        self._accept_thread.start()
+        self._beat_thread.start()
+        return self
+
+    @property
+    def num_actors(self) -> int:
+        with self._conns_lock:
+            return sum(1 for c in self._conns if c.alive and c.actor_id is not None)
+
+    def _weights_payload(self) -> bytes:
+        vec = parameters_to_vector(self.params).detach().cpu().numpy().astype('<f4')
+        return VERSION.pack(self.version) + vec.tobytes()
+
+    def _config_payload(self) -> bytes:
+        return json.dumps({'sizes': self.sizes, 'max_steps': self.max_steps, 'rewards': self.rewards,
+                           'heartbeat': self.heartbeat}).encode()
+
+    def _accept_loop(self):
+        while not self._stop.is_set():
+            try:
+                sock, addr = self._listener.accept()
+            except socket.timeout:
+                self._reap()
+                continue
+            except OSError:
+                break
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            conn = _Connection(sock, addr)
+            with self._conns_lock:
+                self._conns.add(conn)
+            threading.Thread(target=self._read_loop, args=(conn,), daemon=True).start()
+
+    def _beat_loop(self):
+        while not self._stop.wait(self.heartbeat):
+            with self._conns_lock:
+                conns = [c for c in self._conns if c.alive]
+            for c in conns:
+                try:
+                    c.send(HEARTBEAT)
+                except OSError:
+                    c.close()
+
+    def _reap(self):
+        now = time.monotonic()
+        with self._conns_lock:
+            dead = [c for c in self._conns if not c.alive or now - c.last_seen > self.heartbeat_timeout]
+            for c in dead:
+                self._conns.discard(c)
+        for c in dead:
+            c.close()
+
+    def _read_loop(self, conn):
+        try:
+            while conn.alive and not self._stop.is_set():
+                kind, payload = recv_frame(conn.sock)
+                conn.last_seen = time.monotonic()
+                if kind == HELLO:
+                    conn.actor_id = payload.decode() or str(conn.addr)
+                    conn.send(CONFIG, self._config_payload())
+                    conn.send(WEIGHTS, self._weights_payload())
+                elif kind == TRAJECTORY:
+                    try:
+                        batch = decode_trajectories(payload, self.sizes[0], self.sizes[2])
+                    except ValueError:
+                        self.dropped_malformed += 1
+                        break
+                    batch['actor'] = conn.actor_id
+                    self.batches.put(batch)
+                elif kind == BYE:
+                    break
+        except (OSError, ConnectionError, struct.error):
+            pass
+        finally:
+            conn.close()
+
+    def broadcast_weights(self):
+        payload = self._weights_payload()
+        with self._conns_lock:
+            conns = list(self._conns)
+        for c in conns:
+            try:
+                c.send(WEIGHTS, payload)
+            except OSError:
+                c.close()
+
+    def next_batch(self, timeout: float = None):
+        """Next trajectory batch that is fresh enough to learn from, or None on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                batch = self.batches.get(timeout=remaining)
+            except queue.Empty:
+                return None
+            if self.version - batch['version'] <= self.max_staleness:
+                return batch
+            self.dropped_stale += 1
+
+    def update(self, batch) -> dict:
+        """REINFORCE step on a batch of episodes, then broadcast the new weights."""
+        obs = torch.from_numpy(batch['obs'].copy())
+        actions = torch.from_numpy(batch['actions'].astype(np.int64))
+        returns = discounted_returns(batch['rewards'], batch['lengths'], self.gamma)
+        returns = torch.from_numpy(((returns - returns.mean()) / (returns.std() + 1e-8)).astype(np.float32))
+
+        logp = torch.log_softmax(self.model(obs), dim=-1).gather(1, actions[:, None]).squeeze(1)
+        loss = -(logp * returns).sum() / len(batch['lengths'])
+        self.optimizer.zero_grad()
+        loss.backward()
+        self.optimizer.step()
+
+        self.version += 1
+        self.broadcast_weights()
+        ends = np.cumsum(batch['lengths'])
+        episode_rewards = np.add.reduceat(batch['rewards'].astype(np.float64), ends - batch['lengths'])
+        return {
+            'version': self.version,
+            'loss': loss.item(),
+            'episode_rewards': episode_rewards.tolist(),
+            'steps': int(len(batch['actions'])),
+            'actors': self.num_actors,
+        }
+
+    def stop(self):
+        self._stop.set()
+        with self._conns_lock:
+            conns = list(self._conns)
+            self._conns.clear()
+        for c in conns:
+            try:
+                c.send(BYE)
+            except OSError:
+                pass
+            c.close()
+        self._listener.close()
+
+
+def _play_batch(model, envs, rng, max_steps):
+    """Play one stochastic episode per env in lockstep; returns [(obs, actions, rewards), ...]."""
+    states = [env.reset() for env in envs]
+    traj = [([], [], []) for _ in envs]
+    active = list(range(len(envs)))
+    with torch.no_grad():
+        for _ in range(max_steps):
+            if not active:
+                break
+            probs = torch.softmax(model(torch.tensor([states[i] for i in active], dtype=torch.float32)), dim=-1)
+            cdf = probs.cumsum(dim=-1).numpy()
+            u = rng.random(len(active))
+            actions = np.minimum((cdf < u[:, None]).sum(axis=1), cdf.shape[1] - 1)
+            still = []
+            for i, a in zip(active, actions):
+                traj[i][0].append(states[i])
+                traj[i][1].append(int(a))
+                reward, done, states[i] = envs[i].step(int(a))
+                traj[i][2].append(reward)
+                if not done:
+                    still.append(i)
+            active = still
+    return [(np.asarray(o, dtype=np.float32), np.asarray(a), np.asarray(r, dtype=np.float32)) for o, a, r in traj]
+
+
+def run_actor(host: str, port: int, actor_id: str = None, episodes_per_batch: int = 4, seed: int = None,
+              heartbeat: float = 1.0, missed_heartbeats: int = 5, max_backoff: float = 10.0, stop_event=None):
+    """Connect to a learner and stream trajectories until it says BYE or `stop_event` is set.
+
+    Reads time out after `missed_heartbeats` of the learner's heartbeat intervals (this actor's own
+    `heartbeat` until CONFIG arrives); the actor then drops the connection and reconnects.
+    """
+    torch.set_num_threads(1)
+    actor_id = actor_id or f'{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}'
+    stop_event = stop_event or threading.Event()
+    rng = np.random.default_rng(seed)
+    backoff = 0.5
+    while not stop_event.is_set():
+        try:
+            sock = socket.create_connection((host, port), timeout=10)
+        except OSError:
+            stop_event.wait(backoff)
+            backoff = min(max_backoff, backoff * 2)
+            continue
+        backoff = 0.5
+        sock.settimeout(missed_heartbeats * heartbeat)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        conn = _Connection(sock, (host, port))
+        latest = {}
+        got_weights = threading.Event()
+        finished = threading.Event()
+
+        def reader():
+            try:
+                while conn.alive:
+                    kind, payload = recv_frame(sock)
+                    if kind == CONFIG:
+                        latest['config'] = json.loads(payload.decode())
+                        sock.settimeout(missed_heartbeats * latest['config'].get('heartbeat', heartbeat))
+                    elif kind == WEIGHTS:
+                        latest['weights'] = (VERSION.unpack_from(payload)[0],
+                                             np.frombuffer(payload, '<f4', offset=VERSION.size).copy())
+                        got_weights.set()
+                    elif kind == BYE:
+                        finished.set()
+                        break
+            except (OSError, ConnectionError, struct.error, ValueError):
+                pass
+            finally:
+                conn.close()
+                got_weights.set()
+
+        def beat():
+            while conn.alive and not stop_event.wait(heartbeat):
+                try:
+                    conn.send(HEARTBEAT)
+                except OSError:
+                    break
+
+        try:
+            conn.send(HELLO, actor_id.encode())
+            threading.Thread(target=reader, daemon=True).start()
+            threading.Thread(target=beat, daemon=True).start()
+            got_weights.wait()
+            if not conn.alive:
+                raise ConnectionError('learner closed the connection')
+
+            cfg = latest['config']
+            model = PolicyNet(*cfg['sizes']).eval()
+            envs = [Game(seed=int(rng.integers(2 ** 31)), rewards=cfg.get('rewards'))
+                    for _ in range(episodes_per_batch)]
+            version = -1
+            while conn.alive and not stop_event.is_set():
+                if latest['weights'][0] != version:
+                    version, vec = latest['weights']
+                    vector_to_parameters(torch.from_numpy(vec), model.parameters())
+                episodes = _play_batch(model, envs, rng, cfg['max_steps'])
+                conn.send(TRAJECTORY, encode_trajectories(version, episodes))
+        except (OSError, ConnectionError, KeyError):
+            pass
+        finally:
+            conn.close()
+        if finished.is_set():
+            break
+        stop_event.wait(backoff)
+
+
+def train_learner(server: LearnerServer, updates: int = None, log=print, stop_event=None):
+    """Consume batches until `updates` updates were made (or forever); returns the last stats."""
+    stats = None
+    done = 0
+    while (updates is None or done < updates) and not (stop_event and stop_event.is_set()):
+        batch = server.next_batch(timeout=1.0)
+        if batch is None:
+            continue
+        stats = server.update(batch)
+        done += 1
+        if log:
+            log(f"update {stats['version']} | actors {stats['actors']} | "
+                f"mean episode reward {np.mean(stats['episode_rewards']):.3f} | loss {stats['loss']:.3f}")
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Distributed actor/learner training over TCP.')
+    sub = parser.add_subparsers(dest='role', required=True)
+    p_learner = sub.add_parser('learner', help='serve weights and learn from remote actors')
+    p_actor = sub.add_parser('actor', help='generate experience for a learner')
+    p_local = sub.add_parser('local', help='learner plus actor processes on localhost')
+    for p in (p_learner, p_local):
+        p.add_argument('--port', type=int, default=5555)
+        p.add_argument('--updates', type=int, default=None)
+        p.add_argument('--lr', type=float, default=1e-3)
+        p.add_argument('--load', help='checkpoint to start from')
+        p.add_argument('--save', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'model.pth'))
+    p_learner.add_argument('--host', default='127.0.0.1', help='interface to listen on (0.0.0.0 for remote actors)')
+    p_actor.add_argument('--host', default='127.0.0.1')
+    p_actor.add_argument('--port', type=int, default=5555)
+    p_local.add_argument('--actors', type=int, default=4)
+    for p in (p_actor, p_local):
+        p.add_argument('--episodes-per-batch', type=int, default=4)
+    args = parser.parse_args(argv)
+
+    if args.role == 'actor':
+        run_actor(args.host, args.port, episodes_per_batch=args.episodes_per_batch)
+        return 0
+
+    if args.load:
+        from evaluate import policy_from_state_dict
+
+        # Actors send raw observations, so saved normalizer statistics are folded into the first layer
+        model = policy_from_state_dict(torch.load(args.load, map_location='cpu')).train()
+    else:
+        model = PolicyNet(8, 16, 4)
+    optimizer = torch.optim.Adam(model.parameters(), lr=args.lr)
+    host = '127.0.0.1' if args.role == 'local' else args.host
+    server = LearnerServer(model, optimizer, host=host, port=args.port).start()
+    print(f'Learner listening on {host}:{server.port}')
+
+    procs = []
+    if args.role == 'local':
+        for i in range(args.actors):
+            proc = mp.Process(target=run_actor, args=('127.0.0.1', server.port, f'local-{i}'),
+                              kwargs={'episodes_per_batch': args.episodes_per_batch, 'seed': i}, daemon=True)
+            proc.start()
+            procs.append(proc)
+    try:
+        train_learner(server, args.updates)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        for proc in procs:
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.terminate()
+        torch.save(model.state_dict(), args.save)
+        print(f'Saved {args.save} (dropped {server.dropped_stale} stale batches)')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,160 @@
+"""
+Evolution-strategies trainer over PolicyNet parameters.
+
+Each generation samples antithetic Gaussian perturbations of the flattened
+policy weights and scores theta + sigma * eps and theta - sigma * eps on the
+same seeded `Game` episodes. Every worker process builds the same noise table
+from a shared seed, so a perturbation travels as a single integer offset and
+comes back as two fitness scalars. Fitness values are rank-shaped before the
+gradient estimate is handed to a regular torch optimizer.
+"""
+
+import math
+import multiprocessing as mp
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import torch
+from torch.nn.utils import parameters_to_vector, vector_to_parameters
+
+from app import PolicyNet
+from evaluate import run_episodes
+from resources import pinned_worker_init
+
+
+class NoiseTable:
+    """Block of standard normal noise generated identically from `seed` in every process."""
+    def __init__(self, size: int, seed: int):
+        self.noise = np.random.default_rng(seed).standard_normal(size, dtype=np.float32)
+
+    def get(self, offset: int, dim: int) -> np.ndarray:
+        return self.noise[offset:offset + dim]
+
+    def sample_offsets(self, rng: np.random.Generator, dim: int, count: int) -> np.ndarray:
+        return rng.integers(0, len(self.noise) - dim + 1, size=count)
+
+
+def centered_ranks(x: np.ndarray) -> np.ndarray:
+    """Map values to their ranks scaled into [-0.5, 0.5]."""
+    ranks = np.empty(x.size, dtype=np.float64)
+    ranks[x.ravel().argsort()] = np.arange(x.size)
+    ranks = ranks.reshape(x.shape) / max(1, x.size - 1) - 0.5
+    return ranks
+
+
+_worker = {}
+
+
+def _init_worker(noise_size, noise_seed, sizes, cores=None, counter=None):
+    if counter is not None:
+        # Pool worker: one core and one compute thread; parallelism comes from the pool.
+        pinned_worker_init(cores, counter)
+    _worker['noise'] = NoiseTable(noise_size, noise_seed)
+    _worker['model'] = PolicyNet(*sizes).eval()
+
+
+def _evaluate_offsets(theta, offsets, sigma, seeds, max_steps, rewards=None):
+    """Score +/- perturbations for each offset; returns [(f_pos, f_neg, steps), ...]."""
+    model, noise = _worker['model'], _worker['noise']
+    params = list(model.parameters())
+    theta = torch.as_tensor(theta)
+    out = []
+    with torch.no_grad():
+        for off in offsets:
+            eps = torch.from_numpy(noise.get(int(off), theta.numel()))
+            scores = []
+            steps = 0
+            for sign in (1.0, -1.0):
+                vector_to_parameters(theta + sign * sigma * eps, params)
+                results = run_episodes(model, seeds, 'greedy', max_steps, rewards)
+                scores.append(float(np.mean([r[1] for r in results])))
+                steps += sum(r[2] for r in results)
+            out.append((scores[0], scores[1], steps))
+    return out
+
+
+class ESTrainer:
+    def __init__(self, model: PolicyNet, lr: float = 0.02, sigma: float = 0.05, population: int = 64,
+                 episodes_per_eval: int = 2, max_steps: int = 1000, weight_decay: float = 0.005,
+                 workers: int = None, noise_size: int = 1 << 22, noise_seed: int = 12345, seed: int = None,
+                 rewards: dict = None, cores=None):
+        self.model = model
+        # Only the policy layers are evolved; an ActorCritic value head is left alone.
+        self.params = list(model.model.parameters())
+        self.dim = sum(p.numel() for p in self.params)
+        self.sizes = (self.params[0].shape[1], self.params[0].shape[0], self.params[-1].shape[0])
+        self.optimizer = torch.optim.Adam(self.params, lr=lr, weight_decay=weight_decay)
+        self.sigma = sigma
+        self.population = population
+        self.episodes_per_eval = episodes_per_eval
+        self.max_steps = max_steps
+        self.rewards = rewards
+        self.noise = NoiseTable(noise_size, noise_seed)
+        self.rng = np.random.default_rng(seed)
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.total_steps = 0
+        self.total_episodes = 0
+        self.generation = 0
+
+        initargs = (noise_size, noise_seed, self.sizes)
+        if self.workers == 1:
+            _init_worker(*initargs)
+            self.pool = None
+        else:
+            # `cores` (e.g. from ResourceManager.allocate) pins workers round-robin
+            initargs += (cores, mp.Value('i', 0))
+            self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=initargs)
+
+    def train_iteration(self) -> dict:
+        """Evaluate one population and take a single optimizer step."""
+        theta = parameters_to_vector(self.params).detach().clone()
+        offsets = self.noise.sample_offsets(self.rng, self.dim, self.population)
+        # Common random numbers: every member plays the same episode seeds this generation.
+        base = int(self.rng.integers(0, 2 ** 31 - 1))
+        seeds = list(range(base, base + self.episodes_per_eval))
+
+        if self.pool is None:
+            results = _evaluate_offsets(theta, offsets, self.sigma, seeds, self.max_steps, self.rewards)
+        else:
+            chunk = max(1, math.ceil(self.population / self.workers))
+            parts = [offsets[i:i + chunk] for i in range(0, self.population, chunk)]
+            results = [r for part in self.pool.map(_evaluate_offsets, [theta] * len(parts), parts,
+                                                   [self.sigma] * len(parts), [seeds] * len(parts),
+                                                   [self.max_steps] * len(parts),
+                                                   [self.rewards] * len(parts)) for r in part]
+
+        fitness = np.array([(r[0], r[1]) for r in results], dtype=np.float64)
+        shaped = centered_ranks(fitness)
+        weights = shaped[:, 0] - shaped[:, 1]
+        grad = np.zeros(self.dim, dtype=np.float64)
+        for w, off in zip(weights, offsets):
+            grad += w * self.noise.get(int(off), self.dim)
+        grad /= 2 * self.population * self.sigma
+
+        # The optimizer minimizes, so hand it the negative ascent direction.
+        self.optimizer.zero_grad()
+        start = 0
+        for p in self.params:
+            n = p.numel()
+            p.grad = torch.from_numpy(-grad[start:start + n]).float().view_as(p)
+            start += n
+        self.optimizer.step()
+
+        episodes = 2 * self.population * self.episodes_per_eval
+        steps = int(sum(r[2] for r in results))
+        self.total_episodes += episodes
+        self.total_steps += steps
+        self.generation += 1
+        return {
+            'generation': self.generation,
+            'fitness_mean': float(fitness.mean()),
+            'fitness_max': float(fitness.max()),
+            'episodes': episodes,
+            'steps': steps,
+        }
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
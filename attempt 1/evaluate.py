@@ -0,0 +1,233 @@
+"""
+Seeded evaluation harness for PolicyNet checkpoints.
+
+Loads a checkpoint written by `JSApi.save_model`, plays many seeded episodes of
+`Game` across a process pool and prints summary statistics as JSON.
+
+    python evaluate.py model.pth --episodes 5000 --mode greedy
+"""
+
+import argparse
+import json
+import math
+import multiprocessing as mp
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import torch
+
+from app import Game, PolicyNet
+from normalizer import fold_into_state_dict
+from resources import available_cores, pinned_worker_init
+
+
+MAX_STEPS = 1000
+PERCENTILES = (5, 25, 50, 75, 95)
+
+_worker_model = None
+
+
+def policy_from_state_dict(state: dict) -> PolicyNet:
+    """Build a PolicyNet whose layer sizes match the given state dict.
+
+    Extra heads (e.g. the value head of an ActorCritic checkpoint) are ignored,
+    and saved observation-normalizer statistics are folded into the first layer.
+    """
+    state = {k: v for k, v in fold_into_state_dict(state).items() if k.startswith('model.')}
+    hidden_size, input_size = state['model.0.weight'].shape
+    output_size = state['model.2.weight'].shape[0]
+    model = PolicyNet(input_size, hidden_size, output_size)
+    model.load_state_dict(state)
+    model.eval()
+    return model
+
+
+def load_policy(path: str) -> PolicyNet:
+    """Load a PolicyNet checkpoint saved by `JSApi.save_model`."""
+    state = torch.load(path, map_location='cpu')
+    return policy_from_state_dict(state)
+
+
+def _init_worker(state: dict, cores, counter):
+    global _worker_model
+    # One core and one compute thread per process; parallelism comes from the pool.
+    pinned_worker_init(cores, counter)
+    _worker_model = policy_from_state_dict(state)
+
+
+def run_episodes(model: PolicyNet, seeds, mode: str = 'greedy', max_steps: int = MAX_STEPS, rewards=None):
+    """Play one episode per seed in lockstep, batching the policy forward pass.
+
+    Every episode owns its environment RNG and its action-sampling RNG, so the
+    result for a seed does not depend on how seeds are split across workers.
+    `rewards` overrides Game.DEFAULT_REWARDS. Returns a list of
+    (seed, total_reward, length, winner) tuples.
+    """
+    envs = [Game(seed=s, rewards=rewards) for s in seeds]
+    samplers = [np.random.default_rng(s) for s in seeds]
+    states = [env.get_state() for env in envs]
+    totals = [0.0] * len(envs)
+    lengths = [0] * len(envs)
+    active = list(range(len(envs)))
+
+    with torch.no_grad():
+        for _ in range(max_steps):
+            if not active:
+                break
+            batch = torch.tensor([states[i] for i in active], dtype=torch.float32)
+            logits = model(batch)
+            if mode == 'greedy':
+                actions = logits.argmax(dim=-1).tolist()
+            else:
+                cdf = torch.softmax(logits, dim=-1).cumsum(dim=-1).numpy()
+                u = np.array([samplers[i].random() for i in active])
+                actions = np.minimum((cdf < u[:, None]).sum(axis=1), cdf.shape[1] - 1).tolist()
+
+            still_active = []
+            for i, action in zip(active, actions):
+                reward, done, states[i] = envs[i].step(int(action))
+                totals[i] += reward
+                lengths[i] += 1
+                if not done:
+                    still_active.append(i)
+            active = still_active
+
+    return [(s, totals[i], lengths[i], envs[i].winner or 'timeout') for i, s in enumerate(seeds)]
+
+
+def _run_chunk(seeds, mode, max_steps):
+    return run_episodes(_worker_model, seeds, mode, max_steps)
+
+
+def wilson_interval(successes: int, n: int, z: float = 1.96):
+    """Wilson score interval for a binomial proportion."""
+    if n == 0:
+        return 0.0, 0.0
+    p = successes / n
+    denom = 1.0 + z * z / n
+    centre = (p + z * z / (2 * n)) / denom
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return max(0.0, centre - half), min(1.0, centre + half)
+
+
+def _describe(values: np.ndarray, z: float = 1.96) -> dict:
+    mean = float(values.mean())
+    std = float(values.std(ddof=1)) if len(values) > 1 else 0.0
+    half = z * std / math.sqrt(len(values))
+    out = {
+        'mean': mean,
+        'std': std,
+        'ci95': [mean - half, mean + half],
+        'min': float(values.min()),
+        'max': float(values.max()),
+    }
+    for q, v in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+        out[f'p{q}'] = float(v)
+    return out
+
+
+def summarize(results) -> dict:
+    """Aggregate per-episode results into win rates, rewards and lengths.
+
+    An empty result list gives zero rates and no reward/length statistics.
+    """
+    n = len(results)
+    if n == 0:
+        return {'episodes': 0, 'win_rate': 0.0, 'win_rate_ci95': [0.0, 0.0], 'loss_rate': 0.0,
+                'timeout_rate': 0.0, 'reward': None, 'length': None}
+    rewards = np.array([r[1] for r in results], dtype=np.float64)
+    lengths = np.array([r[2] for r in results], dtype=np.float64)
+    outcomes = {'npc': 0, 'player': 0, 'timeout': 0}
+    for r in results:
+        outcomes[r[3]] += 1
+    wins = outcomes['npc']
+    return {
+        'episodes': n,
+        'win_rate': wins / n,
+        'win_rate_ci95': list(wilson_interval(wins, n)),
+        'loss_rate': outcomes['player'] / n,
+        'timeout_rate': outcomes['timeout'] / n,
+        'reward': _describe(rewards),
+        'length': _describe(lengths),
+    }
+
+
+def evaluate(path: str, episodes: int = 1000, mode: str = 'greedy', workers: int = None,
+             seed: int = 0, max_steps: int = MAX_STEPS, pin: bool = True) -> dict:
+    """Evaluate a checkpoint over `episodes` seeded episodes and return a summary dict.
+
+    With `pin`, pool workers are spread one per core over the cores this process may use.
+    """
+    if mode not in ('greedy', 'stochastic'):
+        raise ValueError(f'unknown mode: {mode}')
+    if episodes < 1:
+        raise ValueError(f'episodes must be at least 1, got {episodes}')
+    state = torch.load(path, map_location='cpu')
+    workers = max(1, workers or os.cpu_count() or 1)
+    seeds = list(range(seed, seed + episodes))
+
+    start = time.perf_counter()
+    if workers == 1:
+        results = run_episodes(policy_from_state_dict(state), seeds, mode, max_steps)
+    else:
+        # A few chunks per worker keeps the pool balanced when episode lengths vary.
+        chunk = max(1, math.ceil(episodes / (workers * 4)))
+        chunks = [seeds[i:i + chunk] for i in range(0, episodes, chunk)]
+        initargs = (state, available_cores() if pin else None, mp.Value('i', 0))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as pool:
+            results = [r for part in pool.map(_run_chunk, chunks, [mode] * len(chunks),
+                                              [max_steps] * len(chunks)) for r in part]
+    elapsed = time.perf_counter() - start
+
+    summary = summarize(results)
+    summary.update({
+        'checkpoint': os.path.abspath(path),
+        'mode': mode,
+        'seed': seed,
+        'max_steps': max_steps,
+        'workers': workers,
+        'elapsed_sec': elapsed,
+        'steps_per_sec': float(sum(r[2] for r in results) / elapsed) if elapsed > 0 else 0.0,
+    })
+    return summary
+
+
+def _positive_int(text: str) -> int:
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f'must be at least 1, got {value}')
+    return value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Evaluate a PolicyNet checkpoint on seeded Game episodes.')
+    parser.add_argument('checkpoint', nargs='?',
+                        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'model.pth'))
+    parser.add_argument('--episodes', type=_positive_int, default=1000)
+    parser.add_argument('--mode', choices=('greedy', 'stochastic'), default='greedy')
+    parser.add_argument('--workers', type=int, default=None, help='process count (default: all cores)')
+    parser.add_argument('--seed', type=int, default=0, help='first episode seed')
+    parser.add_argument('--max-steps', type=int, default=MAX_STEPS)
+    parser.add_argument('--no-pin', action='store_true', help='do not pin pool workers to cores')
+    parser.add_argument('--out', help='also write the JSON report to this path')
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.checkpoint):
+        print(f'Checkpoint not found: {args.checkpoint}', file=sys.stderr)
+        return 1
+
+    report = evaluate(args.checkpoint, args.episodes, args.mode, args.workers, args.seed, args.max_steps,
+                      pin=not args.no_pin)
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            f.write(text)
+    print(text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""
+Export a trained PolicyNet checkpoint to a standalone artifact for `npc_runtime.py`.
+
+Weights are quantized to int8 with one symmetric scale per output channel
+(float32 biases); `--float32` writes an unquantized fallback instead. The
+export also reports how often the exported policy picks the same greedy
+action as the float torch model on states from seeded `Game` episodes.
+
+    python export_policy.py model.pth --out policy_int8.npz
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+import torch
+
+from app import Game
+from evaluate import load_policy
+from npc_runtime import FORMAT_VERSION, PolicyRuntime
+
+
+def linear_layers(model):
+    """(weight, bias) float32 arrays for each Linear layer of a PolicyNet, in order."""
+    return [(m.weight.detach().cpu().numpy().astype(np.float32), m.bias.detach().cpu().numpy().astype(np.float32))
+            for m in model.model if isinstance(m, torch.nn.Linear)]
+
+
+def quantize_per_channel(w: np.ndarray):
+    """Symmetric int8 quantization with one scale per output row."""
+    max_abs = np.abs(w).max(axis=1)
+    scale = np.where(max_abs > 0, max_abs / 127.0, 1.0).astype(np.float32)
+    q = np.clip(np.rint(w / scale[:, None]), -127, 127).astype(np.int8)
+    return q, scale
+
+
+def export(model, out_path: str, quantize: bool = True) -> dict:
+    """Write `model` to `out_path` (.npz); returns size information."""
+    layers = linear_layers(model)
+    arrays = {'format_version': np.array(FORMAT_VERSION), 'num_layers': np.array(len(layers))}
+    for i, (w, b) in enumerate(layers):
+        if quantize:
+            arrays[f'q{i}'], arrays[f's{i}'] = quantize_per_channel(w)
+        else:
+            arrays[f'w{i}'] = w
+        arrays[f'b{i}'] = b
+    np.savez_compressed(out_path, **arrays)
+    return {
+        'path': os.path.abspath(out_path),
+        'quantized': quantize,
+        'file_bytes': os.path.getsize(out_path),
+        'float32_weight_bytes': int(sum(w.nbytes + b.nbytes for w, b in layers)),
+    }
+
+
+def sample_states(model, num_states: int, seed: int = 0, max_steps: int = 1000) -> np.ndarray:
+    """States visited by the float policy (greedy) on seeded episodes."""
+    states = []
+    episode = 0
+    with torch.no_grad():
+        while len(states) < num_states:
+            env = Game(seed=seed + episode)
+            state = env.get_state()
+            for _ in range(max_steps):
+                states.append(state)
+                action = int(model(torch.tensor([state], dtype=torch.float32)).argmax(dim=-1))
+                _, done, state = env.step(action)
+                if done or len(states) >= num_states:
+                    break
+            episode += 1
+    return np.asarray(states, dtype=np.float32)
+
+
+def accuracy_report(model, runtime: PolicyRuntime, states: np.ndarray) -> dict:
+    """Greedy-action agreement and logit error of `runtime` against the float model."""
+    with torch.no_grad():
+        ref = model(torch.from_numpy(states)).numpy()
+    got = runtime.logits(states)
+    agree = ref.argmax(axis=-1) == got.argmax(axis=-1)
+    err = np.abs(ref - got)
+    return {
+        'states': int(len(states)),
+        'action_agreement': float(agree.mean()),
+        'logit_max_abs_error': float(err.max()),
+        'logit_mean_abs_error': float(err.mean()),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Export a PolicyNet checkpoint for the NumPy NPC runtime.')
+    parser.add_argument('checkpoint')
+    parser.add_argument('--out', default='policy_int8.npz')
+    parser.add_argument('--float32', action='store_true', help='write unquantized float32 weights')
+    parser.add_argument('--states', type=int, default=20000, help='states used for the accuracy report')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.checkpoint):
+        print(f'Checkpoint not found: {args.checkpoint}', file=sys.stderr)
+        return 1
+    model = load_policy(args.checkpoint)
+    info = export(model, args.out, quantize=not args.float32)
+    runtime = PolicyRuntime.load(args.out)
+    info['runtime_bytes'] = runtime.nbytes
+    info['accuracy'] = accuracy_report(model, runtime, sample_states(model, args.states, args.seed))
+    print(json.dumps(info, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
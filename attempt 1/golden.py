@@ -0,0 +1,258 @@
+"""
+Golden-trace determinism checks and a throughput gate for the simulators.
+
+`record` plays fixed seeds with a fixed, seeded action stream and stores every
+observation, reward and done flag (plus the throughput of each backend) in
+`golden/traces.npz`. `check` replays the same seeds through every backend
+and compares the results with the stored traces: bit-for-bit by default, or
+within `--atol`. With `--timed`, it also fails when a backend's steps per
+second fall more than `--max-slowdown` below the recorded rate.
+
+Backends of the `game` family must all reproduce the same trace:
+`Game` itself, `Game` handed over through `snapshot()`/`restore()` every
+step, `GameEnv`, `SyncVectorEnv` and `AsyncVectorEnv`. The `arena` family
+covers `Arena`.
+
+    python golden.py record                       # after an intended behavior change
+    python golden.py check                        # after an optimization
+    python golden.py check --timed --max-slowdown 0.2
+
+Throughput is machine-dependent: record on the machine that runs the gate.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from app import Game
+from arena import Arena
+from vec_env import AsyncVectorEnv, GameEnv, SyncVectorEnv
+
+
+GOLDEN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'golden', 'traces.npz')
+SEEDS = tuple(range(8))
+STEPS = 400
+ARENA_SIZE = (4, 2)
+ACTION_SEED_OFFSET = 1_000_003
+
+
+def _actions(seed: int, steps: int, agents: int = None) -> np.ndarray:
+    """The fixed action stream for `seed` (independent of the environment's own RNG)."""
+    rng = np.random.default_rng(seed + ACTION_SEED_OFFSET)
+    return rng.integers(4, size=(steps,) if agents is None else (steps, agents))
+
+
+def _trace(obs, rewards, dones):
+    return np.asarray(obs, dtype=np.float64), np.asarray(rewards, dtype=np.float64), np.asarray(dones, dtype=bool)
+
+
+def run_game(seeds, steps):
+    traces = []
+    for seed in seeds:
+        game = Game(seed=seed)
+        obs, rewards, dones = [game.get_state()], [], []
+        for a in _actions(seed, steps):
+            reward, done, state = game.step(int(a))
+            obs.append(state)
+            rewards.append(reward)
+            dones.append(done)
+            if done:
+                break
+        traces.append(_trace(obs, rewards, dones))
+    return traces
+
+
+def run_snapshot(seeds, steps):
+    """Two Games alternate, handing the state over with snapshot()/restore() before every step."""
+    traces = []
+    for seed in seeds:
+        games = (Game(seed=seed), Game(seed=seed + 12345))
+        obs, rewards, dones = [games[0].get_state()], [], []
+        for t, a in enumerate(_actions(seed, steps)):
+            game, other = games[t % 2], games[(t + 1) % 2]
+            reward, done, state = game.step(int(a))
+            other.restore(game.snapshot())
+            obs.append(state)
+            rewards.append(reward)
+            dones.append(done)
+            if done:
+                break
+        traces.append(_trace(obs, rewards, dones))
+    return traces
+
+
+def run_gameenv(seeds, steps):
+    traces = []
+    for seed in seeds:
+        env = GameEnv(max_steps=steps)
+        o, _ = env.reset(seed=seed)
+        obs, rewards, dones = [o], [], []
+        for a in _actions(seed, steps):
+            o, reward, terminated, truncated, _ = env.step(int(a))
+            obs.append(o)
+            rewards.append(reward)
+            dones.append(terminated)
+            if terminated or truncated:
+                break
+        traces.append(_trace(obs, rewards, dones))
+    return traces
+
+
+def _run_vector(envs, seeds, steps):
+    """Lockstep vector run; each slot's trace stops at its first finished episode."""
+    try:
+        first, _ = envs.reset(seed=list(seeds))
+        actions = np.stack([_actions(s, steps) for s in seeds], axis=1)
+        obs = [[o] for o in first]
+        rewards = [[] for _ in seeds]
+        dones = [[] for _ in seeds]
+        active = np.ones(len(seeds), dtype=bool)
+        for t in range(steps):
+            o, r, terminated, truncated, info = envs.step(actions[t])
+            for i in np.flatnonzero(active):
+                finished = terminated[i] or truncated[i]
+                obs[i].append(info['final_observation'][i] if finished else o[i])
+                rewards[i].append(r[i])
+                dones[i].append(terminated[i])
+                if finished:
+                    active[i] = False
+            if not active.any():
+                break
+    finally:
+        envs.close()
+    return [_trace(*t) for t in zip(obs, rewards, dones)]
+
+
+def run_sync(seeds, steps):
+    return _run_vector(SyncVectorEnv([lambda: GameEnv(max_steps=steps)] * len(seeds)), seeds, steps)
+
+
+def run_async(seeds, steps):
+    env_fns = [GameEnv] * len(seeds)
+    return _run_vector(AsyncVectorEnv(env_fns, num_workers=2), seeds, steps)
+
+
+def run_arena(seeds, steps):
+    traces = []
+    for seed in seeds:
+        arena = Arena(*ARENA_SIZE, seed=seed, max_steps=steps)
+        obs, rewards, dones = [arena.get_observations()], [], []
+        for a in _actions(seed, steps, ARENA_SIZE[0]):
+            o, r, d, info = arena.step(a)
+            obs.append(o)
+            rewards.append(r)
+            dones.append(d)
+            if info['episode_done']:
+                break
+        traces.append(_trace(obs, rewards, dones))
+    return traces
+
+
+FAMILIES = {
+    'game': {'game': run_game, 'snapshot': run_snapshot, 'gameenv': run_gameenv, 'sync': run_sync,
+             'async': run_async},
+    'arena': {'arena': run_arena},
+}
+
+
+def timed(fn, seeds, steps, repeat: int = 3):
+    """Traces plus steps per second (best of `repeat` runs, to damp scheduler noise)."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        traces = fn(seeds, steps)
+        best = min(best, time.perf_counter() - start)
+    return traces, sum(len(r) for _, r, _ in traces) / best
+
+
+def record(path: str = GOLDEN_PATH, seeds=SEEDS, steps: int = STEPS) -> dict:
+    """Write reference traces (from the first backend of each family) and per-backend throughput."""
+    arrays = {'seeds': np.asarray(seeds), 'steps': np.asarray(steps)}
+    throughput = {}
+    for family, backends in FAMILIES.items():
+        reference = next(iter(backends))
+        for name, fn in backends.items():
+            traces, rate = timed(fn, seeds, steps)
+            throughput[name] = rate
+            if name == reference:
+                for i, (obs, rewards, dones) in enumerate(traces):
+                    arrays[f'{family}/{i}/obs'] = obs
+                    arrays[f'{family}/{i}/rewards'] = rewards
+                    arrays[f'{family}/{i}/dones'] = dones
+    arrays['throughput'] = np.asarray(json.dumps(throughput))
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    np.savez_compressed(path, **arrays)
+    return throughput
+
+
+def _compare(expected, got, atol: float):
+    """First mismatch between two traces as a message, or None."""
+    for field, e, g in zip(('obs', 'rewards', 'dones'), expected, got):
+        if e.shape != g.shape:
+            return f'{field} shape {g.shape} != golden {e.shape}'
+        # Backends with float32 observations are compared at their own precision
+        if field == 'obs' and g.dtype != e.dtype:
+            e = e.astype(g.dtype)
+        bad = ~np.isclose(g, e, rtol=0.0, atol=atol) if atol > 0 else g != e
+        if bad.any():
+            step = int(np.argwhere(bad)[0][0])
+            return f'{field} differs at step {step}: {g[step]} != golden {e[step]}'
+    return None
+
+
+def check(path: str = GOLDEN_PATH, atol: float = 0.0, timed_gate: bool = False, max_slowdown: float = 0.2,
+          backends=None) -> dict:
+    """Replay the golden seeds through every backend; returns a report with 'ok' and any failures."""
+    with np.load(path, allow_pickle=False) as data:
+        seeds = [int(s) for s in data['seeds']]
+        steps = int(data['steps'])
+        throughput = json.loads(str(data['throughput']))
+        golden = {key: data[key] for key in data.files if '/' in key}
+
+    failures, rates = [], {}
+    for family, family_backends in FAMILIES.items():
+        for name, fn in family_backends.items():
+            if backends and name not in backends:
+                continue
+            traces, rates[name] = timed(fn, seeds, steps)
+            for i, (seed, got) in enumerate(zip(seeds, traces)):
+                expected = tuple(golden[f'{family}/{i}/{field}'] for field in ('obs', 'rewards', 'dones'))
+                # Observations from GameEnv-based backends are float32
+                if name in ('gameenv', 'sync', 'async'):
+                    got = (got[0].astype(np.float32),) + got[1:]
+                problem = _compare(expected, got, atol)
+                if problem:
+                    failures.append(f'{name} seed {seed}: {problem}')
+                    break
+            if timed_gate and name in throughput:
+                floor = throughput[name] * (1.0 - max_slowdown)
+                if rates[name] < floor:
+                    failures.append(f'{name}: {rates[name]:.0f} steps/s is below {floor:.0f} '
+                                    f'(recorded {throughput[name]:.0f}, max slowdown {max_slowdown:.0%})')
+    return {'ok': not failures, 'failures': failures, 'steps_per_second': rates, 'recorded_steps_per_second': throughput}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Golden-trace determinism and throughput checks.')
+    parser.add_argument('command', choices=('record', 'check'))
+    parser.add_argument('--path', default=GOLDEN_PATH)
+    parser.add_argument('--atol', type=float, default=0.0, help='tolerance (default: bit-for-bit)')
+    parser.add_argument('--timed', action='store_true', help='also gate on throughput')
+    parser.add_argument('--max-slowdown', type=float, default=0.2, help='allowed throughput drop with --timed')
+    parser.add_argument('--backend', action='append', help='check only these backends')
+    args = parser.parse_args(argv)
+
+    if args.command == 'record':
+        print(json.dumps({'path': args.path, 'steps_per_second': record(args.path)}, indent=2))
+        return 0
+    report = check(args.path, args.atol, args.timed, args.max_slowdown, args.backend)
+    print(json.dumps(report, indent=2))
+    return 0 if report['ok'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,5 +1,5 @@
 import React, { useState, useEffect, useRef } from 'react';
-import { Play, Pause, RotateCcw, Brain, Zap } from 'lucide-react';
+import { Play, Pause, RotateCcw, Brain, Zap, Film, FastForward } from 'lucide-react';
 
 const IntelligentNPC = () => {
   const canvasRef = useRef(null);
@@ -13,6 +13,9 @@ const IntelligentNPC = () => {
   
   const gameRef = useRef(null);
   const animationRef = useRef(null);
+  const [isReplaying, setIsReplaying] = useState(false);
+  const [replaySpeed, setReplaySpeed] = useState(1);
+  const replayRef = useRef({ active: false, speed: 1 });
 
   // Simple Neural Network
   class NeuralNetwork {
@@ -38,12 +41,20 @@ const IntelligentNPC = () => {
       return x > 0 ? 1 : 0;
     }
 
+    setWeights({ w1, b1, w2, b2 }) {
+      // Layout written by distill.py: w1[input][hidden], w2[hidden][output]
+      this.w1 = w1;
+      this.b1 = b1;
+      this.w2 = w2;
+      this.b2 = b2;
+    }
+
     forward(input) {
       // Hidden layer
-      this.hidden = input.map((val, i) => {
-        let sum = this.b1[i % this.b1.length];
+      this.hidden = this.b1.map((bias, i) => {
+        let sum = bias;
         for (let j = 0; j < input.length; j++) {
-          sum += input[j] * this.w1[j][i % this.w1[0].length];
+          sum += input[j] * this.w1[j][i];
         }
         return this.relu(sum);
       });
@@ -98,6 +109,7 @@ const IntelligentNPC = () => {
       this.nn = new NeuralNetwork(8, 16, 4); // 8 inputs, 16 hidden, 4 actions
       this.rewardHistory = [];
       this.epsilon = 0.3; // Exploration rate
+      this.frozen = false; // Distilled weights loaded: act greedily, no online updates
     }
 
     reset() {
@@ -338,7 +350,9 @@ const IntelligentNPC = () => {
         const reward = game.step(action);
         
         // Train network
-        game.nn.train(state, action, reward);
+        if (!game.frozen) {
+          game.nn.train(state, action, reward);
+        }
         
         // Draw
         game.draw(ctx);
@@ -393,6 +407,88 @@ const IntelligentNPC = () => {
     setIsPaused(!isPaused);
   };
 
+  const handleLoadStudent = async () => {
+    try {
+      const res = await window.pywebview.api.get_student_weights();
+      if (!res.ok) {
+        alert('No distilled weights: ' + res.error);
+        return;
+      }
+      if (!gameRef.current) {
+        gameRef.current = new Game();
+      }
+      gameRef.current.nn.setWeights(res.weights);
+      gameRef.current.epsilon = 0;
+      gameRef.current.frozen = true;
+    } catch (e) {
+      console.error('load student error', e);
+      alert('Failed to load distilled weights. Are you running in the desktop app?');
+    }
+  };
+
+  // Replay the newest recording from recordings/ by drawing its frames with Game.draw
+  const playRecording = async (total) => {
+    const ctx = canvasRef.current.getContext('2d');
+    if (!gameRef.current) {
+      gameRef.current = new Game();
+    }
+    const game = gameRef.current;
+    const fetchFrames = (start) =>
+      window.pywebview.api.get_recording_frames(start, 60, replayRef.current.speed);
+
+    let next = 0;
+    let pending = fetchFrames(next);
+    while (replayRef.current.active && next < total) {
+      const res = await pending;
+      if (!res.ok || res.frames.length === 0) break;
+      next += res.frames.length * res.stride;
+      // Fetch the next block while this one is on screen
+      pending = fetchFrames(next);
+      for (const frame of res.frames) {
+        if (!replayRef.current.active) break;
+        Object.assign(game.player, frame.player);
+        Object.assign(game.npc, frame.npc);
+        game.projectiles = frame.projectiles;
+        game.draw(ctx);
+        await new Promise(resolve => requestAnimationFrame(resolve));
+      }
+    }
+    replayRef.current.active = false;
+    setIsReplaying(false);
+  };
+
+  const handleReplay = async () => {
+    if (replayRef.current.active) {
+      replayRef.current.active = false;
+      return;
+    }
+    try {
+      const list = await window.pywebview.api.list_recordings();
+      if (!list.ok || list.recordings.length === 0) {
+        alert('No recordings yet. Train with recording enabled (train.py --record).');
+        return;
+      }
+      const opened = await window.pywebview.api.open_recording(list.recordings[0]);
+      if (!opened.ok) {
+        alert('Could not open recording: ' + opened.error);
+        return;
+      }
+      setIsTraining(false);
+      replayRef.current.active = true;
+      setIsReplaying(true);
+      playRecording(opened.frames);
+    } catch (e) {
+      console.error('replay error', e);
+      alert('Replay needs the desktop app.');
+    }
+  };
+
+  const handleReplaySpeed = () => {
+    const speed = replaySpeed >= 16 ? 1 : replaySpeed * 4;
+    replayRef.current.speed = speed;
+    setReplaySpeed(speed);
+  };
+
   const handleReset = () => {
     setIsTraining(false);
     setIsPaused(false);
@@ -470,6 +566,27 @@ const IntelligentNPC = () => {
           <RotateCcw size={20} />
           Reset
         </button>
+        <button
+          onClick={handleLoadStudent}
+          className="flex-1 bg-purple-600 hover:bg-purple-700 text-white py-3 px-6 rounded-lg font-semibold flex items-center justify-center gap-2 transition"
+        >
+          <Brain size={20} />
+          Load Distilled
+        </button>
+        <button
+          onClick={handleReplay}
+          className="flex-1 bg-blue-600 hover:bg-blue-700 text-white py-3 px-6 rounded-lg font-semibold flex items-center justify-center gap-2 transition"
+        >
+          <Film size={20} />
+          {isReplaying ? 'Stop Replay' : 'Replay'}
+        </button>
+        <button
+          onClick={handleReplaySpeed}
+          className="bg-slate-600 hover:bg-slate-500 text-white py-3 px-4 rounded-lg font-semibold flex items-center justify-center gap-2 transition"
+        >
+          <FastForward size={20} />
+          {replaySpeed}x
+        </button>
       </div>
 
       <div className="mt-6 bg-slate-700 p-4 rounded-lg">
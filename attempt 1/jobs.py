@@ -0,0 +1,151 @@
+"""
+Background jobs for slow `JSApi` calls.
+
+pywebview runs bridge calls on its own threads and the page waits for each
+reply, so disk and torch work done inside a call blocks the UI. A
+`JobManager` runs such work on a small thread pool instead: `submit` returns
+a job id straight away, completion is pushed to the page as
+`{'type': 'job_finished', ...}`, and `get` serves polling clients.
+
+Jobs that share a `key` (e.g. one session's model file) run in submission
+order, so a save followed by a load never swap. A keyed job waits in its
+key's queue, not on a worker thread, and is handed to the pool when the job
+before it finishes, so one busy session cannot stall the others. `cancel`
+drops a job that has not started yet; a running job cannot be interrupted,
+so it runs to completion and reports its real outcome.
+"""
+
+import itertools
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Job:
+    def __init__(self, job_id: int, kind: str, key, fn, args, kwargs):
+        self.id = job_id
+        self.kind = kind
+        self.key = key
+        self.status = 'queued'
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.done = threading.Event()
+        self._call = (fn, args, kwargs)
+
+    def to_dict(self) -> dict:
+        return {
+            'job': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'result': self.result,
+            'error': self.error,
+            'submitted': self.submitted,
+            'started': self.started,
+            'finished': self.finished,
+        }
+
+
+class JobManager:
+    def __init__(self, push, workers: int = 2, keep: int = 256):
+        self.push = push
+        self.keep = keep
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='jsapi-job')
+        self._ids = itertools.count(1)
+        self._jobs = OrderedDict()
+        # Per key: jobs waiting behind the one that is queued on the pool or running
+        self._waiting = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, fn, *args, key=None, **kwargs) -> int:
+        """Queue `fn(*args, **kwargs)` and return its job id without waiting."""
+        with self._lock:
+            job = Job(next(self._ids), kind, key, fn, args, kwargs)
+            self._jobs[job.id] = job
+            # Forget old finished jobs so a long-running app does not keep every result
+            while len(self._jobs) > self.keep:
+                oldest = next(iter(self._jobs.values()))
+                if oldest.finished is None:
+                    break
+                self._jobs.popitem(last=False)
+            if key is not None and key in self._waiting:
+                self._waiting[key].append(job)
+                return job.id
+            if key is not None:
+                self._waiting[key] = deque()
+            self._pool.submit(self._run, job)
+        return job.id
+
+    def _run(self, job: Job):
+        try:
+            with self._lock:
+                if job.finished is not None:
+                    return
+                job.status, job.started = 'running', time.time()
+            fn, args, kwargs = job._call
+            try:
+                result = fn(*args, **kwargs)
+                if isinstance(result, dict) and result.get('ok') is False:
+                    job.status, job.result, job.error = 'failed', result, result.get('error')
+                else:
+                    job.status, job.result = 'done', result
+            except Exception as e:
+                job.status, job.error = 'failed', str(e)
+            job.finished = time.time()
+            job.done.set()
+            self.push({'type': 'job_finished', **job.to_dict()})
+        finally:
+            self._next(job.key)
+
+    def _next(self, key):
+        """Hand the next job waiting on `key` to the pool (cancelled ones are skipped there)."""
+        if key is None:
+            return
+        with self._lock:
+            waiting = self._waiting.get(key)
+            if waiting:
+                self._pool.submit(self._run, waiting.popleft())
+            elif waiting is not None:
+                self._waiting.pop(key)
+
+    def get(self, job_id: int) -> dict:
+        job = self._jobs.get(int(job_id))
+        if job is None:
+            raise KeyError(f'no such job: {job_id}')
+        return job.to_dict()
+
+    def list(self) -> list:
+        with self._lock:
+            return [job.to_dict() for job in self._jobs.values()]
+
+    def cancel(self, job_id: int) -> dict:
+        """Cancel a queued job. Running and finished jobs are left alone; the returned status says which."""
+        job = self._jobs.get(int(job_id))
+        if job is None:
+            raise KeyError(f'no such job: {job_id}')
+        with self._lock:
+            queued = job.status == 'queued' and job.finished is None
+            if queued:
+                job.status, job.finished = 'cancelled', time.time()
+                job.done.set()
+        if queued:
+            self.push({'type': 'job_finished', **job.to_dict()})
+        return job.to_dict()
+
+    def wait(self, job_id: int, timeout: float = None) -> dict:
+        """Block until a job finishes (headless callers and tests)."""
+        job = self._jobs[int(job_id)]
+        job.done.wait(timeout)
+        return job.to_dict()
+
+    def shutdown(self):
+        # Jobs still waiting behind a key are dropped; the pool accepts no new work once shut
+        with self._lock:
+            waiting = [job for queue in self._waiting.values() for job in queue]
+            self._waiting.clear()
+        for job in waiting:
+            self.cancel(job.id)
+        self._pool.shutdown(wait=True)
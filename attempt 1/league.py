@@ -0,0 +1,315 @@
+"""
+Self-play league for the combat `Game`.
+
+A learner `PolicyNet` plays the NPC. Frozen past checkpoints of the same
+policy drive the player: they see `Game.get_player_state()` and act through
+`Game.step(action, player_action)`, the same action set as the NPC. Each
+generation:
+
+1. The learner trains with REINFORCE on batches of games played in
+   lockstep. Every game gets an opponent from the pool, harder ones more
+   often. Per step there is one forward pass for the learner and one per
+   distinct opponent.
+2. The new weights are frozen into the pool and rated. Matches against
+   every pool member (and the scripted player, a fixed anchor at 1000 Elo)
+   run across a process pool. Each pairing plays both sides on the same
+   seeds, because the two sides are not symmetric (speed, start position).
+3. When the pool is full, the lowest-rated member is dropped (never the
+   newest).
+
+Ratings, the pool checkpoints and the final learner go to `--out`.
+
+    python league.py --generations 20 --episodes 256 --games 32 --pool 8
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import torch
+import torch.optim as optim
+
+from app import Game, PolicyNet
+from evaluate import MAX_STEPS, policy_from_state_dict
+from resources import available_cores, pinned_worker_init
+from returns import discounted_returns
+
+
+SCRIPTED = 'scripted'
+
+
+class EloRatings:
+    """Elo ratings; `k` is the update per game, and `fixed` members (anchors) never move."""
+    def __init__(self, k: float = 8.0, initial: float = 1000.0, fixed=()):
+        self.k = k
+        self.initial = initial
+        self.fixed = set(fixed)
+        self.ratings = {}
+
+    def __getitem__(self, member: str) -> float:
+        return self.ratings.setdefault(member, self.initial)
+
+    def expected(self, a: str, b: str) -> float:
+        """Expected score of `a` against `b` per game."""
+        return 1.0 / (1.0 + 10.0 ** ((self[b] - self[a]) / 400.0))
+
+    def update(self, a: str, b: str, score: float, games: int):
+        """`score` is a's points (win 1, draw 0.5) over `games` games against b."""
+        delta = self.k * (score - games * self.expected(a, b))
+        if a not in self.fixed:
+            self.ratings[a] = self[a] + delta
+        if b not in self.fixed:
+            self.ratings[b] = self[b] - delta
+
+    def remove(self, member: str):
+        self.ratings.pop(member, None)
+
+
+def _sample(logits: torch.Tensor, u: np.ndarray) -> np.ndarray:
+    """Inverse-CDF sampling with one uniform draw per row."""
+    cdf = torch.softmax(logits, dim=-1).cumsum(dim=-1).numpy()
+    return np.minimum((cdf < u[:, None] * cdf[:, -1:]).sum(axis=1), cdf.shape[1] - 1)
+
+
+def play_games(npc, player, seeds, max_steps: int = MAX_STEPS):
+    """Play one game per seed in lockstep; `player=None` uses the scripted player.
+
+    Both sides sample from their policies (with a per-seed RNG), one batched
+    forward pass per side and step. Returns the winners ('npc', 'player' or 'timeout').
+    """
+    games = [Game(seed=s) for s in seeds]
+    rngs = [np.random.default_rng(s) for s in seeds]
+    active = list(range(len(games)))
+    with torch.no_grad():
+        for _ in range(max_steps):
+            if not active:
+                break
+            # Draws come from each game's own RNG, so a seed's result does not depend on the batch
+            u = np.array([rngs[i].random(2) for i in active])
+            npc_actions = _sample(npc(torch.tensor([games[i].get_state() for i in active])), u[:, 0])
+            player_actions = [None] * len(active)
+            if player is not None:
+                obs = torch.tensor([games[i].get_player_state() for i in active])
+                player_actions = _sample(player(obs), u[:, 1])
+            still = []
+            for i, a, pa in zip(active, npc_actions, player_actions):
+                _, done, _ = games[i].step(int(a), None if pa is None else int(pa))
+                if not done:
+                    still.append(i)
+            active = still
+    return [g.winner or 'timeout' for g in games]
+
+
+def _match(a_state: dict, b_state, seeds, max_steps: int) -> dict:
+    """a against b on both sides (b_state None: the scripted player, which only plays the player side)."""
+    a = policy_from_state_dict(a_state)
+    b = policy_from_state_dict(b_state) if b_state is not None else None
+    as_npc = play_games(a, b, seeds, max_steps)
+    as_player = play_games(b, a, seeds, max_steps) if b is not None else []
+    wins = as_npc.count('npc') + as_player.count('player')
+    losses = as_npc.count('player') + as_player.count('npc')
+    games = len(as_npc) + len(as_player)
+    return {'wins': wins, 'losses': losses, 'draws': games - wins - losses, 'games': games,
+            'score': wins + 0.5 * (games - wins - losses)}
+
+
+class League:
+    def __init__(self, out_dir: str, pool_size: int = 8, workers: int = None, games: int = 16,
+                 max_steps: int = MAX_STEPS, k: float = 8.0, seed: int = 0):
+        self.out_dir = os.path.abspath(out_dir)
+        os.makedirs(os.path.join(self.out_dir, 'pool'), exist_ok=True)
+        self.pool_size = pool_size
+        self.games = games
+        self.max_steps = max_steps
+        self.rng = np.random.default_rng(seed)
+        self.members = OrderedDict()     # id -> frozen CPU state dict, oldest first
+        self.ratings = EloRatings(k, fixed=(SCRIPTED,))
+        self.history = []
+        self._models = {}
+        self._match_seed = seed * 1_000_003
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=pinned_worker_init,
+                                         initargs=(available_cores(), mp.Value('i', 0)))
+
+    def close(self):
+        self._pool.shutdown()
+
+    def add(self, member: str, state: dict, rating: float = None):
+        self.members[member] = {k: v.detach().cpu().clone() for k, v in state.items()}
+        if rating is not None:
+            self.ratings.ratings[member] = rating
+        torch.save(self.members[member], os.path.join(self.out_dir, 'pool', f'{member}.pth'))
+
+    def model(self, member: str) -> PolicyNet:
+        if member not in self._models:
+            self._models[member] = policy_from_state_dict(self.members[member])
+        return self._models[member]
+
+    def sample_opponents(self, count: int, learner: str) -> list:
+        """Pool members for `count` games, weighted toward those that beat `learner` more often."""
+        ids = list(self.members)
+        weights = np.array([1.0 - self.ratings.expected(learner, m) for m in ids]) + 0.05
+        return [ids[i] for i in self.rng.choice(len(ids), size=count, p=weights / weights.sum())]
+
+    def rate(self, member: str) -> dict:
+        """Play `member` against every other pool member and the scripted player in parallel; update Elo."""
+        opponents = [m for m in self.members if m != member] + [SCRIPTED]
+        seeds = list(range(self._match_seed, self._match_seed + self.games))
+        self._match_seed += self.games
+        futures = {opp: self._pool.submit(_match, self.members[member], self.members.get(opp), seeds,
+                                          self.max_steps) for opp in opponents}
+        results = {}
+        for opp, future in futures.items():
+            r = future.result()
+            self.ratings.update(member, opp, r['score'], r['games'])
+            results[opp] = r
+        self.history.append({'member': member, 'rating': self.ratings[member], 'results': results})
+        return results
+
+    def prune(self, keep: str):
+        while len(self.members) > self.pool_size:
+            worst = min((m for m in self.members if m != keep), key=lambda m: self.ratings[m])
+            del self.members[worst]
+            self._models.pop(worst, None)
+            self.ratings.remove(worst)
+            os.remove(os.path.join(self.out_dir, 'pool', f'{worst}.pth'))
+
+    def table(self) -> list:
+        rated = list(self.members) + [SCRIPTED]
+        return sorted(({'member': m, 'rating': round(self.ratings[m], 1)} for m in rated),
+                      key=lambda r: r['rating'], reverse=True)
+
+    def save(self) -> dict:
+        report = {'ratings': self.table(), 'history': self.history}
+        with open(os.path.join(self.out_dir, 'league.json'), 'w') as f:
+            json.dump(report, f, indent=2)
+        return report
+
+
+class SelfPlayTrainer:
+    """REINFORCE for the learner against opponents sampled from the league pool.
+
+    The learner plays the NPC in half of the games and the player in the
+    rest, with `Game.player_reward` as its reward on the player side, so
+    its weights stay useful on both sides of a rated match.
+    """
+    def __init__(self, model: PolicyNet, optimizer, league: League, games: int = 32, gamma: float = 0.99,
+                 max_steps: int = MAX_STEPS, seed: int = 0):
+        self.model = model
+        self.optimizer = optimizer
+        self.league = league
+        self.games = games
+        self.gamma = gamma
+        self.max_steps = max_steps
+        self.rng = np.random.default_rng(seed)
+        self.name = 'learner'
+
+    def train_batch(self) -> dict:
+        opponents = self.league.sample_opponents(self.games, self.name)
+        games = [Game(seed=int(s)) for s in self.rng.integers(2 ** 31, size=self.games)]
+        as_npc = self.rng.random(self.games) < 0.5
+        groups = {}
+        for i, opp in enumerate(opponents):
+            groups.setdefault(opp, []).append(i)
+
+        log_probs, rewards, acting = [], [], []
+        active = np.ones(self.games, dtype=bool)
+        for _ in range(self.max_steps):
+            if not active.any():
+                break
+            obs = [g.get_state() if npc else g.get_player_state() for g, npc in zip(games, as_npc)]
+            dist = torch.distributions.Categorical(logits=self.model(torch.tensor(obs)))
+            actions = dist.sample()
+            opponent_actions = np.zeros(self.games, dtype=np.int64)
+            with torch.no_grad():
+                for opp, idx in groups.items():
+                    obs = torch.tensor([games[i].get_player_state() if as_npc[i] else games[i].get_state()
+                                        for i in idx])
+                    opponent_actions[idx] = _sample(self.league.model(opp)(obs), self.rng.random(len(idx)))
+            step_rewards = np.zeros(self.games)
+            acting.append(active.copy())
+            for i in np.flatnonzero(active):
+                game, a, b = games[i], int(actions[i]), int(opponent_actions[i])
+                if as_npc[i]:
+                    step_rewards[i], done, _ = game.step(a, b)
+                else:
+                    _, done, _ = game.step(b, a)
+                    step_rewards[i] = game.player_reward
+                active[i] = not done
+            log_probs.append(dist.log_prob(actions))
+            rewards.append(step_rewards)
+
+        # Finished games only add zero rewards after their end, so plain per-column returns are exact
+        returns = torch.tensor(discounted_returns(np.stack(rewards), self.gamma), dtype=torch.float32)
+        mask = torch.tensor(np.stack(acting), dtype=torch.float32)
+        count = mask.sum()
+        mean = (returns * mask).sum() / count
+        std = torch.sqrt((((returns - mean) * mask) ** 2).sum() / count)
+        loss = -(torch.stack(log_probs) * (returns - mean) / (std + 1e-8) * mask).sum() / self.games
+        self.optimizer.zero_grad()
+        loss.backward()
+        self.optimizer.step()
+
+        won = sum(g.winner == ('npc' if npc else 'player') for g, npc in zip(games, as_npc))
+        lost = sum(g.winner == ('player' if npc else 'npc') for g, npc in zip(games, as_npc))
+        return {'win_rate': won / self.games, 'loss_rate': lost / self.games,
+                'mean_return': float(np.stack(rewards).sum(axis=0).mean())}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Self-play league training with Elo ratings.')
+    parser.add_argument('--generations', type=int, default=20)
+    parser.add_argument('--episodes', type=int, default=256, help='learner episodes per generation')
+    parser.add_argument('--batch', type=int, default=32, help='games played in lockstep per update')
+    parser.add_argument('--games', type=int, default=16, help='games per side for each rating match')
+    parser.add_argument('--pool', type=int, default=8, help='frozen checkpoints kept in the pool')
+    parser.add_argument('--hidden-size', type=int, default=16)
+    parser.add_argument('--lr', type=float, default=1e-3)
+    parser.add_argument('--gamma', type=float, default=0.99)
+    parser.add_argument('--max-steps', type=int, default=MAX_STEPS)
+    parser.add_argument('--workers', type=int, default=None, help='match processes (default: one per core)')
+    parser.add_argument('--load', help='start the learner from this checkpoint')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default='league/latest')
+    args = parser.parse_args(argv)
+
+    torch.manual_seed(args.seed)
+    model = policy_from_state_dict(torch.load(args.load, map_location='cpu')) if args.load \
+        else PolicyNet(8, args.hidden_size, 4)
+    model.train()
+    optimizer = optim.Adam(model.parameters(), lr=args.lr)
+    league = League(args.out, args.pool, args.workers, args.games, args.max_steps, seed=args.seed)
+    trainer = SelfPlayTrainer(model, optimizer, league, args.batch, args.gamma, args.max_steps, args.seed)
+    try:
+        league.add('gen000', model.state_dict())
+        league.rate('gen000')
+        for gen in range(1, args.generations + 1):
+            start = time.time()
+            stats = [trainer.train_batch() for _ in range(max(1, args.episodes // args.batch))]
+            member = f'gen{gen:03d}'
+            league.add(member, model.state_dict(), rating=league.ratings[trainer.name])
+            rate_start = time.time()
+            league.rate(member)
+            league.prune(keep=member)
+            # The learner is rated as its latest snapshot when sampling opponents
+            league.ratings.ratings[trainer.name] = league.ratings[member]
+            print(f"generation {gen}: elo {league.ratings[member]:.0f} | train win rate "
+                  f"{np.mean([s['win_rate'] for s in stats]):.2f} | train {rate_start - start:.1f}s "
+                  f"| rating {time.time() - rate_start:.1f}s", file=sys.stderr)
+        torch.save(model.state_dict(), os.path.join(league.out_dir, 'learner.pth'))
+        report = league.save()
+    finally:
+        league.close()
+    print(json.dumps({'ratings': report['ratings'], 'learner': os.path.join(league.out_dir, 'learner.pth')},
+                     indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
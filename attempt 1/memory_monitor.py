@@ -0,0 +1,188 @@
+"""
+Memory monitoring for long training runs.
+
+`MemoryMonitor` samples the process in a background thread every
+`interval` seconds and records:
+
+- resident set size (psutil when installed, else /proc/self/statm, else the
+  peak from `resource`);
+- live torch tensors found by the garbage collector: count, distinct storage
+  bytes, and how many still hold an autograd graph (`grad_fn`), which is
+  what a leaked `log_probs` list looks like;
+- with `trace_python=True`, `tracemalloc` totals and the top allocation
+  sites by growth since tracing started. Tracing slows every Python
+  allocation, so it is off by default.
+
+`growth()` looks at the last `window` samples, skipping the first `warmup`
+while models and allocator pools are still filling up. It flags RSS or
+tensor bytes that never went down and grew by more than `min_growth` bytes,
+and reports the RSS slope per hour.
+
+    monitor = MemoryMonitor(interval=60).start()
+    ...
+    report = monitor.report()      # latest sample, history, growth verdict
+"""
+
+import gc
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+import numpy as np
+import torch
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def rss_bytes() -> int:
+    """Current resident set size of this process (peak RSS where nothing better exists)."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    if resource is not None:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return 0
+
+
+def tensor_stats() -> dict:
+    """Live tensors reachable through the garbage collector."""
+    count = with_graph = 0
+    storages = {}
+    for obj in gc.get_objects():
+        try:
+            # type() rather than isinstance: some lazy modules warn when their __class__ is read
+            if not issubclass(type(obj), torch.Tensor):
+                continue
+            count += 1
+            if obj.grad_fn is not None:
+                with_graph += 1
+            storage = obj.untyped_storage()
+            storages[storage.data_ptr()] = storage.nbytes()
+        except Exception:
+            continue
+    return {'tensors': count, 'tensor_bytes': int(sum(storages.values())), 'tensors_with_graph': with_graph}
+
+
+class MemoryMonitor:
+    def __init__(self, interval: float = 60.0, trace_python: bool = False, top: int = 10, history: int = 1440,
+                 window: int = 10, warmup: int = 3, min_growth: int = 16 << 20):
+        self.interval = interval
+        self.trace_python = trace_python
+        self.top = top
+        self.window = window
+        self.warmup = warmup
+        self.min_growth = min_growth
+        self.samples = deque(maxlen=history)
+        self._baseline = None
+        self._started_tracing = False
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> 'MemoryMonitor':
+        if self.running:
+            return self
+        if self.trace_python and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        if self.trace_python:
+            self._baseline = tracemalloc.take_snapshot()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='memory-monitor', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+            self._baseline = None
+
+    def _loop(self):
+        while True:
+            self.sample()
+            if self._stop.wait(self.interval):
+                break
+
+    def _top_allocators(self) -> list:
+        if self._baseline is None or not tracemalloc.is_tracing():
+            return []
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, __file__), tracemalloc.Filter(False, tracemalloc.__file__)])
+        stats = snapshot.compare_to(self._baseline, 'lineno')
+        return [{'where': f'{s.traceback[0].filename}:{s.traceback[0].lineno}', 'size': s.size,
+                 'size_diff': s.size_diff, 'count': s.count, 'count_diff': s.count_diff}
+                for s in stats[:self.top]]
+
+    def sample(self) -> dict:
+        """Take one sample now (the background thread calls this every `interval` seconds)."""
+        entry = {'time': time.time(), 'rss_bytes': rss_bytes(), **tensor_stats()}
+        if tracemalloc.is_tracing():
+            entry['python_bytes'], entry['python_peak_bytes'] = tracemalloc.get_traced_memory()
+            entry['top_allocators'] = self._top_allocators()
+        with self._lock:
+            self.samples.append(entry)
+        return entry
+
+    @staticmethod
+    def _never_decreased(values: np.ndarray) -> bool:
+        return bool(len(values) > 1 and (np.diff(values) >= 0).all())
+
+    def growth(self) -> dict:
+        """Growth verdict over the last `window` samples."""
+        with self._lock:
+            recent = list(self.samples)[self.warmup:][-self.window:]
+        if len(recent) < self.window:
+            return {'samples': len(recent), 'suspect': False}
+        t = np.array([s['time'] for s in recent])
+        rss = np.array([s['rss_bytes'] for s in recent], dtype=np.float64)
+        tensors = np.array([s['tensor_bytes'] for s in recent], dtype=np.float64)
+        slope = np.polyfit(t - t[0], rss, 1)[0] * 3600.0 if t[-1] > t[0] else 0.0
+        rss_growing = self._never_decreased(rss) and bool(rss[-1] - rss[0] > self.min_growth)
+        tensors_growing = self._never_decreased(tensors) and bool(tensors[-1] - tensors[0] > self.min_growth)
+        return {
+            'samples': len(recent),
+            'rss_growth_bytes': int(rss[-1] - rss[0]),
+            'rss_slope_bytes_per_hour': float(slope),
+            'rss_monotonic': rss_growing,
+            'tensor_growth_bytes': int(tensors[-1] - tensors[0]),
+            'tensors_monotonic': tensors_growing,
+            'suspect': rss_growing or tensors_growing,
+        }
+
+    def report(self, max_points: int = 200) -> dict:
+        """Latest sample, a downsampled history (without allocator tables) and the growth verdict."""
+        with self._lock:
+            samples = list(self.samples)
+        step = max(1, -(-len(samples) // max_points))
+        history = [{k: v for k, v in s.items() if k != 'top_allocators'} for s in samples[::step]]
+        return {
+            'running': self.running,
+            'interval': self.interval,
+            'trace_python': tracemalloc.is_tracing(),
+            'latest': samples[-1] if samples else None,
+            'history': history,
+            'growth': self.growth(),
+        }
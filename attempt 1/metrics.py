@@ -0,0 +1,169 @@
+"""
+Training metrics: O(1) rolling statistics and a persistent multi-resolution series.
+
+`RollingStats` keeps the last N values in a fixed ring buffer with running sums.
+`MetricsStore` appends every episode reward to disk and maintains downsampled
+series (mean/min/max per 100 and per 10k episodes by default). Each resolution
+is its own append-only file of fixed-size records, so the record for any
+bucket is found by offset and queries read only the rows they return.
+"""
+
+import math
+import os
+import threading
+
+import numpy as np
+
+
+class RollingStats:
+    """Mean/std over the most recent `window` values with O(1) updates."""
+    def __init__(self, window: int = 100):
+        self.window = window
+        self.values = np.zeros(window, dtype=np.float64)
+        self.count = 0
+        self.pos = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def push(self, value: float):
+        if self.count == self.window:
+            old = self.values[self.pos]
+            self.total -= old
+            self.total_sq -= old * old
+        else:
+            self.count += 1
+        self.values[self.pos] = value
+        self.total += value
+        self.total_sq += value * value
+        self.pos = (self.pos + 1) % self.window
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    @property
+    def std(self) -> float:
+        if not self.count:
+            return 0.0
+        m = self.mean
+        return math.sqrt(max(0.0, self.total_sq / self.count - m * m))
+
+
+RAW_DTYPE = np.dtype('<f4')
+AGG_DTYPE = np.dtype([('mean', '<f4'), ('min', '<f4'), ('max', '<f4')])
+
+
+class MetricsStore:
+    """Append-only episode reward series stored under `directory`.
+
+    `episode_reward.r1.bin` holds one float32 per episode; `episode_reward.r<N>.bin`
+    holds one (mean, min, max) record per completed bucket of N episodes.
+    Reopening a directory resumes where the previous run stopped.
+    """
+    def __init__(self, directory: str, resolutions=(100, 10000), name: str = 'episode_reward'):
+        self.directory = directory
+        self.resolutions = tuple(sorted(resolutions))
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+        self._raw_path = os.path.join(directory, f'{name}.r1.bin')
+        self._agg_paths = {r: os.path.join(directory, f'{name}.r{r}.bin') for r in self.resolutions}
+        self.count = 0
+        if os.path.exists(self._raw_path):
+            self.count = os.path.getsize(self._raw_path) // RAW_DTYPE.itemsize
+            with open(self._raw_path, 'r+b') as f:
+                f.truncate(self.count * RAW_DTYPE.itemsize)
+
+        # Rebuild each level's partially filled bucket from the raw tail and drop
+        # aggregate records that a crash may have left beyond the raw data.
+        self._partial = {}
+        for r in self.resolutions:
+            done = self.count // r
+            path = self._agg_paths[r]
+            if os.path.exists(path) and os.path.getsize(path) > done * AGG_DTYPE.itemsize:
+                with open(path, 'r+b') as f:
+                    f.truncate(done * AGG_DTYPE.itemsize)
+            tail = self._read(self._raw_path, RAW_DTYPE, done * r, self.count).astype(np.float64)
+            self._partial[r] = [float(tail.sum()), float(tail.min()) if len(tail) else math.inf,
+                                float(tail.max()) if len(tail) else -math.inf, len(tail)]
+
+        self._raw = open(self._raw_path, 'ab')
+        self._agg = {r: open(p, 'ab') for r, p in self._agg_paths.items()}
+
+    def append(self, value: float):
+        with self._lock:
+            value = float(value)
+            self._raw.write(np.array(value, dtype=RAW_DTYPE).tobytes())
+            self.count += 1
+            for r in self.resolutions:
+                acc = self._partial[r]
+                acc[0] += value
+                acc[1] = min(acc[1], value)
+                acc[2] = max(acc[2], value)
+                acc[3] += 1
+                if acc[3] == r:
+                    rec = np.array([(acc[0] / r, acc[1], acc[2])], dtype=AGG_DTYPE)
+                    self._agg[r].write(rec.tobytes())
+                    self._partial[r] = [0.0, math.inf, -math.inf, 0]
+
+    def flush(self):
+        with self._lock:
+            self._raw.flush()
+            for f in self._agg.values():
+                f.flush()
+
+    def close(self):
+        self.flush()
+        self._raw.close()
+        for f in self._agg.values():
+            f.close()
+
+    @staticmethod
+    def _read(path, dtype, start, end):
+        if end <= start or not os.path.exists(path):
+            return np.zeros(0, dtype=dtype)
+        with open(path, 'rb') as f:
+            f.seek(start * dtype.itemsize)
+            return np.fromfile(f, dtype=dtype, count=end - start)
+
+    def query(self, start: int = 0, end: int = None, max_points: int = 500) -> dict:
+        """Return at most `max_points` points covering episodes [start, end).
+
+        Picks the finest stored resolution that fits and rebins further if even
+        the coarsest one has too many buckets. Only complete buckets are returned.
+        """
+        self.flush()
+        end = self.count if end is None else min(end, self.count)
+        start = max(0, start)
+        max_points = max(1, int(max_points))
+        span = max(0, end - start)
+
+        res = 1
+        for r in (1,) + self.resolutions:
+            res = r
+            if math.ceil(span / r) <= max_points:
+                break
+
+        if res == 1:
+            raw = self._read(self._raw_path, RAW_DTYPE, start, end)
+            mean, lo, hi = raw, raw, raw
+        else:
+            rows = self._read(self._agg_paths[res], AGG_DTYPE, start // res, end // res)
+            mean, lo, hi = rows['mean'], rows['min'], rows['max']
+        first = start if res == 1 else (start // res) * res
+
+        group = max(1, math.ceil(len(mean) / max_points))
+        if group > 1:
+            n = (len(mean) // group) * group
+            mean = mean[:n].reshape(-1, group).mean(axis=1)
+            lo = lo[:n].reshape(-1, group).min(axis=1)
+            hi = hi[:n].reshape(-1, group).max(axis=1)
+        step = res * group
+        return {
+            'resolution': step,
+            'total_episodes': self.count,
+            'episode': [first + i * step for i in range(len(mean))],
+            'mean': mean.astype(float).tolist(),
+            'min': lo.astype(float).tolist(),
+            'max': hi.astype(float).tolist(),
+        }
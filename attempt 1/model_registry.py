@@ -0,0 +1,202 @@
+"""
+LRU registry of NPC policies, so many archetypes can share one process.
+
+Checkpoints are registered by name and identified by the SHA-256 of their
+contents, so names that point at identical weights share one loaded
+model. Registering only hashes the file; the model is built on first use
+and kept in an LRU cache bounded by `budget_bytes` (parameter bytes). Least
+recently used models are evicted once the budget is exceeded and are
+reloaded lazily from disk when needed again.
+
+`.pth` files load as an eval-mode `PolicyNet` (value heads are dropped);
+`.npz` files written by `export_policy.py` load as a NumPy `PolicyRuntime`.
+
+    registry = ModelRegistry(budget_bytes=64 << 20)
+    registry.register('sniper', 'checkpoints/sniper.pth')
+    registry.register('brute', 'checkpoints/brute_int8.npz')
+    actions = registry.act({'sniper': sniper_obs, 'brute': brute_obs})
+"""
+
+import hashlib
+import os
+import threading
+import zipfile
+from collections import OrderedDict
+
+import numpy as np
+import torch
+
+
+def content_hash(path: str) -> str:
+    """SHA-256 of a checkpoint's contents.
+
+    `torch.save` archives name their members after the file, so zip members
+    are hashed by their path inside the archive instead of the raw bytes.
+    """
+    h = hashlib.sha256()
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            members = sorted((info.filename.split('/', 1)[-1], info) for info in archive.infolist())
+            for name, info in members:
+                h.update(name.encode() + b'\0')
+                h.update(archive.read(info))
+        return h.hexdigest()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def model_nbytes(model) -> int:
+    if hasattr(model, 'nbytes'):
+        return int(model.nbytes)
+    return sum(p.numel() * p.element_size() for p in model.parameters())
+
+
+def load_policy_file(path: str):
+    """PolicyNet for a `.pth` checkpoint, PolicyRuntime for an exported `.npz`."""
+    if path.endswith('.npz'):
+        from npc_runtime import PolicyRuntime
+        return PolicyRuntime.load(path)
+    # Imported here: evaluate imports app, which imports this module
+    from evaluate import policy_from_state_dict
+    return policy_from_state_dict(torch.load(path, map_location='cpu'))
+
+
+class ModelRegistry:
+    def __init__(self, budget_bytes: int = 64 << 20, loader=load_policy_file):
+        self.budget_bytes = budget_bytes
+        self.loader = loader
+        self.names = {}       # name -> content hash
+        self.paths = {}       # content hash -> path
+        self._cache = OrderedDict()   # content hash -> (model, nbytes), least recently used first
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self.hits = self.misses = self.evictions = 0
+
+    def register(self, name: str, path: str) -> str:
+        """Map `name` to the checkpoint at `path`; returns its content hash. Nothing is loaded yet."""
+        path = os.path.abspath(path)
+        digest = content_hash(path)
+        with self._lock:
+            old = self.names.get(name)
+            self.names[name] = digest
+            self.paths.setdefault(digest, path)
+            if old is not None and old != digest:
+                self._forget(old)
+        return digest
+
+    def unregister(self, name: str):
+        with self._lock:
+            digest = self.names.pop(name)
+            self._forget(digest)
+
+    def _forget(self, digest: str):
+        """Drop a hash nobody refers to any more."""
+        if digest in self.names.values():
+            return
+        self.paths.pop(digest, None)
+        entry = self._cache.pop(digest, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def resolve(self, key: str) -> str:
+        """Content hash for a registered name or a registered hash."""
+        if key in self.names:
+            return self.names[key]
+        if key in self.paths:
+            return key
+        raise KeyError(f'no such model: {key}')
+
+    def get(self, key: str):
+        """Model for a name or content hash, loading it (and evicting others) if it is not cached."""
+        with self._lock:
+            digest = self.resolve(key)
+            entry = self._cache.get(digest)
+            if entry is not None:
+                self._cache.move_to_end(digest)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            path = self.paths[digest]
+        # Load outside the lock so cached lookups from other threads are not held up by disk
+        model = self.loader(path)
+        nbytes = model_nbytes(model)
+        with self._lock:
+            entry = self._cache.get(digest)
+            if entry is not None:
+                self._cache.move_to_end(digest)
+                return entry[0]
+            self._cache[digest] = (model, nbytes)
+            self._bytes += nbytes
+            self._evict(keep=digest)
+        return model
+
+    def _evict(self, keep: str):
+        while self._bytes > self.budget_bytes and len(self._cache) > 1:
+            digest = next(iter(self._cache))
+            if digest == keep:
+                break
+            _, nbytes = self._cache.pop(digest)
+            self._bytes -= nbytes
+            self.evictions += 1
+
+    def set_budget(self, budget_bytes: int):
+        with self._lock:
+            self.budget_bytes = budget_bytes
+            if self._cache:
+                self._evict(keep=next(reversed(self._cache)))
+
+    def peek(self, key: str):
+        """Model for a name or content hash if it is cached, else None; never touches disk."""
+        with self._lock:
+            digest = self.resolve(key)
+            entry = self._cache.get(digest)
+            if entry is None:
+                return None
+            self._cache.move_to_end(digest)
+            self.hits += 1
+            return entry[0]
+
+    def act(self, batches: dict, greedy: bool = True, rng: np.random.Generator = None, load: bool = True) -> dict:
+        """Actions for several archetypes: {name: observations [N, 8]} -> {name: actions [N]}.
+
+        Each archetype's NPCs get one batched forward pass of their own policy.
+        With `load=False` archetypes whose model is not cached are left out of
+        the result instead of being loaded inline.
+        """
+        rng = rng or np.random.default_rng()
+        out = {}
+        for name, obs in batches.items():
+            model = self.get(name) if load else self.peek(name)
+            if model is None:
+                continue
+            if hasattr(model, 'logits'):
+                out[name] = model.act(obs) if greedy else model.sample(obs, rng)
+                continue
+            x = torch.as_tensor(np.asarray(obs, dtype=np.float32))
+            with torch.no_grad():
+                logits = model(x if x.dim() > 1 else x[None])
+            if greedy:
+                out[name] = logits.argmax(dim=-1).numpy()
+            else:
+                out[name] = torch.distributions.Categorical(logits=logits).sample().numpy()
+        return out
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'names': len(self.names),
+                'unique': len(self.paths),
+                'cached': len(self._cache),
+                'bytes': self._bytes,
+                'budget_bytes': self.budget_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+    def list_models(self) -> list:
+        with self._lock:
+            return [{'name': name, 'hash': digest, 'path': self.paths[digest], 'cached': digest in self._cache}
+                    for name, digest in sorted(self.names.items())]
@@ -0,0 +1,114 @@
+"""
+Running observation normalization that folds into the policy weights.
+
+`RunningNormalizer` keeps a per-feature mean and variance of everything it
+has seen. Each `update` reduces a whole batch (one episode, one rollout, or
+`[T, N, 8]` from many arenas) to its moments and merges them with the
+parallel form of Welford's algorithm, so statistics from different
+environments or worker processes combine exactly with `merge`.
+
+Training sessions feed the policy `normalize(obs)` and save the statistics
+in checkpoints as `obs_norm.*` keys. `fold_into_state_dict` then rewrites
+the first layer(s) as `W / std` and `b - (W / std) @ mean`. The exported
+network takes raw `Game.get_state()` features, so inference pays nothing
+extra. Values are not clipped, which keeps the fold exact.
+
+    norm = RunningNormalizer(8)
+    norm.update(episode_states)             # [T, 8]
+    logits = model(torch.as_tensor(norm.normalize(state)))
+"""
+
+import numpy as np
+import torch
+
+
+PREFIX = 'obs_norm.'
+# First layers that see raw observations (policy, and the ActorCritic value head)
+INPUT_LAYERS = ('model.0', 'value.0')
+
+
+class RunningNormalizer:
+    def __init__(self, size: int, min_std: float = 0.1):
+        self.size = size
+        # Features that barely move during training (e.g. health before the first hit) would
+        # otherwise get huge scales and blow up once they do change at inference time.
+        self.min_std = min_std
+        self.mean = np.zeros(size)
+        self.var = np.ones(size)
+        self.count = 0.0
+
+    def merge_moments(self, mean, var, count: float):
+        """Combine stored moments with another set (Chan et al. parallel variance)."""
+        if count <= 0:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        m2 = self.var * self.count + var * count + delta ** 2 * self.count * count / total
+        self.mean = self.mean + delta * count / total
+        self.var = m2 / total
+        self.count = total
+
+    def update(self, batch):
+        """Add a batch of observations of any leading shape `[..., size]`."""
+        x = np.asarray(batch, dtype=np.float64).reshape(-1, self.size)
+        if len(x):
+            self.merge_moments(x.mean(axis=0), x.var(axis=0), len(x))
+
+    def merge(self, other: 'RunningNormalizer'):
+        self.merge_moments(other.mean, other.var, other.count)
+
+    @property
+    def std(self) -> np.ndarray:
+        return np.maximum(np.sqrt(self.var), self.min_std)
+
+    def normalize(self, obs) -> np.ndarray:
+        """Normalized float32 copy of `obs` (any leading shape)."""
+        return ((np.asarray(obs, dtype=np.float64) - self.mean) / self.std).astype(np.float32)
+
+    def state_dict(self) -> dict:
+        return {PREFIX + 'mean': torch.tensor(self.mean), PREFIX + 'var': torch.tensor(self.var),
+                PREFIX + 'count': torch.tensor(self.count, dtype=torch.float64),
+                PREFIX + 'min_std': torch.tensor(self.min_std, dtype=torch.float64)}
+
+    def load_state_dict(self, state: dict):
+        self.mean = state[PREFIX + 'mean'].double().numpy().copy()
+        self.var = state[PREFIX + 'var'].double().numpy().copy()
+        self.count = float(state[PREFIX + 'count'])
+        self.min_std = float(state.get(PREFIX + 'min_std', self.min_std))
+
+    @classmethod
+    def from_state_dict(cls, state: dict) -> 'RunningNormalizer':
+        norm = cls(len(state[PREFIX + 'mean']), float(state.get(PREFIX + 'min_std', 0.1)))
+        norm.load_state_dict(state)
+        return norm
+
+
+def has_normalizer(state: dict) -> bool:
+    return PREFIX + 'mean' in state
+
+
+def split_state_dict(state: dict):
+    """(model weights, normalizer or None) from a checkpoint state dict."""
+    weights = {k: v for k, v in state.items() if not k.startswith(PREFIX)}
+    return weights, RunningNormalizer.from_state_dict(state) if has_normalizer(state) else None
+
+
+def fold_into_state_dict(state: dict) -> dict:
+    """Weights that take raw observations: the normalizer is folded into the input layers.
+
+    State dicts without `obs_norm.*` keys are returned unchanged.
+    """
+    weights, norm = split_state_dict(state)
+    if norm is None:
+        return weights
+    mean = torch.as_tensor(norm.mean)
+    inv_std = torch.as_tensor(1.0 / norm.std)
+    for layer in INPUT_LAYERS:
+        if layer + '.weight' not in weights:
+            continue
+        w = weights[layer + '.weight']
+        b = weights[layer + '.bias']
+        scaled = w.double() * inv_std
+        weights[layer + '.weight'] = scaled.to(w.dtype)
+        weights[layer + '.bias'] = (b.double() - scaled @ mean).to(b.dtype)
+    return weights
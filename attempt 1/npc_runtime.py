@@ -0,0 +1,71 @@
+"""
+Dependency-light NPC policy runtime (NumPy only, no torch).
+
+Loads a policy artifact written by `export_policy.py` and picks actions for
+many NPCs with one batched forward pass. Int8 layers are kept as int8 with a
+float32 scale per output channel, so each variant stays ~4x smaller in memory
+than its float32 weights; float32 layers are used as-is.
+
+    runtime = PolicyRuntime.load('policy_int8.npz')
+    actions = runtime.act(observations)   # observations: [num_npcs, 8]
+"""
+
+import numpy as np
+
+
+FORMAT_VERSION = 1
+
+
+class PolicyRuntime:
+    def __init__(self, layers):
+        # Each layer is (weight [out, in] int8 or float32, scale [out] or None, bias [out] float32)
+        self.layers = layers
+        self.input_size = layers[0][0].shape[1]
+        self.num_actions = layers[-1][0].shape[0]
+
+    @classmethod
+    def load(cls, path: str) -> 'PolicyRuntime':
+        with np.load(path, allow_pickle=False) as data:
+            version = int(data['format_version'])
+            if version != FORMAT_VERSION:
+                raise ValueError(f'unsupported policy format version {version}')
+            layers = []
+            for i in range(int(data['num_layers'])):
+                bias = data[f'b{i}'].astype(np.float32)
+                if f'q{i}' in data:
+                    layers.append((data[f'q{i}'].astype(np.int8), data[f's{i}'].astype(np.float32), bias))
+                else:
+                    layers.append((data[f'w{i}'].astype(np.float32), None, bias))
+        return cls(layers)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(w.nbytes + b.nbytes + (s.nbytes if s is not None else 0) for w, s, b in self.layers)
+
+    def logits(self, obs) -> np.ndarray:
+        """Action logits for a batch `[N, input_size]` (a single observation is also accepted)."""
+        x = np.asarray(obs, dtype=np.float32)
+        if x.ndim == 1:
+            x = x[None]
+        last = len(self.layers) - 1
+        for i, (w, scale, b) in enumerate(self.layers):
+            x = x @ w.T
+            if scale is not None:
+                x *= scale
+            x += b
+            if i < last:
+                np.maximum(x, 0.0, out=x)
+        return x
+
+    def act(self, obs) -> np.ndarray:
+        """Greedy action per row of `obs`."""
+        return self.logits(obs).argmax(axis=-1)
+
+    def sample(self, obs, rng: np.random.Generator) -> np.ndarray:
+        """Sample actions from the softmax policy, one per row of `obs`."""
+        z = self.logits(obs)
+        z -= z.max(axis=-1, keepdims=True)
+        p = np.exp(z)
+        cdf = np.cumsum(p, axis=-1)
+        u = rng.random(len(z))[:, None] * cdf[:, -1:]
+        return np.minimum((cdf < u).sum(axis=-1), self.num_actions - 1)
@@ -0,0 +1,346 @@
+"""
+Offline training from logged trajectories, without stepping any environment.
+
+Two sources of logged play are read:
+
+- episode recordings (`recordings/*.rec`, `train.py --record`). Each frame
+  holds the state after a step, plus the action and reward, so the
+  observation the policy acted on is `Game.get_state()` rebuilt from the
+  previous frame (or the reset state at an episode start). Frames are
+  float32, so positions and health are rounded before the features are
+  recomputed: the rebuilt observations are close to the live ones (within
+  float32 precision) but not bit-for-bit, and the two 0/1 flags can flip for
+  a state sitting exactly on their threshold;
+- the JSON store written by `JSApi.save_training_data`, when it holds
+  trajectories: `{"trajectories": [{"states": [[8 floats], ...],
+  "actions": [...], "rewards": [...]}, ...]}` (or just the list). `states`
+  has one entry per action, optionally plus the final state.
+
+`Transitions` flattens trajectories into (obs, action, reward, next_obs,
+done, return) arrays. `PrefetchLoader` shuffles them and slices minibatches
+into ready float32/int64 tensors on a background thread, a few batches
+ahead of the optimizer, so gathering never stalls a training step.
+
+Two learners train a `PolicyNet`:
+
+- `behavior_cloning`: cross-entropy on the logged actions;
+- `OfflineQLearning`: the network's outputs are Q-values, trained on
+  one-step TD targets from a slowly tracking target network. A conservative
+  (CQL) penalty keeps actions that never appear in the log from being
+  overestimated. Acting greedily on the logits picks the best action.
+
+`--top` keeps only the best fraction of episodes by return, which suits
+behavior cloning from logs of mixed quality.
+
+    python offline.py --data recordings training_data.json --algo bc --epochs 10 --save model.pth
+    python offline.py --data recordings --algo cql --epochs 20 --save model.pth
+"""
+
+import argparse
+import copy
+import glob
+import json
+import os
+import queue
+import sys
+import threading
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+import torch.optim as optim
+
+from app import Game, PolicyNet
+from recorder import Recording
+from returns import discounted_cumsum
+
+
+def states_from_frames(frames: np.ndarray, game: Game = None) -> np.ndarray:
+    """`Game.get_state()` features for a `[T, >= 12]` block of `recorder.game_frame` frames.
+
+    Approximate: the frames hold float32 copies of the game state (see the module docstring).
+    """
+    game = game or Game()
+    px, py, p_health = frames[:, 2], frames[:, 3], frames[:, 4]
+    nx, ny, n_health, n_cooldown = frames[:, 6], frames[:, 7], frames[:, 8], frames[:, 9]
+    dx, dy = px - nx, py - ny
+    distance = np.sqrt(dx * dx + dy * dy)
+    return np.stack([
+        dx / game.width,
+        dy / game.height,
+        distance / 500.0,
+        n_health / 100.0,
+        p_health / 100.0,
+        n_cooldown / 30.0,
+        (py < ny).astype(np.float64),
+        (distance < game.npc['attackRange']).astype(np.float64),
+    ], axis=1).astype(np.float32)
+
+
+def load_recording(path: str) -> list:
+    """Trajectories from one episode recording; episodes cut short by a crash are kept."""
+    rec = Recording(path)
+    try:
+        if rec.kind != 'game':
+            raise ValueError(f'{path}: only Game recordings can be replayed offline, not {rec.kind!r}')
+        episodes = rec.episodes or [{'start': 0, 'length': len(rec)}]
+        game = Game()
+        reset_state = np.asarray(game.reset(), dtype=np.float32)
+        trajectories = []
+        for ep in episodes:
+            length = ep.get('length', len(rec) - ep['start'])
+            if length <= 0:
+                continue
+            frames = np.stack([f[:12] for f in rec.frames(ep['start'], ep['start'] + length)]).astype(np.float64)
+            after = states_from_frames(frames, game)
+            trajectories.append({
+                'states': np.concatenate([reset_state[None], after]),
+                'actions': frames[:, 0].astype(np.int64),
+                'rewards': frames[:, 1],
+                'terminal': bool(frames[-1, 10]),
+            })
+        return trajectories
+    finally:
+        rec.close()
+
+
+def load_json(path: str) -> list:
+    """Trajectories from a `save_training_data` JSON file (see the module docstring for the schema)."""
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    data = json.loads(text) if text.strip() else []
+    if isinstance(data, dict):
+        data = data.get('trajectories', [])
+    trajectories = []
+    for traj in data:
+        states = np.asarray(traj['states'], dtype=np.float32)
+        actions = np.asarray(traj['actions'], dtype=np.int64)
+        rewards = np.asarray(traj['rewards'], dtype=np.float64)
+        if len(actions) == 0:
+            continue
+        if len(states) == len(actions):
+            # No final state logged: treat the last step as terminal
+            states = np.concatenate([states, states[-1:]])
+            terminal = True
+        else:
+            terminal = bool(traj.get('done', True))
+        trajectories.append({'states': states, 'actions': actions, 'rewards': rewards, 'terminal': terminal})
+    return trajectories
+
+
+def load_trajectories(paths) -> list:
+    """Trajectories from `.rec` files, `.json` stores, or folders of `.rec` files."""
+    trajectories = []
+    for path in paths:
+        if os.path.isdir(path):
+            trajectories += load_trajectories(sorted(glob.glob(os.path.join(path, '*.rec'))))
+        elif path.endswith('.rec'):
+            trajectories += load_recording(path)
+        else:
+            trajectories += load_json(path)
+    return trajectories
+
+
+def top_episodes(trajectories: list, fraction: float) -> list:
+    """The best `fraction` of trajectories by total reward (at least one)."""
+    ranked = sorted(trajectories, key=lambda t: float(np.sum(t['rewards'])), reverse=True)
+    return ranked[:max(1, int(round(len(ranked) * fraction)))]
+
+
+class Transitions:
+    """Flat arrays of one-step transitions with per-episode discounted returns."""
+    FIELDS = ('obs', 'actions', 'rewards', 'next_obs', 'dones', 'returns')
+
+    def __init__(self, trajectories: list, gamma: float = 0.99):
+        if not trajectories:
+            raise ValueError('no trajectories to train on')
+        self.obs = np.concatenate([t['states'][:-1] for t in trajectories])
+        self.next_obs = np.concatenate([t['states'][1:] for t in trajectories])
+        self.actions = np.concatenate([t['actions'] for t in trajectories])
+        self.rewards = np.concatenate([t['rewards'] for t in trajectories]).astype(np.float32)
+        ends = np.zeros(len(self.actions), dtype=bool)
+        ends[np.cumsum([len(t['actions']) for t in trajectories]) - 1] = True
+        self.dones = np.zeros(len(self.actions), dtype=np.float32)
+        self.dones[ends] = [float(t['terminal']) for t in trajectories]
+        self.returns = discounted_cumsum(self.rewards, gamma, ends).astype(np.float32)
+        self.episodes = len(trajectories)
+
+    def __len__(self):
+        return len(self.actions)
+
+    def normalize(self, normalizer):
+        """Fit a `RunningNormalizer` on the logged observations and apply it to obs/next_obs.
+
+        `normalizer` is updated in place; pass a copy to keep the original's statistics.
+        """
+        normalizer.update(self.obs)
+        self.obs = normalizer.normalize(self.obs)
+        self.next_obs = normalizer.normalize(self.next_obs)
+
+    def batch(self, idx) -> dict:
+        return {name: torch.from_numpy(getattr(self, name)[idx]) for name in self.FIELDS}
+
+
+class PrefetchLoader:
+    """Shuffled minibatch tensors, gathered `prefetch` batches ahead on a background thread.
+
+    Each iteration is one epoch with a fresh permutation. Leaving the loop
+    early stops the thread.
+    """
+    def __init__(self, data: Transitions, batch_size: int = 256, shuffle: bool = True, prefetch: int = 4,
+                 seed=None):
+        self.data = data
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.prefetch = prefetch
+        self.rng = np.random.default_rng(seed)
+
+    def __len__(self):
+        return -(-len(self.data) // self.batch_size)
+
+    def _produce(self, order, out: queue.Queue, stop: threading.Event):
+        try:
+            for start in range(0, len(order), self.batch_size):
+                batch = self.data.batch(order[start:start + self.batch_size])
+                while not stop.is_set():
+                    try:
+                        out.put(batch, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                if stop.is_set():
+                    return
+        except Exception as e:
+            out.put(e)
+            return
+        out.put(None)
+
+    def __iter__(self):
+        n = len(self.data)
+        order = self.rng.permutation(n) if self.shuffle else np.arange(n)
+        out, stop = queue.Queue(maxsize=self.prefetch), threading.Event()
+        thread = threading.Thread(target=self._produce, args=(order, out, stop), name='prefetch', daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = out.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            thread.join()
+
+
+def behavior_cloning(model, optimizer, loader: PrefetchLoader) -> dict:
+    """One epoch of cross-entropy on the logged actions."""
+    total_loss = correct = count = 0.0
+    for batch in loader:
+        logits = model(batch['obs'])
+        loss = F.cross_entropy(logits, batch['actions'])
+        optimizer.zero_grad()
+        loss.backward()
+        optimizer.step()
+        n = len(batch['actions'])
+        total_loss += loss.item() * n
+        correct += (logits.argmax(dim=-1) == batch['actions']).sum().item()
+        count += n
+    return {'loss': total_loss / count, 'accuracy': correct / count}
+
+
+class OfflineQLearning:
+    """Conservative Q-learning on logged transitions; the model's outputs are Q-values."""
+    def __init__(self, model, optimizer, gamma: float = 0.99, alpha: float = 1.0, tau: float = 0.005):
+        self.model = model
+        self.optimizer = optimizer
+        self.gamma = gamma
+        self.alpha = alpha
+        self.tau = tau
+        self.target = copy.deepcopy(model).eval()
+        for p in self.target.parameters():
+            p.requires_grad_(False)
+
+    def update(self, batch: dict) -> dict:
+        q = self.model(batch['obs'])
+        q_taken = q.gather(1, batch['actions'][:, None]).squeeze(1)
+        with torch.no_grad():
+            next_q = self.target(batch['next_obs']).max(dim=1).values
+            target = batch['rewards'] + self.gamma * (1.0 - batch['dones']) * next_q
+        td_loss = F.smooth_l1_loss(q_taken, target)
+        # Push down Q on every action, push up Q on the logged one
+        cql_loss = (torch.logsumexp(q, dim=1) - q_taken).mean()
+        loss = td_loss + self.alpha * cql_loss
+        self.optimizer.zero_grad()
+        loss.backward()
+        self.optimizer.step()
+        with torch.no_grad():
+            for p, tp in zip(self.model.parameters(), self.target.parameters()):
+                tp.lerp_(p, self.tau)
+        return {'td_loss': td_loss.item(), 'cql_loss': cql_loss.item(), 'q': q_taken.mean().item()}
+
+    def train_epoch(self, loader: PrefetchLoader) -> dict:
+        stats = [self.update(batch) for batch in loader]
+        return {k: float(np.mean([s[k] for s in stats])) for k in stats[0]}
+
+
+def train_offline(model, data: Transitions, algo: str = 'bc', epochs: int = 10, batch_size: int = 256,
+                  lr: float = 1e-3, gamma: float = 0.99, alpha: float = 1.0, seed=None, should_stop=None,
+                  log=None) -> list:
+    """Train `model` in place for `epochs` passes over `data`; returns per-epoch stats."""
+    if algo not in ('bc', 'cql'):
+        raise ValueError(f'unknown offline algorithm: {algo}')
+    optimizer = optim.Adam(model.parameters(), lr=lr)
+    loader = PrefetchLoader(data, batch_size, seed=seed)
+    learner = OfflineQLearning(model, optimizer, gamma, alpha) if algo == 'cql' else None
+    history = []
+    model.train()
+    for epoch in range(1, epochs + 1):
+        if should_stop is not None and should_stop():
+            break
+        stats = learner.train_epoch(loader) if learner else behavior_cloning(model, optimizer, loader)
+        history.append(dict(stats, epoch=epoch))
+        if log is not None:
+            log(history[-1])
+    return history
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Train a PolicyNet from logged trajectories.')
+    parser.add_argument('--data', nargs='+', default=['recordings', 'training_data.json'],
+                        help='.rec files, folders of them, or save_training_data JSON files')
+    parser.add_argument('--algo', choices=('bc', 'cql'), default='bc')
+    parser.add_argument('--epochs', type=int, default=10)
+    parser.add_argument('--batch-size', type=int, default=256)
+    parser.add_argument('--lr', type=float, default=1e-3)
+    parser.add_argument('--gamma', type=float, default=0.99)
+    parser.add_argument('--alpha', type=float, default=1.0, help='conservative penalty weight for --algo cql')
+    parser.add_argument('--top', type=float, default=1.0, help='train only on this fraction of best episodes')
+    parser.add_argument('--hidden-size', type=int, default=16)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', default='model_offline.pth')
+    args = parser.parse_args(argv)
+
+    torch.manual_seed(args.seed)
+    trajectories = load_trajectories([p for p in args.data if os.path.exists(p)])
+    if args.top < 1.0:
+        trajectories = top_episodes(trajectories, args.top)
+    data = Transitions(trajectories, args.gamma)
+    print(f'{data.episodes} episodes, {len(data)} transitions', file=sys.stderr)
+
+    model = PolicyNet(8, args.hidden_size, 4)
+
+    def log(stats):
+        print(' | '.join(f'{k} {v:.4f}' if isinstance(v, float) else f'{k} {v}' for k, v in stats.items()),
+              file=sys.stderr)
+
+    history = train_offline(model, data, args.algo, args.epochs, args.batch_size, args.lr, args.gamma, args.alpha,
+                            args.seed, log=log)
+    torch.save(model.state_dict(), args.save)
+    print(json.dumps({'saved': args.save, 'final': history[-1] if history else None}))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""
+Lookahead planning on top of `Game.snapshot()` / `Game.restore()`.
+
+At every decision the planner restores a pool of simulator copies from the
+live game, commits each copy to one candidate first action and rolls the
+policy forward for `horizon` steps. All copies advance in lockstep, so each
+rollout step costs one batched `PolicyNet` forward pass. The candidate with
+the best mean discounted return wins. Policy priors both prune the root
+(`top_k`) and drive the rollouts.
+
+Simulator RNGs are reseeded after restoring so the planner does not see the
+live game's future random draws.
+
+    python planner.py model.pth --episodes 20 --horizon 15 --rollouts 4
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import torch
+
+from app import Game, PolicyNet
+from evaluate import MAX_STEPS, load_policy, run_episodes, summarize
+
+
+class LookaheadPlanner:
+    def __init__(self, model: PolicyNet, horizon: int = 15, rollouts: int = 4, top_k: int = 4,
+                 gamma: float = 0.99, seed=None, rewards=None, reseed: bool = True):
+        self.model = model
+        self.horizon = horizon
+        self.rollouts = rollouts
+        self.top_k = top_k
+        self.gamma = gamma
+        self.reseed = reseed
+        self.rng = np.random.default_rng(seed)
+        self.sims = [Game(rewards=rewards) for _ in range(top_k * rollouts)]
+
+    def _sample(self, logits: torch.Tensor) -> np.ndarray:
+        probs = torch.softmax(logits, dim=-1).numpy().astype(np.float64)
+        cdf = np.cumsum(probs, axis=-1)
+        u = self.rng.random(len(probs))[:, None] * cdf[:, -1:]
+        return np.minimum((cdf < u).sum(axis=-1), probs.shape[1] - 1)
+
+    def plan(self, game: Game) -> int:
+        """Best first action for `game` (left untouched)."""
+        with torch.no_grad():
+            logits = self.model(torch.tensor([game.get_state()], dtype=torch.float32))[0]
+        candidates = torch.topk(logits, min(self.top_k, len(logits))).indices.numpy()
+        if len(candidates) == 1 or self.horizon <= 0:
+            return int(candidates[0])
+
+        snap = game.snapshot()
+        sims = self.sims[:len(candidates) * self.rollouts]
+        first = np.repeat(candidates, self.rollouts)
+        seeds = self.rng.integers(2 ** 63, size=len(sims))
+        for sim, seed in zip(sims, seeds):
+            sim.restore(snap)
+            if self.reseed:
+                sim.rng.seed(int(seed))
+
+        returns = np.zeros(len(sims))
+        states = [None] * len(sims)
+        active = []
+        for i, sim in enumerate(sims):
+            reward, done, states[i] = sim.step(int(first[i]))
+            returns[i] = reward
+            if not done:
+                active.append(i)
+
+        discount = self.gamma
+        with torch.no_grad():
+            for _ in range(self.horizon - 1):
+                if not active:
+                    break
+                actions = self._sample(self.model(torch.tensor([states[i] for i in active], dtype=torch.float32)))
+                still = []
+                for i, a in zip(active, actions):
+                    reward, done, states[i] = sims[i].step(int(a))
+                    returns[i] += discount * reward
+                    if not done:
+                        still.append(i)
+                active = still
+                discount *= self.gamma
+
+        scores = returns.reshape(len(candidates), self.rollouts).mean(axis=1)
+        # Ties (e.g. nothing happens within the horizon) go to the policy's preference
+        return int(candidates[int(np.argmax(scores))])
+
+
+def play_episodes(planner: LookaheadPlanner, seeds, max_steps: int = MAX_STEPS, rewards=None):
+    """One planned episode per seed; returns (seed, total_reward, length, winner) like `run_episodes`."""
+    results = []
+    for seed in seeds:
+        game = Game(seed=seed, rewards=rewards)
+        total, length = 0.0, 0
+        for length in range(1, max_steps + 1):
+            reward, done, _ = game.step(planner.plan(game))
+            total += reward
+            if done:
+                break
+        results.append((seed, total, length, game.winner or 'timeout'))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare a lookahead planner against the raw greedy policy.')
+    parser.add_argument('checkpoint')
+    parser.add_argument('--episodes', type=int, default=20)
+    parser.add_argument('--horizon', type=int, default=15)
+    parser.add_argument('--rollouts', type=int, default=4, help='rollouts per candidate action')
+    parser.add_argument('--top-k', type=int, default=4, help='candidate actions kept by policy prior')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-steps', type=int, default=MAX_STEPS)
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.checkpoint):
+        print(f'Checkpoint not found: {args.checkpoint}', file=sys.stderr)
+        return 1
+    model = load_policy(args.checkpoint)
+    seeds = list(range(args.seed, args.seed + args.episodes))
+
+    report = {'policy': summarize(run_episodes(model, seeds, 'greedy', args.max_steps))}
+    planner = LookaheadPlanner(model, args.horizon, args.rollouts, args.top_k, seed=args.seed)
+    start = time.perf_counter()
+    results = play_episodes(planner, seeds, args.max_steps)
+    elapsed = time.perf_counter() - start
+    report['planner'] = summarize(results)
+    report['planner']['ms_per_decision'] = 1000.0 * elapsed / max(1, sum(r[2] for r in results))
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
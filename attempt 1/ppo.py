@@ -0,0 +1,145 @@
+"""
+Proximal Policy Optimization for the combat NPC.
+
+`PPOTrainer` trains an `ActorCritic` (a `PolicyNet` with a value head). It
+collects fixed-length rollouts from a vector of `Game` environments, computes
+GAE advantages for the whole `[T, N]` rollout with `returns.gae` and runs several
+clipped-objective minibatch epochs over each rollout. With a `normalizer`,
+the policy sees normalized observations and the statistics are updated once
+per rollout from every raw observation it collected.
+"""
+
+import functools
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from app import ActorCritic
+from returns import gae
+from vec_env import GameEnv, SyncVectorEnv, AsyncVectorEnv
+
+
+class PPOTrainer:
+    def __init__(self, model: ActorCritic, optimizer, num_envs: int = 16, rollout_steps: int = 128,
+                 epochs: int = 4, minibatch_size: int = 256, gamma: float = 0.99, lam: float = 0.95,
+                 clip: float = 0.2, vf_coef: float = 0.5, ent_coef: float = 0.01, max_grad_norm: float = 0.5,
+                 asynchronous: bool = False, seed: int = None, device=None, env_kwargs: dict = None,
+                 cores=None, normalizer=None):
+        self.model = model
+        self.normalizer = normalizer
+        self.optimizer = optimizer
+        self.device = device or torch.device('cpu')
+        self.num_envs = num_envs
+        self.rollout_steps = rollout_steps
+        self.epochs = epochs
+        self.minibatch_size = minibatch_size
+        self.gamma = gamma
+        self.lam = lam
+        self.clip = clip
+        self.vf_coef = vf_coef
+        self.ent_coef = ent_coef
+        self.max_grad_norm = max_grad_norm
+
+        env_fns = [functools.partial(GameEnv, **(env_kwargs or {})) for _ in range(num_envs)]
+        self.envs = AsyncVectorEnv(env_fns, cores=cores) if asynchronous else SyncVectorEnv(env_fns)
+        self.obs, _ = self.envs.reset(seed=seed)
+        self.total_steps = 0
+
+        T, N, D = rollout_steps, num_envs, self.envs.observation_size
+        self.buf_obs = np.zeros((T, N, D), dtype=np.float32)
+        self.buf_actions = np.zeros((T, N), dtype=np.int64)
+        self.buf_logp = np.zeros((T, N), dtype=np.float32)
+        self.buf_values = np.zeros((T, N), dtype=np.float32)
+        self.buf_rewards = np.zeros((T, N), dtype=np.float32)
+        self.buf_dones = np.zeros((T, N), dtype=np.float32)
+
+    def _tensor(self, x):
+        return torch.as_tensor(x, device=self.device)
+
+    def _input(self, obs):
+        return obs if self.normalizer is None else self.normalizer.normalize(obs)
+
+    def collect(self):
+        """Fill the rollout buffer; returns the episodes that finished as (return, length, winner)."""
+        finished, raw_obs = [], []
+        with torch.no_grad():
+            for t in range(self.rollout_steps):
+                obs = self._input(self.obs)
+                raw_obs.append(self.obs)
+                logits, values = self.model.forward_all(self._tensor(obs))
+                dist = torch.distributions.Categorical(logits=logits)
+                actions = dist.sample()
+                self.buf_obs[t] = obs
+                self.buf_actions[t] = actions.cpu().numpy()
+                self.buf_logp[t] = dist.log_prob(actions).cpu().numpy()
+                self.buf_values[t] = values.cpu().numpy()
+
+                self.obs, rewards, terminated, truncated, info = self.envs.step(self.buf_actions[t])
+                if truncated.any():
+                    # Time-limit cut: bootstrap from the value of the state we were cut off in.
+                    final = self._tensor(self._input(info['final_observation'][truncated]))
+                    rewards = rewards.copy()
+                    rewards[truncated] += self.gamma * self.model.forward_value(final).cpu().numpy()
+                self.buf_rewards[t] = rewards
+                self.buf_dones[t] = terminated | truncated
+                for i in np.flatnonzero(info['done']):
+                    finished.append((float(info['episode_return'][i]), int(info['episode_length'][i]),
+                                     info['winner'][i]))
+            last_values = self.model.forward_value(self._tensor(self._input(self.obs))).cpu().numpy()
+        if self.normalizer is not None:
+            self.normalizer.update(np.stack(raw_obs))
+        self.total_steps += self.rollout_steps * self.num_envs
+        self.advantages, self.returns = gae(self.buf_rewards, self.buf_values, self.buf_dones,
+                                            last_values, self.gamma, self.lam)
+        return finished
+
+    def update(self):
+        """Run clipped PPO epochs over the current rollout; returns mean losses."""
+        obs = self._tensor(self.buf_obs.reshape(-1, self.buf_obs.shape[-1]))
+        actions = self._tensor(self.buf_actions.reshape(-1))
+        old_logp = self._tensor(self.buf_logp.reshape(-1))
+        advantages = self._tensor(self.advantages.reshape(-1).astype(np.float32))
+        returns = self._tensor(self.returns.reshape(-1).astype(np.float32))
+
+        n = obs.shape[0]
+        stats = {'policy_loss': 0.0, 'value_loss': 0.0, 'entropy': 0.0, 'clip_frac': 0.0}
+        updates = 0
+        for _ in range(self.epochs):
+            perm = torch.randperm(n, device=self.device)
+            for start in range(0, n, self.minibatch_size):
+                idx = perm[start:start + self.minibatch_size]
+                logits, values = self.model.forward_all(obs[idx])
+                dist = torch.distributions.Categorical(logits=logits)
+                logp = dist.log_prob(actions[idx])
+                adv = advantages[idx]
+                adv = (adv - adv.mean()) / (adv.std(unbiased=False) + 1e-8)
+
+                ratio = torch.exp(logp - old_logp[idx])
+                surr = torch.min(ratio * adv, torch.clamp(ratio, 1 - self.clip, 1 + self.clip) * adv)
+                policy_loss = -surr.mean()
+                value_loss = 0.5 * (returns[idx] - values).pow(2).mean()
+                entropy = dist.entropy().mean()
+                loss = policy_loss + self.vf_coef * value_loss - self.ent_coef * entropy
+
+                self.optimizer.zero_grad()
+                loss.backward()
+                nn.utils.clip_grad_norm_(self.model.parameters(), self.max_grad_norm)
+                self.optimizer.step()
+
+                stats['policy_loss'] += policy_loss.item()
+                stats['value_loss'] += value_loss.item()
+                stats['entropy'] += entropy.item()
+                stats['clip_frac'] += ((ratio.detach() - 1).abs() > self.clip).float().mean().item()
+                updates += 1
+        return {k: v / max(1, updates) for k, v in stats.items()}
+
+    def train_iteration(self):
+        """One rollout plus its update. Returns (finished_episodes, update_stats)."""
+        self.model.train()
+        finished = self.collect()
+        stats = self.update()
+        return finished, stats
+
+    def close(self):
+        self.envs.close()
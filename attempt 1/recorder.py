@@ -0,0 +1,254 @@
+"""
+Compact, seekable episode recordings.
+
+A recording is one file per run holding every simulation frame as a flat
+float32 vector. Frames are grouped into chunks of `keyframe_interval`: the
+first frame of a chunk is stored whole (the keyframe), each later one as the
+XOR of its bits with the previous frame, so unchanged values become zero
+bytes, and the chunk is zlib-compressed. Frame `i` therefore lives in chunk
+`i // keyframe_interval`, and seeking costs one index lookup plus one chunk
+decode. A JSON footer holds the chunk index and the episode table. If a run
+dies before `close()`, the chunks are rescanned from their headers.
+
+`kind` names the frame layout: 'game' frames come from `game_frame` (the
+Game simulation), 'dodge' frames from `dodge_frame` (the bullet-dodging
+page's DodgeEnv, which lives in its own tree and is only duck-typed here).
+
+    with EpisodeRecorder('run.rec') as rec:
+        rec.begin_episode()
+        rec.append(game_frame(game, action, reward))
+        rec.end_episode(reward=total, winner=game.winner)
+
+    replay = Recording('run.rec')
+    for frame in replay.frames(step=4):       # 4x speed
+        state = replay.decode(frame)
+"""
+
+import json
+import mmap
+import struct
+import zlib
+
+import numpy as np
+
+
+MAGIC = b'NPCREC01'
+FOOTER = struct.Struct('<Q8s')             # footer JSON offset, magic
+CHUNK_HEADER = struct.Struct('<QII')       # first frame, frame count, compressed bytes
+FRAME_HEADER = struct.Struct('<BI')        # 1 = XOR delta against previous frame, float count
+
+WINNERS = (None, 'npc', 'player', 'timeout')
+
+
+def game_frame(game, action: int, reward: float) -> list:
+    """Flat frame for a `Game` after a step: action, reward, agents, episode flags, projectiles."""
+    p, n = game.player, game.npc
+    frame = [action, reward, p['x'], p['y'], p['health'], p['attackCooldown'],
+             n['x'], n['y'], n['health'], n['attackCooldown'], float(game.done), WINNERS.index(game.winner)]
+    for q in game.projectiles:
+        frame += (q['x'], q['y'], q['vx'], q['vy'], 1.0 if q['owner'] == 'npc' else 0.0)
+    return frame
+
+
+def decode_game_frame(frame) -> dict:
+    """Inverse of `game_frame`, in the shape the TSX renderer draws."""
+    f = [float(v) for v in frame]
+    return {
+        'action': int(f[0]),
+        'reward': f[1],
+        'player': {'x': f[2], 'y': f[3], 'health': f[4], 'attackCooldown': int(f[5])},
+        'npc': {'x': f[6], 'y': f[7], 'health': f[8], 'attackCooldown': int(f[9])},
+        'done': bool(f[10]),
+        'winner': WINNERS[int(f[11])],
+        'projectiles': [{'x': f[i], 'y': f[i + 1], 'vx': f[i + 2], 'vy': f[i + 3],
+                         'owner': 'npc' if f[i + 4] else 'player'} for i in range(12, len(f), 5)],
+    }
+
+
+def dodge_frame(env, action: int, reward: float, hit: bool) -> list:
+    """Flat frame for a dodge env after a step: action, reward, NPC position, hit flag, bullets.
+
+    `env` needs `npc` (x, y) and `bullets` ([N, 4] rows of x, y, vx, vy), as on DodgeEnv.
+    """
+    return [action, reward, float(env.npc[0]), float(env.npc[1]), float(hit)] + \
+        np.asarray(env.bullets, dtype=np.float64)[:, :4].ravel().tolist()
+
+
+def decode_dodge_frame(frame) -> dict:
+    """Inverse of `dodge_frame`."""
+    f = [float(v) for v in frame]
+    return {
+        'action': int(f[0]),
+        'reward': f[1],
+        'npc': {'x': f[2], 'y': f[3]},
+        'hit': bool(f[4]),
+        'bullets': [{'x': f[i], 'y': f[i + 1], 'vx': f[i + 2], 'vy': f[i + 3]} for i in range(5, len(f), 4)],
+    }
+
+
+DECODERS = {'game': decode_game_frame, 'dodge': decode_dodge_frame}
+
+
+class EpisodeRecorder:
+    def __init__(self, path: str, kind: str = 'game', keyframe_interval: int = 64, level: int = 6,
+                 meta: dict = None):
+        if kind not in DECODERS:
+            raise ValueError(f'unknown recording kind {kind!r}, expected one of {sorted(DECODERS)}')
+        self.path = path
+        self.kind = kind
+        self.keyframe_interval = keyframe_interval
+        self.level = level
+        self.frames = 0
+        self._file = open(path, 'wb')
+        header = json.dumps({'kind': kind, 'keyframe_interval': keyframe_interval, 'meta': meta or {}}).encode()
+        self._file.write(MAGIC + struct.pack('<I', len(header)) + header)
+        self._chunk = []
+        self._chunk_first = 0
+        self._index = []
+        self._episodes = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def begin_episode(self, **info):
+        self._episodes.append(dict(info, start=self.frames))
+
+    def end_episode(self, **info):
+        if self._episodes:
+            episode = self._episodes[-1]
+            episode.update(info, length=self.frames - episode['start'])
+
+    def append(self, frame):
+        # Frames are only buffered here; encoding happens once per chunk.
+        if not self._chunk:
+            self._chunk_first = self.frames
+        self._chunk.append(frame)
+        self.frames += 1
+        if len(self._chunk) == self.keyframe_interval:
+            self._flush_chunk()
+
+    def _encode_chunk(self) -> bytes:
+        """Keyframe plus XOR deltas; runs of equal-length frames are encoded as one array."""
+        parts, i = [], 0
+        while i < len(self._chunk):
+            n = len(self._chunk[i])
+            j = i + 1
+            while j < len(self._chunk) and len(self._chunk[j]) == n:
+                j += 1
+            bits = np.array(self._chunk[i:j], dtype=np.float32).reshape(j - i, n).view(np.uint32)
+            deltas = bits.copy()
+            deltas[1:] ^= bits[:-1]
+            # The first frame of a run follows a frame of another length, so it is stored whole
+            parts.append(FRAME_HEADER.pack(0, n) + deltas[0].tobytes())
+            delta_header = FRAME_HEADER.pack(1, n)
+            parts.extend(delta_header + row.tobytes() for row in deltas[1:])
+            i = j
+        return b''.join(parts)
+
+    def _flush_chunk(self):
+        if not self._chunk:
+            return
+        data = zlib.compress(self._encode_chunk(), self.level)
+        offset = self._file.tell()
+        self._file.write(CHUNK_HEADER.pack(self._chunk_first, len(self._chunk), len(data)) + data)
+        self._index.append((self._chunk_first, offset, len(self._chunk)))
+        self._chunk = []
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._flush_chunk()
+        footer = json.dumps({'frames': self.frames, 'chunks': self._index, 'episodes': self._episodes}).encode()
+        offset = self._file.tell()
+        self._file.write(footer + FOOTER.pack(offset, MAGIC))
+        self._file.close()
+
+
+class Recording:
+    """Random-access reader for files written by `EpisodeRecorder`."""
+    def __init__(self, path: str):
+        self.path = path
+        # Memory-mapped so seeking into a long run does not read the whole file
+        self._file = open(path, 'rb')
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._data[:len(MAGIC)] != MAGIC:
+            raise ValueError(f'not an episode recording: {path}')
+        (size,) = struct.unpack_from('<I', self._data, len(MAGIC))
+        start = len(MAGIC) + 4
+        header = json.loads(self._data[start:start + size])
+        self.kind = header['kind']
+        self.keyframe_interval = header['keyframe_interval']
+        self.meta = header['meta']
+        self._body = start + size
+        self._cache = (None, None)
+
+        offset, magic = FOOTER.unpack_from(self._data, len(self._data) - FOOTER.size) \
+            if len(self._data) >= self._body + FOOTER.size else (0, b'')
+        if magic == MAGIC:
+            footer = json.loads(self._data[offset:len(self._data) - FOOTER.size])
+            self._chunks = [tuple(c) for c in footer['chunks']]
+            self.episodes = footer['episodes']
+            self.num_frames = footer['frames']
+        else:
+            self._chunks, self.episodes = self._scan(), []
+            self.num_frames = sum(n for _, _, n in self._chunks)
+
+    def _scan(self):
+        """Rebuild the chunk index from chunk headers (recording was not closed)."""
+        chunks, pos = [], self._body
+        while pos + CHUNK_HEADER.size <= len(self._data):
+            first, count, size = CHUNK_HEADER.unpack_from(self._data, pos)
+            if pos + CHUNK_HEADER.size + size > len(self._data):
+                break
+            chunks.append((first, pos, count))
+            pos += CHUNK_HEADER.size + size
+        return chunks
+
+    def __len__(self):
+        return self.num_frames
+
+    def close(self):
+        self._data.close()
+        self._file.close()
+
+    def _decode_chunk(self, c: int):
+        if self._cache[0] == c:
+            return self._cache[1]
+        _, offset, _ = self._chunks[c]
+        _, _, size = CHUNK_HEADER.unpack_from(self._data, offset)
+        start = offset + CHUNK_HEADER.size
+        raw = zlib.decompress(self._data[start:start + size])
+        frames, pos, prev = [], 0, None
+        while pos < len(raw):
+            flag, n = FRAME_HEADER.unpack_from(raw, pos)
+            pos += FRAME_HEADER.size
+            cur = np.frombuffer(raw, dtype=np.uint32, count=n, offset=pos)
+            pos += 4 * n
+            if flag:
+                cur = cur ^ prev
+            frames.append(cur)
+            prev = cur
+        frames = [f.view(np.float32) for f in frames]
+        self._cache = (c, frames)
+        return frames
+
+    def frame(self, i: int) -> np.ndarray:
+        """Raw float32 frame `i` (negative indices count from the end)."""
+        if i < 0:
+            i += self.num_frames
+        if not 0 <= i < self.num_frames:
+            raise IndexError(f'frame {i} out of range')
+        c = i // self.keyframe_interval
+        return self._decode_chunk(c)[i - self._chunks[c][0]]
+
+    def frames(self, start: int = 0, stop: int = None, step: int = 1):
+        """Iterate raw frames; `step > 1` replays at that speed-up."""
+        stop = self.num_frames if stop is None else min(stop, self.num_frames)
+        for i in range(start, stop, step):
+            yield self.frame(i)
+
+    def decode(self, frame) -> dict:
+        return DECODERS[self.kind](frame)
@@ -0,0 +1,191 @@
+"""
+Thread budgets and core affinity for learners and rollout workers.
+
+Torch and the BLAS libraries each default to one thread per core, so a learner
+plus N rollout processes quickly oversubscribes the machine. `ResourceManager`
+hands out core sets per consumer, `set_thread_limits` caps torch/BLAS threads
+in the current process, and `pinned_worker_init` is a process-pool initializer
+that pins each worker to one core of its set with a single compute thread.
+`CpuSampler` reports measured per-core utilization from /proc/stat.
+
+Affinity is applied with `os.sched_setaffinity` where the OS supports it and
+silently skipped elsewhere; `threadpoolctl` is used when installed. Only
+training threads and pool workers are pinned, never the process as a whole,
+and `available_cores()` keeps reporting the mask the process started with.
+"""
+
+import os
+import threading
+import time
+
+import torch
+
+try:
+    import threadpoolctl
+except ImportError:
+    threadpoolctl = None
+
+
+THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'NUMEXPR_NUM_THREADS')
+
+
+def _startup_cores():
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+# Read at import, before any learner thread or worker narrows its own mask
+_STARTUP_CORES = _startup_cores()
+
+
+def available_cores():
+    """Cores this process was allowed to run on at startup (pinned threads do not shrink it)."""
+    return list(_STARTUP_CORES)
+
+
+def pin_process(cores, pid: int = 0) -> bool:
+    """Restrict `pid` to `cores`; False if unsupported.
+
+    On Linux `pid=0` means the calling thread. Threads and processes it starts
+    afterwards inherit the mask; threads that already exist keep theirs.
+    """
+    if not cores or not hasattr(os, 'sched_setaffinity'):
+        return False
+    try:
+        os.sched_setaffinity(pid, set(cores))
+        return True
+    except OSError:
+        return False
+
+
+def set_thread_limits(threads: int):
+    """Cap torch intra-op and BLAS/OpenMP threads in this process (and its future children)."""
+    threads = max(1, int(threads))
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(threads)
+    torch.set_num_threads(threads)
+    if threadpoolctl is not None:
+        threadpoolctl.threadpool_limits(threads)
+
+
+def pinned_worker_init(cores, counter):
+    """Process-pool initializer: take the next core from `cores` and run single-threaded.
+
+    `counter` is a shared `multiprocessing.Value('i')` used to give each worker
+    its own slot in the core list.
+    """
+    with counter.get_lock():
+        index = counter.value
+        counter.value += 1
+    if cores:
+        pin_process([cores[index % len(cores)]])
+    set_thread_limits(1)
+
+
+class CpuSampler:
+    """Per-core utilization between successive `sample()` calls (Linux /proc/stat)."""
+    def __init__(self):
+        self._last = self._read()
+        self._last_process = (time.perf_counter(), self._process_cpu())
+
+    @staticmethod
+    def _read():
+        times = {}
+        try:
+            with open('/proc/stat', 'r') as f:
+                for line in f:
+                    if line.startswith('cpu') and line[3].isdigit():
+                        parts = line.split()
+                        values = [int(v) for v in parts[1:]]
+                        idle = values[3] + (values[4] if len(values) > 4 else 0)
+                        times[int(parts[0][3:])] = (sum(values), idle)
+        except OSError:
+            pass
+        return times
+
+    @staticmethod
+    def _process_cpu():
+        t = os.times()
+        return t.user + t.system + t.children_user + t.children_system
+
+    def sample(self) -> dict:
+        now = self._read()
+        per_core = {}
+        for core, (total, idle) in now.items():
+            prev_total, prev_idle = self._last.get(core, (total, idle))
+            dt = total - prev_total
+            per_core[core] = 100.0 * (1.0 - (idle - prev_idle) / dt) if dt > 0 else 0.0
+        self._last = now
+
+        wall, cpu = time.perf_counter(), self._process_cpu()
+        prev_wall, prev_cpu = self._last_process
+        self._last_process = (wall, cpu)
+        process_pct = 100.0 * (cpu - prev_cpu) / (wall - prev_wall) if wall > prev_wall else 0.0
+        return {'per_core': per_core, 'process_percent': process_pct}
+
+
+class ResourceManager:
+    """Assigns core sets to named consumers (learners, worker pools).
+
+    Free cores are handed out first; once every core is taken, further
+    requests share the least-loaded cores rather than failing.
+    """
+    def __init__(self, cores=None, learner_threads: int = None):
+        self.cores = sorted(cores) if cores else available_cores()
+        self._lock = threading.Lock()
+        self._allocations = {}
+        self._sampler = CpuSampler()
+        self.learner_threads = learner_threads
+
+    def configure_learner(self, threads: int = None):
+        """Reserve the learner's share of cores and cap torch/BLAS threads to match.
+
+        Nothing is pinned here; each training thread calls `pin_learner_thread` when it starts.
+        """
+        threads = threads or self.learner_threads or max(1, len(self.cores) // 4)
+        cores = self.allocate('learner', threads)
+        set_thread_limits(len(cores))
+        self.learner_threads = len(cores)
+        return cores
+
+    def pin_learner_thread(self) -> bool:
+        """Pin the calling (training) thread, and the torch threads it creates, to the learner cores."""
+        cores = self.allocation('learner')
+        return pin_process(cores) if cores else False
+
+    def allocate(self, name: str, count: int):
+        with self._lock:
+            self._allocations.pop(name, None)
+            count = max(1, min(int(count), len(self.cores)))
+            load = {c: 0 for c in self.cores}
+            for cores in self._allocations.values():
+                for c in cores:
+                    load[c] += 1
+            chosen = sorted(self.cores, key=lambda c: (load[c], c))[:count]
+            self._allocations[name] = sorted(chosen)
+            return list(self._allocations[name])
+
+    def release(self, name: str):
+        with self._lock:
+            self._allocations.pop(name, None)
+
+    def allocation(self, name: str):
+        with self._lock:
+            return list(self._allocations.get(name, []))
+
+    def report(self) -> dict:
+        """Allocations plus utilization measured since the previous report."""
+        usage = self._sampler.sample()
+        with self._lock:
+            allocations = {k: list(v) for k, v in self._allocations.items()}
+        owned = {c for cores in allocations.values() for c in cores}
+        oversubscribed = sorted(c for c in owned if sum(c in v for v in allocations.values()) > 1)
+        return {
+            'cores': list(self.cores),
+            'allocations': allocations,
+            'oversubscribed_cores': oversubscribed,
+            'torch_threads': torch.get_num_threads(),
+            'per_core_percent': usage['per_core'],
+            'process_percent': usage['process_percent'],
+        }
@@ -0,0 +1,131 @@
+"""
+Return and advantage targets for trajectory batches.
+
+Everything works on `[T]` or `[T, N]` arrays (time first, then environments or
+agents). `dones[t]` marks that step t ended its episode, so several episodes
+can sit end to end in one column. `last_values` bootstraps the columns whose
+final episode is still running.
+
+`discounted_cumsum` computes y[t] = x[t] + gamma * (1 - dones[t]) * y[t + 1]
+without a Python loop over steps. Within a chunk of steps,
+sum_{k>=t} gamma^(k-t) x[k] is a reversed cumulative sum of gamma^k x[k]
+scaled by gamma^-t. Episode boundaries are then handled by subtracting the
+part that belongs to the next episode. Chunks are short enough that
+gamma^-t cannot overflow, so the cost is linear in T, with one NumPy pass
+per chunk. Very wide batches (more than `WIDE` columns) step through time
+instead, one vector operation over all columns per step; at that width the
+per-step overhead is already small.
+
+Returns, GAE and TD(lambda) all reduce to this recursion; n-step targets
+use n shifted array adds.
+
+    returns = discounted_returns(rewards, gamma, dones, last_values)
+    advantages, targets = gae(rewards, values, dones, last_values, gamma, lam)
+"""
+
+import math
+
+import numpy as np
+
+
+# Keeps gamma^chunk well inside float64 range, so the scaled cumulative sums stay finite
+_MIN_POWER = 1e-150
+# Above this many columns a per-step loop (vectorized across columns) is faster
+WIDE = 128
+
+
+def _columns(x):
+    x = np.asarray(x, dtype=np.float64)
+    return (x[:, None], True) if x.ndim == 1 else (x, False)
+
+
+def _chunk_size(gamma: float, chunk: int) -> int:
+    if gamma >= 1.0:
+        return chunk
+    return max(1, min(chunk, int(math.log(_MIN_POWER) / math.log(gamma))))
+
+
+def discounted_cumsum(x, gamma: float, dones=None, last=None, chunk: int = 512) -> np.ndarray:
+    """y[t] = x[t] + gamma * (1 - dones[t]) * y[t + 1], with y[T] = `last` (default 0)."""
+    x, squeeze = _columns(x)
+    T, N = x.shape
+    d = np.zeros((T, N), dtype=bool) if dones is None else _columns(dones)[0].astype(bool)
+    carry = np.zeros(N) if last is None else np.asarray(last, dtype=np.float64).reshape(N)
+    if gamma <= 0.0:
+        return x[:, 0].copy() if squeeze else x.copy()
+
+    y = np.empty((T, N))
+    if N > WIDE:
+        coef = gamma * (1.0 - d)
+        for t in range(T - 1, -1, -1):
+            carry = x[t] + coef[t] * carry
+            y[t] = carry
+        return y
+    size = _chunk_size(gamma, chunk)
+    powers = gamma ** np.arange(size + 1)
+    for end in range(T, 0, -size):
+        start = max(0, end - size)
+        L = end - start
+        t = np.arange(L)[:, None]
+        # z[t] = sum_{t <= k < L} gamma^(k-t) x[k], ignoring episode ends and the carry
+        z = np.cumsum((powers[:L, None] * x[start:end])[::-1], axis=0)[::-1] / powers[:L, None]
+        z = np.concatenate([z, np.zeros((1, N))])
+        # First episode end at or after each step (L when the chunk has none)
+        first_end = np.minimum.accumulate(np.where(d[start:end], t, L)[::-1], axis=0)[::-1]
+        after = np.minimum(first_end + 1, L)
+        open_ended = first_end == L
+        cut = z[:L] - powers[after - t] * np.take_along_axis(z, after, axis=0)
+        y[start:end] = np.where(open_ended, z[:L] + powers[L - t] * carry, cut)
+        carry = y[start]
+    return y[:, 0] if squeeze else y
+
+
+def discounted_returns(rewards, gamma: float, dones=None, last_values=None) -> np.ndarray:
+    """Monte Carlo returns, bootstrapped from `last_values` where the final episode is cut off."""
+    return discounted_cumsum(rewards, gamma, dones, last_values)
+
+
+def _next_values(values, last_values):
+    values, squeeze = _columns(values)
+    last = np.zeros(values.shape[1]) if last_values is None else np.asarray(last_values, dtype=np.float64)
+    return values, np.concatenate([values[1:], last.reshape(1, -1)]), squeeze
+
+
+def gae(rewards, values, dones, last_values, gamma: float, lam: float):
+    """Generalized advantage estimation. Returns (advantages, value targets = advantages + values)."""
+    rewards, squeeze = _columns(rewards)
+    values, next_values, _ = _next_values(values, last_values)
+    not_done = 1.0 - _columns(dones)[0]
+    deltas = rewards + gamma * next_values * not_done - values
+    advantages = discounted_cumsum(deltas, gamma * lam, dones)
+    if squeeze:
+        return advantages[:, 0], advantages[:, 0] + values[:, 0]
+    return advantages, advantages + values
+
+
+def td_lambda(rewards, values, dones, last_values, gamma: float, lam: float) -> np.ndarray:
+    """TD(lambda) value targets (lambda-returns); lam=1 gives Monte Carlo, lam=0 one-step TD."""
+    return gae(rewards, values, dones, last_values, gamma, lam)[1]
+
+
+def nstep_returns(rewards, values, dones, last_values, gamma: float, n: int) -> np.ndarray:
+    """n-step targets sum_{k<n} gamma^k r[t+k] + gamma^n V(s[t+n]), cut at episode ends.
+
+    Steps whose n-step window runs past the batch bootstrap from `last_values`.
+    """
+    rewards, squeeze = _columns(rewards)
+    values, next_values, _ = _next_values(values, last_values)
+    bootstrap = np.concatenate([values, next_values[-1:]])    # V(s[0]) ... V(s[T])
+    d = _columns(dones)[0]
+    T = len(rewards)
+    t = np.arange(T)
+    end = np.minimum(t + n, T)[:, None]
+    targets = np.zeros_like(rewards)
+    scale = np.ones_like(rewards)
+    for k in range(n):
+        idx = np.minimum(t + k, T - 1)
+        live = t[:, None] + k < end
+        targets += np.where(live, scale * rewards[idx], 0.0)
+        scale = np.where(live, scale * gamma * (1.0 - d[idx]), scale)
+    targets += scale * np.take_along_axis(bootstrap, np.broadcast_to(end, rewards.shape), axis=0)
+    return targets[:, 0] if squeeze else targets
@@ -0,0 +1,114 @@
+"""
+CPU budget scheduler for concurrent training sessions.
+
+Sessions run their training iterations (an episode, a rollout, an ES generation)
+inside `scheduler.turn(name)`. At most `budget` iterations run at once; when a
+slot frees up it goes to the waiting session with the lowest weighted usage
+(slot-seconds consumed divided by priority), which gives each active session a
+share of the machine proportional to its priority. `threads_for` splits the
+thread budget the same way for sessions that size worker pools.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+class CpuScheduler:
+    def __init__(self, budget: int = None):
+        self.budget = max(1, budget or os.cpu_count() or 1)
+        self._cond = threading.Condition()
+        self._priority = {}
+        self._usage = {}
+        self._waiting = set()
+        self._holding = set()
+        self._active = set()
+
+    def register(self, name: str, priority: float = 1.0):
+        with self._cond:
+            self._priority[name] = max(1e-3, float(priority))
+            self._usage.setdefault(name, 0.0)
+
+    def unregister(self, name: str):
+        with self._cond:
+            for d in (self._priority, self._usage):
+                d.pop(name, None)
+            self._active.discard(name)
+            self._cond.notify_all()
+
+    def set_priority(self, name: str, priority: float):
+        with self._cond:
+            self._priority[name] = max(1e-3, float(priority))
+            self._cond.notify_all()
+
+    def set_budget(self, budget: int):
+        with self._cond:
+            self.budget = max(1, int(budget))
+            self._cond.notify_all()
+
+    def activate(self, name: str):
+        """Mark a session as competing for CPU (running and not paused)."""
+        with self._cond:
+            if name in self._active:
+                return
+            # Start newcomers at the current minimum weighted usage so they
+            # neither starve others nor get starved by long-running sessions.
+            others = [self._usage[n] / self._priority[n] for n in self._active]
+            floor = min(others) if others else 0.0
+            self._usage[name] = max(self._usage.get(name, 0.0), floor * self._priority[name])
+            self._active.add(name)
+            self._cond.notify_all()
+
+    def deactivate(self, name: str):
+        with self._cond:
+            self._active.discard(name)
+            self._cond.notify_all()
+
+    def threads_for(self, name: str) -> int:
+        """Integer share of the thread budget for `name` among active sessions."""
+        with self._cond:
+            names = self._active | {name}
+            total = sum(self._priority.get(n, 1.0) for n in names)
+            return max(1, int(self.budget * self._priority.get(name, 1.0) / total))
+
+    def usage(self, name: str) -> float:
+        with self._cond:
+            return self._usage.get(name, 0.0)
+
+    def _next_in_line(self):
+        """Registered waiter with the lowest weighted usage, or None when no registered session waits."""
+        # A session unregistered while waiting has no usage entry; it goes after every registered one
+        registered = [n for n in self._waiting if n in self._priority]
+        if not registered:
+            return None
+        return min(registered, key=lambda n: (self._usage[n] / self._priority[n], n))
+
+    def _may_enter(self, name: str) -> bool:
+        if len(self._holding) >= self.budget:
+            return False
+        first = self._next_in_line()
+        return first is None or first == name
+
+    @contextmanager
+    def turn(self, name: str):
+        """Hold one of the `budget` slots for the duration of the block."""
+        with self._cond:
+            self._waiting.add(name)
+            try:
+                while not self._may_enter(name):
+                    self._cond.wait()
+            finally:
+                self._waiting.discard(name)
+            self._holding.add(name)
+            # Taking a slot changes who is next in line; another slot may still be free for them
+            self._cond.notify_all()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._holding.discard(name)
+                if name in self._usage:
+                    self._usage[name] += time.perf_counter() - start
+                self._cond.notify_all()
@@ -19,9 +19,10 @@ function onReady() {
   if (btnSave) {
     btnSave.addEventListener('click', async () => {
       try {
+        // Saving runs as a background job; the result arrives as a 'job_finished' message
         const res = await window.pywebview.api.save_model()
-        console.log('Saved model:', res)
-        alert('Saved model: ' + (res.path || res.error))
+        console.log('save_model', res)
+        appendLog(res.ok ? `Saving model (job ${res.job})` : 'Save failed: ' + res.error)
       } catch (e) {
         console.error('save error', e)
         alert('Failed to save model. Are you running in the desktop app?')
@@ -33,8 +34,8 @@ function onReady() {
     btnLoad.addEventListener('click', async () => {
       try {
         const res = await window.pywebview.api.load_model()
-        console.log('Loaded model:', res)
-        alert('Loaded model: ' + (res.path || res.error))
+        console.log('load_model', res)
+        appendLog(res.ok ? `Loading model (job ${res.job})` : 'Load failed: ' + res.error)
       } catch (e) {
         console.error('load error', e)
         alert('Failed to load model. Are you running in the desktop app?')
@@ -61,8 +62,7 @@ function onReady() {
       try {
         const res = await window.pywebview.api.stop_training()
         console.log('stop_training', res)
-        appendLog('Stopped Python training')
-        refreshStatus()
+        appendLog(res.ok ? `Stopping Python training (job ${res.job})` : 'Stop failed: ' + res.error)
       } catch (e) {
         console.error(e)
         alert('Failed to stop training')
@@ -110,6 +110,13 @@ function onReady() {
       } else if (payload.type === 'training_stopped') {
         appendLog(`Training stopped at episode ${payload.episode}`)
         refreshStatus()
+      } else if (payload.type === 'job_finished') {
+        const detail = payload.error || (payload.result && payload.result.path) || ''
+        appendLog(`Job ${payload.job} ${payload.kind}: ${payload.status}${detail ? ' (' + detail + ')' : ''}`)
+        if (payload.kind === 'save_model' || payload.kind === 'load_model') {
+          alert(`${payload.kind === 'save_model' ? 'Saved' : 'Loaded'} model: ` + (detail || payload.status))
+        }
+        refreshStatus()
       } else {
         appendLog('Python: ' + JSON.stringify(payload))
       }
@@ -0,0 +1,231 @@
+"""
+Hyperparameter sweeps and population-based training over headless sessions.
+
+Every trial is a `TrainingSession` (the same loops as the desktop app) run in
+a pool worker pinned to one core. Trials train in rounds; between rounds the
+runner holds each trial's weights and optimizer state, so it can stop trials
+or copy them across workers.
+
+- `halving` samples `--trials` configurations and keeps the best 1/`--eta`
+  after each round (successive halving), so poor performers stop early.
+- `pbt` trains a fixed population. After every round the bottom quarter
+  copies weights and hyperparameters from a random top-quarter member
+  (exploit) and perturbs lr and gamma (explore).
+
+Results, per-trial reward curves (`metrics/<trial>/`) and the best
+checkpoint go to `--out`.
+
+    python sweep.py halving --trials 16 --episodes 200 --rounds 3
+    python sweep.py pbt --trials 8 --episodes 100 --rounds 10
+"""
+
+import argparse
+import json
+import math
+import multiprocessing as mp
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import torch
+
+from app import TrainingSession
+from resources import available_cores, pinned_worker_init
+from scheduler import CpuScheduler
+
+
+# Sampling spec per hyperparameter: {'log_uniform': [lo, hi]}, {'uniform': [lo, hi]} or {'choice': [...]}
+DEFAULT_SPACE = {
+    'algo': {'choice': ['reinforce', 'ppo']},
+    'lr': {'log_uniform': [1e-4, 1e-2]},
+    'gamma': {'choice': [0.95, 0.98, 0.99, 0.995]},
+    'hidden_size': {'choice': [16, 32, 64]},
+}
+SWEEP_ALGOS = ('reinforce', 'ppo', 'arena')
+
+
+def sample_config(space: dict, rng: np.random.Generator) -> dict:
+    config = {}
+    for key, spec in space.items():
+        if 'choice' in spec:
+            value = spec['choice'][int(rng.integers(len(spec['choice'])))]
+        elif 'log_uniform' in spec:
+            lo, hi = spec['log_uniform']
+            value = float(math.exp(rng.uniform(math.log(lo), math.log(hi))))
+        elif 'uniform' in spec:
+            value = float(rng.uniform(*spec['uniform']))
+        else:
+            raise ValueError(f'unknown sampling spec for {key}: {spec}')
+        config[key] = value.item() if isinstance(value, np.generic) else value
+    if config.get('algo', 'reinforce') not in SWEEP_ALGOS:
+        raise ValueError(f"sweeps support {', '.join(SWEEP_ALGOS)}")
+    return config
+
+
+def perturb(config: dict, rng: np.random.Generator) -> dict:
+    """PBT explore step: scale lr and move gamma; architecture and algorithm stay fixed."""
+    config = dict(config)
+    config['lr'] = float(np.clip(config['lr'] * rng.choice([0.8, 1.25]), 1e-5, 1e-1))
+    horizon = 1.0 / (1.0 - config['gamma'])
+    config['gamma'] = float(np.clip(1.0 - 1.0 / (horizon * rng.choice([0.8, 1.25])), 0.9, 0.999))
+    return config
+
+
+def run_trial(trial_id: str, config: dict, state, episodes: int, out_dir: str, seed: int,
+              max_seconds: float = None) -> dict:
+    """Train one trial for `episodes` more episodes, starting from `state` if given.
+
+    Returns the new state (model and optimizer), the mean reward over the
+    round's last 100 episodes and the episodes played.
+    """
+    torch.manual_seed(seed)
+    session = TrainingSession(trial_id, CpuScheduler(1), lambda payload: None, out_dir,
+                              algo=config.get('algo', 'reinforce'), lr=config['lr'], gamma=config['gamma'],
+                              hidden_size=config['hidden_size'], env=config.get('env'))
+    session.ui_delay = 0.0
+    if state is not None:
+        if any(k.startswith('value.') for k in state['model']):
+            session._use_actor_critic()
+        session.model.load_state_dict(state['model'])
+        session.optimizer.load_state_dict(state['optimizer'])
+        for group in session.optimizer.param_groups:
+            group['lr'] = config['lr']
+
+    start = time.time()
+    res = session.start()
+    if not res['ok']:
+        raise RuntimeError(res['error'])
+    while session.running and session.episode < episodes:
+        if max_seconds is not None and time.time() - start >= max_seconds:
+            break
+        time.sleep(0.02)
+    if session.running:
+        session.stop()
+    session._training_thread.join()
+    session.metrics.close()
+    return {
+        'state': {'model': session.model.state_dict(), 'optimizer': session.optimizer.state_dict()},
+        'score': float(session.reward_stats.mean),
+        'episodes': int(session.episode),
+    }
+
+
+class Trial:
+    def __init__(self, trial_id: str, config: dict):
+        self.id = trial_id
+        self.config = config
+        self.state = None
+        self.score = float('-inf')
+        self.episodes = 0
+        self.history = []
+
+    def summary(self) -> dict:
+        return {'id': self.id, 'config': self.config, 'score': self.score, 'episodes': self.episodes,
+                'history': self.history}
+
+
+class SweepRunner:
+    def __init__(self, out_dir: str, workers: int = None, episodes: int = 200, max_seconds: float = None,
+                 seed: int = 0):
+        self.out_dir = os.path.abspath(out_dir)
+        os.makedirs(self.out_dir, exist_ok=True)
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.episodes = episodes
+        self.max_seconds = max_seconds
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        self.round = 0
+        cores = available_cores()
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=pinned_worker_init,
+                                         initargs=(cores, mp.Value('i', 0)))
+
+    def close(self):
+        self._pool.shutdown()
+
+    def train_round(self, trials):
+        """Train every trial for one round in parallel and record its score."""
+        futures = [self._pool.submit(run_trial, t.id, t.config, t.state, self.episodes, self.out_dir,
+                                     self.seed + 1000 * self.round + i, self.max_seconds)
+                   for i, t in enumerate(trials)]
+        for trial, future in zip(trials, futures):
+            result = future.result()
+            trial.state = result['state']
+            trial.score = result['score']
+            trial.episodes += result['episodes']
+            trial.history.append({'round': self.round, 'score': trial.score, 'config': dict(trial.config)})
+        self.round += 1
+        ranked = sorted(trials, key=lambda t: t.score, reverse=True)
+        print(f'round {self.round}: ' + ', '.join(f'{t.id}={t.score:.2f}' for t in ranked[:5]), file=sys.stderr)
+        return ranked
+
+    def halving(self, space: dict, num_trials: int, rounds: int, eta: int = 2):
+        """Successive halving: keep the top 1/eta trials after each round."""
+        trials = [Trial(f'trial{i:03d}', sample_config(space, self.rng)) for i in range(num_trials)]
+        alive = trials
+        for r in range(rounds):
+            ranked = self.train_round(alive)
+            if r < rounds - 1:
+                alive = ranked[:max(1, math.ceil(len(ranked) / eta))]
+        return sorted(trials, key=lambda t: t.score, reverse=True)
+
+    def pbt(self, space: dict, population: int, rounds: int, fraction: float = 0.25):
+        """Population-based training: bottom `fraction` exploits the top `fraction`, then explores."""
+        trials = [Trial(f'member{i:03d}', sample_config(space, self.rng)) for i in range(population)]
+        for r in range(rounds):
+            ranked = self.train_round(trials)
+            if r == rounds - 1:
+                break
+            cut = max(1, int(len(ranked) * fraction))
+            for loser in ranked[-cut:]:
+                winner = ranked[int(self.rng.integers(cut))]
+                loser.state = {k: dict(v) for k, v in winner.state.items()}
+                loser.config = perturb(winner.config, self.rng)
+                loser.history.append({'round': self.round, 'copied_from': winner.id})
+        return sorted(trials, key=lambda t: t.score, reverse=True)
+
+    def save(self, ranked) -> dict:
+        best = ranked[0]
+        best_path = os.path.join(self.out_dir, 'best.pth')
+        torch.save(best.state['model'], best_path)
+        results = {'best': best.summary(), 'best_checkpoint': best_path, 'trials': [t.summary() for t in ranked]}
+        with open(os.path.join(self.out_dir, 'results.json'), 'w') as f:
+            json.dump(results, f, indent=2)
+        return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Hyperparameter sweeps and population-based training.')
+    parser.add_argument('mode', choices=('halving', 'pbt'))
+    parser.add_argument('--trials', type=int, default=16, help='configurations (halving) or population size (pbt)')
+    parser.add_argument('--episodes', type=int, default=200, help='episodes per trial per round')
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--eta', type=int, default=2, help='halving keeps the top 1/eta each round')
+    parser.add_argument('--space', help='JSON file with the search space (default: DEFAULT_SPACE)')
+    parser.add_argument('--workers', type=int, default=None, help='parallel trials (default: one per core)')
+    parser.add_argument('--max-seconds', type=float, default=None, help='wall-clock cap per trial round')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default='sweeps/latest')
+    args = parser.parse_args(argv)
+
+    space = DEFAULT_SPACE
+    if args.space:
+        with open(args.space, 'r', encoding='utf-8') as f:
+            space = json.load(f)
+
+    runner = SweepRunner(args.out, args.workers, args.episodes, args.max_seconds, args.seed)
+    try:
+        if args.mode == 'halving':
+            ranked = runner.halving(space, args.trials, args.rounds, args.eta)
+        else:
+            ranked = runner.pbt(space, args.trials, args.rounds)
+        results = runner.save(ranked)
+    finally:
+        runner.close()
+    print(json.dumps({'best': results['best'], 'best_checkpoint': results['best_checkpoint']}, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
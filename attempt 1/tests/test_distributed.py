@@ -0,0 +1,93 @@
+import socket
+import struct
+
+import numpy as np
+import pytest
+import torch
+
+from app import PolicyNet
+from distributed import (HEARTBEAT, HELLO, TRAJ_HEADER, TRAJECTORY, LearnerServer, decode_trajectories,
+                         encode_trajectories, main, recv_frame, send_frame)
+
+
+def _episodes(lengths=(3, 5), dim=8, num_actions=4, seed=0):
+    rng = np.random.default_rng(seed)
+    return [(rng.standard_normal((n, dim)).astype(np.float32), rng.integers(num_actions, size=n),
+             rng.standard_normal(n).astype(np.float32)) for n in lengths]
+
+
+def test_round_trip():
+    episodes = _episodes()
+    batch = decode_trajectories(encode_trajectories(7, episodes), obs_size=8, num_actions=4)
+    assert batch['version'] == 7
+    assert batch['lengths'].tolist() == [3, 5]
+    np.testing.assert_array_equal(batch['obs'], np.concatenate([e[0] for e in episodes]))
+    np.testing.assert_array_equal(batch['actions'], np.concatenate([e[1] for e in episodes]))
+    np.testing.assert_array_equal(batch['rewards'], np.concatenate([e[2] for e in episodes]))
+
+
+def _with_lengths(payload, lengths):
+    n = len(lengths)
+    return payload[:TRAJ_HEADER.size] + np.asarray(lengths, '<i4').tobytes() + payload[TRAJ_HEADER.size + 4 * n:]
+
+
+@pytest.mark.parametrize('mangle', [
+    lambda p: p[:10],
+    lambda p: p[:-1],
+    lambda p: p + b'\0',
+    lambda p: TRAJ_HEADER.pack(0, 2, 8, 10 ** 6) + p[TRAJ_HEADER.size:],
+    lambda p: _with_lengths(p, [4, 5]),
+    lambda p: _with_lengths(p, [-1, 9]),
+    lambda p: TRAJ_HEADER.pack(0, 0, 0, 8),
+], ids=['short header', 'truncated', 'trailing bytes', 'huge dim', 'lengths sum', 'negative length', 'empty'])
+def test_malformed_payload(mangle):
+    with pytest.raises(ValueError):
+        decode_trajectories(mangle(encode_trajectories(0, _episodes())))
+
+
+def test_payload_that_does_not_fit_the_model():
+    payload = encode_trajectories(0, _episodes())
+    with pytest.raises(ValueError, match='observation size'):
+        decode_trajectories(payload, obs_size=6)
+    with pytest.raises(ValueError, match='out of range'):
+        decode_trajectories(payload, num_actions=2)
+    obs, actions, rewards = _episodes(lengths=(4,))[0]
+    rewards[2] = np.nan
+    with pytest.raises(ValueError, match='non-finite'):
+        decode_trajectories(encode_trajectories(0, [(obs, actions, rewards)]))
+
+
+def test_learner_drops_malformed_batches_and_sends_heartbeats():
+    model = PolicyNet(8, 16, 4)
+    server = LearnerServer(model, torch.optim.Adam(model.parameters()), port=0, heartbeat=0.05).start()
+    try:
+        with socket.create_connection(('127.0.0.1', server.port), timeout=5) as sock:
+            send_frame(sock, HELLO, b'test')
+            kinds = [recv_frame(sock)[0] for _ in range(4)]
+            assert HEARTBEAT in kinds
+            send_frame(sock, TRAJECTORY, encode_trajectories(0, _episodes(num_actions=4))[:-3])
+            with pytest.raises((ConnectionError, OSError, struct.error)):
+                while True:
+                    recv_frame(sock)
+        assert server.dropped_malformed == 1
+        assert server.next_batch(timeout=0.1) is None
+    finally:
+        server.stop()
+
+
+def test_learner_load_folds_saved_normalizer(tmp_path):
+    from evaluate import policy_from_state_dict
+    from normalizer import RunningNormalizer
+
+    norm = RunningNormalizer(8)
+    norm.update(np.random.default_rng(0).standard_normal((100, 8)) * 3.0 + 1.0)
+    state = dict(PolicyNet(8, 16, 4).state_dict(), **norm.state_dict())
+    torch.save(state, tmp_path / 'norm.pth')
+
+    main(['learner', '--port', '0', '--updates', '0', '--load', str(tmp_path / 'norm.pth'),
+          '--save', str(tmp_path / 'out.pth')])
+    saved = torch.load(tmp_path / 'out.pth')
+    expected = policy_from_state_dict(state).state_dict()
+    assert not any(k.startswith('obs_norm.') for k in saved)
+    for k, v in expected.items():
+        torch.testing.assert_close(saved[k], v)
@@ -0,0 +1,37 @@
+import pytest
+import torch
+
+from app import PolicyNet
+from evaluate import evaluate, main, run_episodes, summarize
+
+
+def test_summarize_counts_outcomes():
+    results = [(0, 1.0, 10, 'npc'), (1, -1.0, 20, 'player'), (2, 0.0, 30, 'timeout'), (3, 2.0, 40, 'npc')]
+    summary = summarize(results)
+    assert summary['episodes'] == 4
+    assert summary['win_rate'] == 0.5
+    assert summary['loss_rate'] == 0.25
+    assert summary['timeout_rate'] == 0.25
+    assert summary['length']['mean'] == 25.0
+
+
+def test_summarize_empty_results():
+    summary = summarize([])
+    assert summary['episodes'] == 0
+    assert summary['win_rate'] == 0.0
+    assert summary['reward'] is None
+
+
+def test_evaluate_rejects_zero_episodes(tmp_path):
+    path = tmp_path / 'model.pth'
+    torch.save(PolicyNet(8, 4, 4).state_dict(), path)
+    with pytest.raises(ValueError):
+        evaluate(str(path), episodes=0, workers=1)
+    with pytest.raises(SystemExit):
+        main([str(path), '--episodes', '0'])
+
+
+def test_run_episodes_is_seeded():
+    torch.manual_seed(0)
+    model = PolicyNet(8, 4, 4)
+    assert run_episodes(model, [3, 4], max_steps=50) == run_episodes(model, [3, 4], max_steps=50)
@@ -0,0 +1,17 @@
+from app import Game
+
+
+def test_snapshot_restores_self_play_reward():
+    game = Game(seed=5)
+    for t in range(40):
+        game.step(t % 4, player_action=3)
+    snap = game.snapshot()
+    expected = (game.totalReward, game.player_reward, game.projectiles, game.player, game.npc)
+
+    other = Game(seed=99)
+    other.restore(snap)
+    assert (other.totalReward, other.player_reward, other.projectiles, other.player, other.npc) == expected
+    # Both games continue identically, self-play reward included
+    for _ in range(20):
+        assert game.step(2, player_action=3) == other.step(2, player_action=3)
+        assert game.player_reward == other.player_reward
@@ -0,0 +1,74 @@
+import threading
+
+import pytest
+
+from jobs import JobManager
+
+
+@pytest.fixture
+def manager():
+    pushed = []
+    jobs = JobManager(pushed.append, workers=2)
+    jobs.pushed = pushed
+    yield jobs
+    jobs.shutdown()
+
+
+def test_same_key_jobs_run_in_submission_order(manager):
+    order, release = [], threading.Event()
+    first = manager.submit('slow', lambda: (release.wait(5), order.append(1)), key='s')
+    ids = [manager.submit('fast', order.append, n, key='s') for n in (2, 3, 4)]
+    release.set()
+    for job_id in [first] + ids:
+        assert manager.wait(job_id, timeout=5)['status'] == 'done'
+    assert order == [1, 2, 3, 4]
+
+
+def test_blocked_key_does_not_stall_other_keys(manager):
+    release = threading.Event()
+    manager.submit('slow', release.wait, 5, key='a')
+    # Both of these wait behind the slow job; neither may take the second worker
+    waiting = [manager.submit('queued', lambda: None, key='a') for _ in range(2)]
+    other = manager.submit('other', lambda: 'ok', key='b')
+    assert manager.wait(other, timeout=2)['result'] == 'ok'
+    assert [manager.get(job_id)['status'] for job_id in waiting] == ['queued', 'queued']
+    release.set()
+    assert all(manager.wait(job_id, timeout=5)['status'] == 'done' for job_id in waiting)
+
+
+def test_cancel_queued_job_is_skipped_and_pushed(manager):
+    release, ran = threading.Event(), []
+    blocker = manager.submit('slow', release.wait, 5, key='s')
+    queued = manager.submit('never', ran.append, 1, key='s')
+    after = manager.submit('after', ran.append, 2, key='s')
+    assert manager.cancel(queued)['status'] == 'cancelled'
+    release.set()
+    assert manager.wait(after, timeout=5)['status'] == 'done'
+    assert manager.wait(blocker, timeout=5)['status'] == 'done'
+    assert ran == [2]
+    finished = [msg for msg in manager.pushed if msg['job'] == queued]
+    assert len(finished) == 1 and finished[0]['status'] == 'cancelled'
+
+
+def test_cancel_running_job_reports_real_outcome(manager):
+    started, release = threading.Event(), threading.Event()
+    job = manager.submit('slow', lambda: (started.set(), release.wait(5)) and 'saved')
+    assert started.wait(5)
+    assert manager.cancel(job)['status'] == 'running'
+    release.set()
+    assert manager.wait(job, timeout=5)['status'] == 'done'
+    assert manager.get(job)['result'] == 'saved'
+
+
+def test_job_finished_push_carries_outcome(manager):
+    ok = manager.submit('ok', lambda: {'ok': True, 'path': 'm.pth'})
+    refused = manager.submit('refused', lambda: {'ok': False, 'error': 'busy'})
+    broken = manager.submit('broken', lambda: 1 / 0)
+    for job_id in (ok, refused, broken):
+        manager.wait(job_id, timeout=5)
+    pushed = {msg['job']: msg for msg in manager.pushed}
+    assert all(msg['type'] == 'job_finished' for msg in pushed.values())
+    assert pushed[ok]['kind'] == 'ok' and pushed[ok]['status'] == 'done'
+    assert pushed[ok]['result'] == {'ok': True, 'path': 'm.pth'}
+    assert pushed[refused]['status'] == 'failed' and pushed[refused]['error'] == 'busy'
+    assert pushed[broken]['status'] == 'failed' and 'division' in pushed[broken]['error']
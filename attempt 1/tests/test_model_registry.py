@@ -0,0 +1,39 @@
+import threading
+
+import torch
+
+from app import JSApi, PolicyNet
+from model_registry import load_policy_file
+
+
+def test_npc_actions_never_load_inline(tmp_path):
+    torch.save(PolicyNet(8, 16, 4).state_dict(), tmp_path / 'sniper.pth')
+    api = JSApi(metrics_dir=str(tmp_path / 'metrics'))
+    release, loads = threading.Event(), []
+
+    def slow_loader(path):
+        loads.append(threading.current_thread().name)
+        release.wait(5)
+        return load_policy_file(path)
+
+    api.models.loader = slow_loader
+    job = api.register_model('sniper', str(tmp_path / 'sniper.pth'))['job']
+    obs = [[0.0] * 8, [1.0] * 8]
+
+    res = api.get_npc_actions({'sniper': obs})
+    assert res['ok'] and res['actions'] == {} and res['loading'] == ['sniper']
+    # Asking again while the model loads reuses the pending job
+    api.get_npc_actions({'sniper': obs})
+    assert api._warming['sniper'] == job
+
+    release.set()
+    assert api.jobs.wait(job, timeout=10)['status'] == 'done'
+    res = api.get_npc_actions({'sniper': obs})
+    assert res['loading'] == [] and len(res['actions']['sniper']) == 2
+    assert loads and all(name.startswith('jsapi-job') for name in loads)
+
+
+def test_npc_actions_for_unknown_archetype_fail(tmp_path):
+    api = JSApi(metrics_dir=str(tmp_path / 'metrics'))
+    res = api.get_npc_actions({'ghost': [[0.0] * 8]})
+    assert not res['ok'] and 'ghost' in res['error']
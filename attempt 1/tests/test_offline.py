@@ -0,0 +1,57 @@
+import json
+import threading
+
+import numpy as np
+import pytest
+
+import offline
+from app import TrainingSession
+from scheduler import CpuScheduler
+
+
+def _store(path, episodes=3, steps=20, seed=0):
+    rng = np.random.default_rng(seed)
+    trajectories = [{'states': rng.standard_normal((steps + 1, 8)).tolist(),
+                     'actions': rng.integers(4, size=steps).tolist(),
+                     'rewards': rng.standard_normal(steps).tolist()} for _ in range(episodes)]
+    with open(path, 'w') as f:
+        json.dump({'trajectories': trajectories}, f)
+    return str(path)
+
+
+@pytest.fixture
+def session(tmp_path):
+    return TrainingSession('test', CpuScheduler(budget=1), lambda payload: None, str(tmp_path), normalize=True)
+
+
+def test_offline_training_replaces_the_normalizer_only_on_success(session, tmp_path):
+    live = session.obs_norm
+    res = session.train_offline([str(tmp_path / 'missing.json')], epochs=1)
+    assert not res['ok']
+    assert session.obs_norm is live and live.count == 0
+
+    res = session.train_offline([_store(tmp_path / 'data.json')], epochs=1)
+    assert res['ok'] and res['transitions'] == 60
+    assert session.obs_norm is not live and session.obs_norm.count == 60
+    assert live.count == 0
+
+
+def test_start_is_refused_while_offline_training_runs(session, tmp_path, monkeypatch):
+    entered, release = threading.Event(), threading.Event()
+
+    def slow_train(*args, **kwargs):
+        entered.set()
+        release.wait(5)
+        return []
+
+    monkeypatch.setattr(offline, 'train_offline', slow_train)
+    worker = threading.Thread(target=session.train_offline, args=([_store(tmp_path / 'data.json')],))
+    worker.start()
+    try:
+        assert entered.wait(5)
+        res = session.start('reinforce')
+        assert not res['ok'] and 'offline' in res['error']
+        assert not session.running
+    finally:
+        release.set()
+        worker.join()
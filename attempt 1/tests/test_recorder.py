@@ -0,0 +1,105 @@
+import os
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app import Game
+from recorder import EpisodeRecorder, Recording, dodge_frame, game_frame
+
+
+def _frames(count, seed=0):
+    # Lengths change every few frames, like a projectile count going up and down
+    rng = np.random.default_rng(seed)
+    return [rng.standard_normal(4 + 5 * (i // 7 % 3)).astype(np.float32) for i in range(count)]
+
+
+def test_round_trip_and_seek(tmp_path):
+    path = str(tmp_path / 'run.rec')
+    frames = _frames(150)
+    with EpisodeRecorder(path, keyframe_interval=16, meta={'session': 'test'}) as rec:
+        rec.begin_episode(episode=1)
+        for f in frames[:100]:
+            rec.append(f)
+        rec.end_episode(reward=1.5)
+        rec.begin_episode(episode=2)
+        for f in frames[100:]:
+            rec.append(f)
+        rec.end_episode(reward=-1.0)
+
+    replay = Recording(path)
+    assert len(replay) == 150
+    assert replay.meta == {'session': 'test'}
+    assert [(e['start'], e['length'], e['reward']) for e in replay.episodes] == [(0, 100, 1.5), (100, 50, -1.0)]
+    for i in (149, 0, 77, 16, 15, -1):
+        np.testing.assert_array_equal(replay.frame(i), frames[i])
+    np.testing.assert_array_equal(np.concatenate(list(replay.frames(3, 40, 4))),
+                                  np.concatenate(frames[3:40:4]))
+    with pytest.raises(IndexError):
+        replay.frame(150)
+    replay.close()
+
+
+def test_recording_cut_short_is_still_readable(tmp_path):
+    path = str(tmp_path / 'crash.rec')
+    frames = _frames(50)
+    rec = EpisodeRecorder(path, keyframe_interval=16)
+    for f in frames:
+        rec.append(f)
+    rec.close()
+    # Lose the footer and half of the last chunk, as if the process died while writing it
+    size = os.path.getsize(path)
+    with open(path, 'r+b') as f:
+        f.truncate(size - 200)
+
+    replay = Recording(path)
+    assert len(replay) == 48
+    assert replay.episodes == []
+    np.testing.assert_array_equal(replay.frame(47), frames[47])
+    replay.close()
+
+
+def test_game_frames_decode(tmp_path):
+    path = str(tmp_path / 'game.rec')
+    game = Game(seed=3)
+    game.reset()
+    expected = []
+    with EpisodeRecorder(path) as rec:
+        for t in range(40):
+            reward, done, _ = game.step(t % 4)
+            rec.append(game_frame(game, t % 4, reward))
+            expected.append((t % 4, game.npc['x'], len(game.projectiles)))
+            if done:
+                break
+    replay = Recording(path)
+    for i, (action, npc_x, projectiles) in enumerate(expected):
+        state = replay.decode(replay.frame(i))
+        assert state['action'] == action
+        assert state['npc']['x'] == pytest.approx(npc_x, rel=1e-6)
+        assert len(state['projectiles']) == projectiles
+    replay.close()
+
+
+def test_dodge_frames_decode(tmp_path):
+    path = str(tmp_path / 'dodge.rec')
+    env = SimpleNamespace(npc=np.array([420.0, 300.0]),
+                          bullets=np.array([[10.0, 20.0, 2.5, -1.0], [5.0, 6.0, 0.0, 3.0]]))
+    with EpisodeRecorder(path, kind='dodge') as rec:
+        rec.append(dodge_frame(env, 2, 0.35, False))
+        env.bullets = env.bullets[:0]
+        rec.append(dodge_frame(env, 1, -10.0, True))
+
+    replay = Recording(path)
+    assert replay.kind == 'dodge'
+    first, last = replay.decode(replay.frame(0)), replay.decode(replay.frame(1))
+    assert first['action'] == 2 and not first['hit']
+    assert first['npc'] == {'x': 420.0, 'y': 300.0}
+    assert first['bullets'][0] == {'x': 10.0, 'y': 20.0, 'vx': 2.5, 'vy': -1.0}
+    assert len(first['bullets']) == 2
+    assert last['hit'] and last['reward'] == -10.0 and last['bullets'] == []
+    replay.close()
+
+
+def test_unknown_kind_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        EpisodeRecorder(str(tmp_path / 'x.rec'), kind='nope')
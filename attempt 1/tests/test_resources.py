@@ -0,0 +1,42 @@
+import os
+import threading
+
+import pytest
+
+import resources
+from resources import ResourceManager, available_cores
+
+
+@pytest.fixture
+def affinity_calls(monkeypatch):
+    calls = []
+    monkeypatch.setattr(os, 'sched_setaffinity', lambda pid, cores: calls.append((threading.get_ident(), set(cores))),
+                        raising=False)
+    monkeypatch.setattr(resources, 'set_thread_limits', lambda threads: None)
+    return calls
+
+
+def test_configure_learner_does_not_pin_the_process(affinity_calls):
+    manager = ResourceManager(cores=list(range(8)))
+    assert manager.configure_learner() == [0, 1]
+    assert affinity_calls == []
+
+
+def test_pin_learner_thread_pins_only_the_calling_thread(affinity_calls):
+    manager = ResourceManager(cores=list(range(8)))
+    manager.configure_learner()
+    idents = []
+
+    def learner():
+        idents.append(threading.get_ident())
+        manager.pin_learner_thread()
+
+    thread = threading.Thread(target=learner)
+    thread.start()
+    thread.join()
+    assert affinity_calls == [(idents[0], {0, 1})]
+
+
+def test_available_cores_is_the_startup_mask(monkeypatch):
+    monkeypatch.setattr(os, 'sched_getaffinity', lambda pid: {0}, raising=False)
+    assert available_cores() == resources._STARTUP_CORES
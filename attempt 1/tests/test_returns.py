@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from returns import WIDE, discounted_cumsum, gae, nstep_returns, td_lambda
+
+
+def _ref_cumsum(x, gamma, dones, last):
+    y, carry = np.zeros_like(x), last
+    for t in range(len(x) - 1, -1, -1):
+        carry = x[t] + gamma * (1.0 - dones[t]) * carry
+        y[t] = carry
+    return y
+
+
+def _ref_gae(rewards, values, dones, last, gamma, lam):
+    adv, running = np.zeros_like(rewards), np.zeros_like(last)
+    for t in range(len(rewards) - 1, -1, -1):
+        next_value = values[t + 1] if t + 1 < len(rewards) else last
+        not_done = 1.0 - dones[t]
+        delta = rewards[t] + gamma * next_value * not_done - values[t]
+        running = delta + gamma * lam * not_done * running
+        adv[t] = running
+    return adv
+
+
+def _ref_nstep(rewards, values, dones, last, gamma, n):
+    T = len(rewards)
+    out = np.zeros_like(rewards)
+    for t in range(T):
+        total, scale = np.zeros_like(last), np.ones_like(last)
+        for k in range(min(n, T - t)):
+            total = total + scale * rewards[t + k]
+            scale = scale * gamma * (1.0 - dones[t + k])
+        end = min(t + n, T)
+        out[t] = total + scale * (values[end] if end < T else last)
+    return out
+
+
+def _batch(T, N, seed=0, p_done=0.05):
+    rng = np.random.default_rng(seed)
+    return (rng.standard_normal((T, N)), rng.standard_normal((T, N)),
+            (rng.random((T, N)) < p_done).astype(np.float64), rng.standard_normal(N))
+
+
+@pytest.mark.parametrize('T,N,chunk', [(1, 1, 512), (37, 3, 8), (1000, 4, 512), (300, WIDE + 5, 512)],
+                         ids=['single step', 'chunk boundaries', 'long', 'wide'])
+@pytest.mark.parametrize('gamma', [0.0, 0.5, 0.99, 1.0])
+def test_discounted_cumsum_matches_loop(T, N, chunk, gamma):
+    x, _, dones, last = _batch(T, N)
+    expected = _ref_cumsum(x, gamma, dones, last)
+    np.testing.assert_allclose(discounted_cumsum(x, gamma, dones, last, chunk=chunk), expected,
+                               rtol=1e-9, atol=1e-9)
+
+
+def test_discounted_cumsum_small_gamma_uses_short_chunks():
+    # gamma^512 underflows here, so the chunk size must shrink for the scaled sums to stay finite
+    x, _, dones, last = _batch(2000, 2, p_done=0.001)
+    np.testing.assert_allclose(discounted_cumsum(x, 0.3, dones, last), _ref_cumsum(x, 0.3, dones, last),
+                               rtol=1e-9, atol=1e-9)
+
+
+def test_discounted_cumsum_one_dimensional():
+    x, _, dones, _ = _batch(50, 1)
+    y = discounted_cumsum(x[:, 0], 0.9, dones[:, 0])
+    assert y.shape == (50,)
+    np.testing.assert_allclose(y, _ref_cumsum(x, 0.9, dones, np.zeros(1))[:, 0], rtol=1e-12)
+
+
+@pytest.mark.parametrize('N', [3, WIDE + 1])
+def test_gae_and_td_lambda_match_loop(N):
+    rewards, values, dones, last = _batch(200, N, seed=1)
+    advantages, targets = gae(rewards, values, dones, last, 0.99, 0.95)
+    expected = _ref_gae(rewards, values, dones, last, 0.99, 0.95)
+    np.testing.assert_allclose(advantages, expected, rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(targets, expected + values, rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(td_lambda(rewards, values, dones, last, 0.99, 0.95), targets)
+
+
+@pytest.mark.parametrize('n', [1, 3, 250])
+def test_nstep_returns_match_loop(n):
+    rewards, values, dones, last = _batch(120, 4, seed=2, p_done=0.1)
+    np.testing.assert_allclose(nstep_returns(rewards, values, dones, last, 0.97, n),
+                               _ref_nstep(rewards, values, dones, last, 0.97, n), rtol=1e-9, atol=1e-9)
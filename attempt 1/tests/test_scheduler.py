@@ -0,0 +1,102 @@
+import threading
+import time
+
+from scheduler import CpuScheduler
+
+
+def _hold(scheduler, name, entered, release, errors):
+    try:
+        with scheduler.turn(name):
+            entered.set()
+            release.wait(5)
+    except Exception as e:
+        errors.append(e)
+        entered.set()
+
+
+def _start(scheduler, name, errors):
+    entered, release = threading.Event(), threading.Event()
+    thread = threading.Thread(target=_hold, args=(scheduler, name, entered, release, errors), daemon=True)
+    thread.start()
+    return thread, entered, release
+
+
+def _wait_for_waiters(scheduler, count):
+    deadline = time.time() + 5
+    while time.time() < deadline:
+        with scheduler._cond:
+            if len(scheduler._waiting) >= count:
+                return
+        time.sleep(0.005)
+    raise AssertionError('waiters did not queue up')
+
+
+def test_budget_allows_concurrent_turns():
+    scheduler, errors = CpuScheduler(budget=2), []
+    for name in ('a', 'b', 'c'):
+        scheduler.register(name)
+    held = [_start(scheduler, name, errors) for name in ('a', 'b')]
+    assert all(entered.wait(2) for _, entered, _ in held)
+    thread_c, entered_c, release_c = _start(scheduler, 'c', errors)
+    assert not entered_c.wait(0.1)
+    held[0][2].set()
+    assert entered_c.wait(2)
+    for _, _, release in held[1:] + [(thread_c, entered_c, release_c)]:
+        release.set()
+    assert errors == []
+
+
+def test_raising_the_budget_admits_every_waiter():
+    # Several sessions waiting at once: once the budget grows, each one that takes a slot
+    # must wake the next, or the later ones sleep while slots are free.
+    for _ in range(20):
+        scheduler, errors = CpuScheduler(budget=1), []
+        names = ['holder', 'w1', 'w2', 'w3']
+        for name in names:
+            scheduler.register(name)
+        holder = _start(scheduler, 'holder', errors)
+        assert holder[1].wait(2)
+        waiters = [_start(scheduler, name, errors) for name in names[1:]]
+        _wait_for_waiters(scheduler, 3)
+        scheduler.set_budget(4)
+        assert all(entered.wait(2) for _, entered, _ in waiters)
+        for _, _, release in [holder] + waiters:
+            release.set()
+        assert errors == []
+
+
+def test_lowest_weighted_usage_goes_first():
+    scheduler, errors = CpuScheduler(budget=1), []
+    for name in ('holder', 'busy', 'idle'):
+        scheduler.register(name)
+    scheduler._usage['busy'] = 10.0
+    holder = _start(scheduler, 'holder', errors)
+    assert holder[1].wait(2)
+    busy = _start(scheduler, 'busy', errors)
+    idle = _start(scheduler, 'idle', errors)
+    _wait_for_waiters(scheduler, 2)
+    holder[2].set()
+    assert idle[1].wait(2)
+    assert not busy[1].is_set()
+    idle[2].set()
+    assert busy[1].wait(2)
+    busy[2].set()
+    assert errors == []
+
+
+def test_unregistering_a_waiter_does_not_break_the_others():
+    scheduler, errors = CpuScheduler(budget=1), []
+    for name in ('holder', 'gone', 'stays'):
+        scheduler.register(name)
+    holder = _start(scheduler, 'holder', errors)
+    assert holder[1].wait(2)
+    gone = _start(scheduler, 'gone', errors)
+    stays = _start(scheduler, 'stays', errors)
+    _wait_for_waiters(scheduler, 2)
+    scheduler.unregister('gone')
+    holder[2].set()
+    assert stays[1].wait(2)
+    stays[2].set()
+    assert gone[1].wait(2)
+    gone[2].set()
+    assert errors == []
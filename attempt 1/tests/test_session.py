@@ -0,0 +1,47 @@
+import threading
+
+import pytest
+
+from app import TrainingSession
+from scheduler import CpuScheduler
+
+
+@pytest.fixture
+def scheduler():
+    return CpuScheduler(budget=1)
+
+
+@pytest.mark.parametrize('algo', ['es', 'distributed'])
+def test_normalizing_session_refuses_raw_observation_algorithms(scheduler, tmp_path, algo):
+    session = TrainingSession('norm', scheduler, lambda payload: None, str(tmp_path), normalize=True)
+    res = session.start(algo)
+    assert not res['ok'] and 'normalization' in res['error']
+    assert not session.running
+
+
+def test_recreating_a_session_waits_for_its_removal(tmp_path, monkeypatch):
+    from app import JSApi
+
+    api = JSApi(metrics_dir=str(tmp_path / 'metrics'))
+    release = threading.Event()
+    stop = TrainingSession.stop
+
+    def slow_stop(self, timeout=5):
+        release.wait(5)
+        return stop(self, timeout)
+
+    monkeypatch.setattr(TrainingSession, 'stop', slow_stop)
+    assert api.create_session('x')['ok']
+    api.sessions['x'].ui_delay = 0.0
+    assert api.start_session('x')['ok']
+    job = api.remove_session('x')['job']
+
+    res = api.create_session('x')
+    assert not res['ok'] and 'being removed' in res['error']
+    release.set()
+    assert api.jobs.wait(job, timeout=10)['status'] == 'done'
+
+    assert api.create_session('x')['ok']
+    api.sessions['x'].ui_delay = 0.0
+    assert api.start_session('x')['ok']
+    assert api.sessions['x'].stop()['ok']
@@ -0,0 +1,99 @@
+"""
+Headless training entry point.
+
+Runs the same training loops as the desktop app (`JSApi.start_training`)
+without a window or UI pacing, then saves the checkpoint.
+
+    python train.py --algo ppo --episodes 5000 --save model.pth
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from app import JSApi
+from normalizer import RunningNormalizer
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Train the combat NPC without the desktop UI.')
+    parser.add_argument('--algo', choices=('reinforce', 'ppo', 'es', 'arena'), default='reinforce')
+    parser.add_argument('--episodes', type=int, default=1000, help='stop after this many finished episodes')
+    parser.add_argument('--max-seconds', type=float, default=None, help='wall-clock limit')
+    parser.add_argument('--load', help='checkpoint to resume from')
+    parser.add_argument('--save', default=None, help='checkpoint path (default: model.pth next to app.py)')
+    parser.add_argument('--threads', type=int, default=None,
+                        help='torch/BLAS threads for the learner (default: a quarter of the cores)')
+    parser.add_argument('--npcs', type=int, default=4, help='NPCs sharing the policy with --algo arena')
+    parser.add_argument('--players', type=int, default=2, help='scripted players with --algo arena')
+    parser.add_argument('--record', action='store_true',
+                        help='write every episode to recordings/ (--algo reinforce only)')
+    parser.add_argument('--normalize', action='store_true',
+                        help='running observation normalization, saved with the checkpoint (reinforce, ppo, arena)')
+    parser.add_argument('--log-every', type=float, default=5.0, help='seconds between status lines')
+    parser.add_argument('--memory-interval', type=float, default=60.0, help='seconds between memory samples')
+    parser.add_argument('--trace-malloc', action='store_true',
+                        help='also record top Python allocation sites (slows training)')
+    parser.add_argument('--memory-report', default=None, help='write the final memory report to this JSON file')
+    args = parser.parse_args(argv)
+
+    api = JSApi(learner_threads=args.threads)
+    api.configure_memory_monitor(args.memory_interval, args.trace_malloc)
+    session = api.sessions['default']
+    session.ui_delay = 0.0
+    session.num_npcs, session.num_players = args.npcs, args.players
+    session.record = args.record
+    if args.normalize:
+        session.normalize = True
+        session.obs_norm = RunningNormalizer(8)
+    if args.load:
+        res = session.load_model(args.load)
+        if not res['ok']:
+            print(f"Could not load {args.load}: {res['error']}", file=sys.stderr)
+            return 1
+
+    res = api.start_training(args.algo)
+    if not res['ok']:
+        print(res['error'], file=sys.stderr)
+        return 1
+
+    start = time.time()
+    next_log = start + args.log_every
+    try:
+        while session.running and session.episode < args.episodes:
+            if args.max_seconds is not None and time.time() - start >= args.max_seconds:
+                break
+            time.sleep(0.05)
+            if time.time() >= next_log:
+                s = api.get_status()
+                mem = api.memory.report(max_points=1)
+                line = f"[{time.time() - start:7.1f}s] episode {s['episode']} | avg reward {s['avg_reward']:.3f}"
+                if mem['latest'] is not None:
+                    line += f" | rss {mem['latest']['rss_bytes'] / 2**20:.0f} MiB, {mem['latest']['tensors']} tensors"
+                if mem['growth']['suspect']:
+                    line += f" | memory growing ({mem['growth']['rss_slope_bytes_per_hour'] / 2**20:.0f} MiB/h)"
+                print(line)
+                next_log += args.log_every
+    except KeyboardInterrupt:
+        print('Interrupted; saving checkpoint.')
+    finally:
+        if session.running:
+            session.stop()
+        # stop() only waits a few seconds; a long ES generation may still be finishing.
+        if session._training_thread is not None:
+            session._training_thread.join()
+
+    res = session.save_model(args.save or os.path.abspath(session.model_path))
+    if args.memory_report:
+        api.memory.sample()
+        with open(args.memory_report, 'w', encoding='utf-8') as f:
+            json.dump(api.memory.report(), f, indent=1)
+    s = api.get_status()
+    print(f"Finished after {s['episode']} episodes, avg reward {s['avg_reward']:.3f}; saved to {res.get('path')}")
+    return 0 if res['ok'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
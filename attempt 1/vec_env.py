@@ -0,0 +1,246 @@
+"""
+Gym-style vector environments around the Python `Game`.
+
+`GameEnv` adapts a single `Game` to the usual `reset(seed) -> obs, info` and
+`step(action) -> obs, reward, terminated, truncated, info` signature.
+`SyncVectorEnv` steps N of them in-process; `AsyncVectorEnv` spreads them over
+worker processes that write observations straight into a shared-memory block,
+so only actions and scalars cross the pipes.
+
+Both vector envs auto-reset finished episodes. The observation returned for a
+finished slot is the first observation of its next episode; the terminal one is
+in `info['final_observation']` and `info['done']` marks which slots finished.
+"""
+
+import functools
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from app import Game
+from resources import pin_process, set_thread_limits
+
+
+class GameEnv:
+    """Single `Game` with a Gym-style API and NumPy observations."""
+
+    observation_size = 8
+    num_actions = 4
+
+    def __init__(self, seed=None, max_steps: int = 1000, rewards=None):
+        self.game = Game(seed=seed, rewards=rewards)
+        self.max_steps = max_steps
+        self.t = 0
+        self.episode_return = 0.0
+
+    def reset(self, seed=None):
+        self.t = 0
+        self.episode_return = 0.0
+        state = self.game.reset(seed=seed)
+        return np.asarray(state, dtype=np.float32), {}
+
+    def step(self, action: int):
+        reward, terminated, state = self.game.step(int(action))
+        self.t += 1
+        self.episode_return += reward
+        truncated = not terminated and self.t >= self.max_steps
+        info = {}
+        if terminated or truncated:
+            info = {'winner': self.game.winner, 'episode_return': self.episode_return, 'episode_length': self.t}
+        return np.asarray(state, dtype=np.float32), float(reward), bool(terminated), bool(truncated), info
+
+
+def _seed_list(seed, n):
+    if seed is None:
+        return [None] * n
+    if isinstance(seed, int):
+        return [seed + i for i in range(n)]
+    return list(seed)
+
+
+def _empty_info(n, obs_size):
+    return {
+        'done': np.zeros(n, dtype=bool),
+        'final_observation': np.zeros((n, obs_size), dtype=np.float32),
+        'episode_return': np.zeros(n, dtype=np.float64),
+        'episode_length': np.zeros(n, dtype=np.int64),
+        'winner': np.full(n, None, dtype=object),
+    }
+
+
+def _step_envs(envs, actions, obs, rewards, terminated, truncated, info):
+    """Step `envs` into preallocated output arrays, auto-resetting finished ones."""
+    for i, env in enumerate(envs):
+        o, rewards[i], terminated[i], truncated[i], ep = env.step(actions[i])
+        if terminated[i] or truncated[i]:
+            info['done'][i] = True
+            info['final_observation'][i] = o
+            info['episode_return'][i] = ep['episode_return']
+            info['episode_length'][i] = ep['episode_length']
+            info['winner'][i] = ep['winner']
+            o, _ = env.reset()
+        obs[i] = o
+
+
+class SyncVectorEnv:
+    """Steps a list of environments sequentially in the calling process."""
+
+    def __init__(self, env_fns):
+        self.envs = [fn() for fn in env_fns]
+        self.num_envs = len(self.envs)
+        self.observation_size = self.envs[0].observation_size
+        self.num_actions = self.envs[0].num_actions
+        self._obs = np.zeros((self.num_envs, self.observation_size), dtype=np.float32)
+
+    def reset(self, seed=None):
+        for i, (env, s) in enumerate(zip(self.envs, _seed_list(seed, self.num_envs))):
+            self._obs[i], _ = env.reset(seed=s)
+        return self._obs.copy(), {}
+
+    def step(self, actions):
+        actions = np.asarray(actions)
+        rewards = np.zeros(self.num_envs, dtype=np.float64)
+        terminated = np.zeros(self.num_envs, dtype=bool)
+        truncated = np.zeros(self.num_envs, dtype=bool)
+        info = _empty_info(self.num_envs, self.observation_size)
+        _step_envs(self.envs, actions, self._obs, rewards, terminated, truncated, info)
+        return self._obs.copy(), rewards, terminated, truncated, info
+
+    def close(self):
+        pass
+
+
+def _async_worker(remote, parent_remote, env_fns, shm_name, shape, lo, core):
+    parent_remote.close()
+    # Simulation is pure Python; keep any numeric library to one thread on its core.
+    if core is not None:
+        pin_process([core])
+    set_thread_limits(1)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    obs = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+    envs = [fn() for fn in env_fns]
+    n = len(envs)
+    try:
+        while True:
+            cmd, data = remote.recv()
+            if cmd == 'step':
+                rewards = np.zeros(n, dtype=np.float64)
+                terminated = np.zeros(n, dtype=bool)
+                truncated = np.zeros(n, dtype=bool)
+                info = _empty_info(n, shape[1])
+                _step_envs(envs, data, obs[lo:lo + n], rewards, terminated, truncated, info)
+                remote.send((rewards, terminated, truncated, info))
+            elif cmd == 'reset':
+                for j, (env, s) in enumerate(zip(envs, data)):
+                    obs[lo + j], _ = env.reset(seed=s)
+                remote.send(None)
+            elif cmd == 'close':
+                break
+    except (KeyboardInterrupt, EOFError):
+        pass
+    finally:
+        del obs
+        shm.close()
+        remote.close()
+
+
+class AsyncVectorEnv:
+    """Runs environments in worker processes with observations in shared memory.
+
+    `num_workers` processes each own a contiguous slice of the environments.
+    `step_async`/`step_wait` let callers overlap policy work with simulation.
+    With `cores`, worker i is pinned to `cores[i % len(cores)]`.
+    """
+
+    def __init__(self, env_fns, num_workers: int = None, context: str = None, cores=None):
+        env_fns = list(env_fns)
+        self.num_envs = len(env_fns)
+        probe = env_fns[0]()
+        self.observation_size = probe.observation_size
+        self.num_actions = probe.num_actions
+        del probe
+
+        num_workers = max(1, min(num_workers or mp.cpu_count(), self.num_envs))
+        bounds = np.linspace(0, self.num_envs, num_workers + 1).astype(int)
+        self._slices = [(int(lo), int(hi)) for lo, hi in zip(bounds[:-1], bounds[1:])]
+
+        shape = (self.num_envs, self.observation_size)
+        self._shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * 4)
+        self._obs = np.ndarray(shape, dtype=np.float32, buffer=self._shm.buf)
+        self._obs[:] = 0.0
+
+        ctx = mp.get_context(context)
+        self._remotes, self._procs = [], []
+        for i, (lo, hi) in enumerate(self._slices):
+            remote, work_remote = ctx.Pipe()
+            core = cores[i % len(cores)] if cores else None
+            proc = ctx.Process(target=_async_worker,
+                               args=(work_remote, remote, env_fns[lo:hi], self._shm.name, shape, lo, core),
+                               daemon=True)
+            proc.start()
+            work_remote.close()
+            self._remotes.append(remote)
+            self._procs.append(proc)
+        self._waiting = False
+        self.closed = False
+
+    def reset(self, seed=None):
+        seeds = _seed_list(seed, self.num_envs)
+        for remote, (lo, hi) in zip(self._remotes, self._slices):
+            remote.send(('reset', seeds[lo:hi]))
+        for remote in self._remotes:
+            remote.recv()
+        return self._obs.copy(), {}
+
+    def step_async(self, actions):
+        actions = np.asarray(actions)
+        for remote, (lo, hi) in zip(self._remotes, self._slices):
+            remote.send(('step', actions[lo:hi]))
+        self._waiting = True
+
+    def step_wait(self):
+        results = [remote.recv() for remote in self._remotes]
+        self._waiting = False
+        rewards = np.concatenate([r[0] for r in results])
+        terminated = np.concatenate([r[1] for r in results])
+        truncated = np.concatenate([r[2] for r in results])
+        info = {k: np.concatenate([r[3][k] for r in results]) for k in results[0][3]}
+        return self._obs.copy(), rewards, terminated, truncated, info
+
+    def step(self, actions):
+        self.step_async(actions)
+        return self.step_wait()
+
+    def close(self):
+        if self.closed:
+            return
+        if self._waiting:
+            for remote in self._remotes:
+                remote.recv()
+        for remote in self._remotes:
+            try:
+                remote.send(('close', None))
+            except (BrokenPipeError, EOFError):
+                pass
+        for proc in self._procs:
+            proc.join(timeout=5)
+        del self._obs
+        self._shm.close()
+        self._shm.unlink()
+        self.closed = True
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+def make_vector_env(num_envs: int, asynchronous: bool = False, max_steps: int = 1000, num_workers: int = None,
+                    rewards=None):
+    """Convenience constructor for N `GameEnv`s."""
+    env_fns = [functools.partial(GameEnv, max_steps=max_steps, rewards=rewards) for _ in range(num_envs)]
+    if asynchronous:
+        return AsyncVectorEnv(env_fns, num_workers=num_workers)
+    return SyncVectorEnv(env_fns)